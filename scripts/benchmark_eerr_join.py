@@ -0,0 +1,101 @@
+"""Compara la cadena de merges del EERR contra el plan de joins posicional.
+
+Mide tiempo y memoria máxima (tracemalloc) de ambas estrategias sobre los
+datos reales, opcionalmente replicando el portafolio para simular más tiendas.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Agregar el directorio raíz del proyecto al path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+import pandas as pd
+
+from ynk_modelo.domain.eerr import _aplicar_plan, _plan_union
+from ynk_modelo.io.excel import (
+    load_contribution,
+    load_dictionary,
+    load_other_costs,
+    load_payment_commission,
+    load_rent,
+    load_sales,
+    load_staff_costs,
+)
+
+
+def cargar_tablas(escala: int) -> dict[str, pd.DataFrame]:
+    tablas = {
+        "ventas": load_sales(),
+        "contrib": load_contribution(),
+        "diccionario": load_dictionary(),
+        "staff": load_staff_costs(),
+        "arriendo": load_rent(),
+        "otros": load_other_costs(),
+        "medio_pago": load_payment_commission(),
+    }
+    if escala <= 1:
+        return tablas
+
+    por_tienda = ("ventas", "contrib", "diccionario", "staff", "arriendo")
+    for nombre in por_tienda:
+        copias = []
+        for copia in range(escala):
+            tabla = tablas[nombre].copy()
+            tabla["Sucursal"] = tabla["Sucursal"].astype(str) + f"#{copia}"
+            copias.append(tabla)
+        tablas[nombre] = pd.concat(copias, ignore_index=True)
+    return tablas
+
+
+def cadena_merges(tablas: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    eerr = tablas["ventas"].merge(tablas["contrib"], how="left", on=["Sucursal", "Mes", "Escenario"])
+    eerr = eerr.merge(tablas["diccionario"], how="left", on="Sucursal")
+    eerr = eerr.merge(tablas["staff"], how="left", on="Sucursal")
+    eerr = eerr.merge(tablas["arriendo"], how="left", on="Sucursal")
+    eerr = eerr.merge(tablas["otros"], how="left", on="Banner")
+    return eerr.merge(tablas["medio_pago"], how="left", on="Banner")
+
+
+def plan_posicional(tablas: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    return _aplicar_plan(tablas, _plan_union(tablas))
+
+
+def medir(funcion, tablas: dict[str, pd.DataFrame], repeticiones: int) -> tuple[float, float, pd.DataFrame]:
+    tracemalloc.start()
+    resultado = funcion(tablas)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion(tablas)
+    duracion = (time.perf_counter() - inicio) / repeticiones
+    return duracion, pico / 1024**2, resultado
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de joins del EERR")
+    parser.add_argument("--escala", type=int, default=1, help="Veces que se replica el portafolio")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Repeticiones para medir tiempo")
+    args = parser.parse_args()
+
+    tablas = cargar_tablas(args.escala)
+    print(f"Filas de ventas: {len(tablas['ventas']):,}")
+
+    t_merge, m_merge, esperado = medir(cadena_merges, tablas, args.repeticiones)
+    t_plan, m_plan, obtenido = medir(plan_posicional, tablas, args.repeticiones)
+    pd.testing.assert_frame_equal(obtenido, esperado)
+
+    print(f"{'Estrategia':<12} {'Tiempo (ms)':>12} {'Pico (MB)':>10}")
+    print(f"{'merge':<12} {t_merge * 1000:>12.1f} {m_merge:>10.1f}")
+    print(f"{'posicional':<12} {t_plan * 1000:>12.1f} {m_plan:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
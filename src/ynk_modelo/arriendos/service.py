@@ -5,6 +5,7 @@ import hashlib
 import json
 import sqlite3
 import threading
+import time
 import urllib.error
 import urllib.request
 from datetime import date, datetime, timedelta
@@ -16,6 +17,7 @@ import pandas as pd
 from ynk_modelo.config import PROJECT_ROOT
 from ynk_modelo.database import db as db_module
 from ynk_modelo.database.db import get_db
+from ynk_modelo.database.models import bump_permission_version
 from ynk_modelo.utils.logger import get_logger
 
 logger = get_logger()
@@ -28,6 +30,12 @@ RESTORE_IN_PROGRESS = "RESTORE_IN_PROGRESS"
 _BACKUP_LOCK = threading.Lock()
 _RESTORE_LOCK = threading.Lock()
 
+# Cache en memoria de feature_flags; otros procesos se reflejan al refrescar.
+FEATURE_FLAG_REFRESH_SECONDS = 5.0
+_FEATURE_FLAGS: dict[str, bool] = {}
+_feature_flags_source: tuple[str, float] | None = None  # (base, vence)
+_FEATURE_FLAGS_LOCK = threading.Lock()
+
 
 class ArriendosOperationError(RuntimeError):
     """Error de operacion para APIs del modulo arriendos."""
@@ -80,18 +88,34 @@ def _json(value: Any) -> str:
     return json.dumps(value, ensure_ascii=False, default=str)
 
 
+def _load_feature_flags() -> dict[str, bool]:
+    global _FEATURE_FLAGS, _feature_flags_source
+    with _FEATURE_FLAGS_LOCK:
+        db_path = str(db_module.DB_PATH)
+        source = _feature_flags_source
+        if source is not None and source[0] == db_path and source[1] > time.monotonic():
+            return _FEATURE_FLAGS
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute("SELECT key_name, is_enabled FROM feature_flags")
+        flags = {row[0]: bool(row[1]) for row in cursor.fetchall()}
+        conn.close()
+        _FEATURE_FLAGS = flags
+        _feature_flags_source = (db_path, time.monotonic() + FEATURE_FLAG_REFRESH_SECONDS)
+        return flags
+
+
+def invalidate_feature_flags() -> None:
+    global _feature_flags_source
+    with _FEATURE_FLAGS_LOCK:
+        _feature_flags_source = None
+
+
 def is_feature_enabled(key: str = FEATURE_FLAG_KEY) -> bool:
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT is_enabled FROM feature_flags WHERE key_name = ?",
-        (key,),
-    )
-    row = cursor.fetchone()
-    conn.close()
-    if not row:
-        return False
-    return bool(row[0])
+    source = _feature_flags_source
+    if source is not None and source[1] > time.monotonic() and source[0] == str(db_module.DB_PATH):
+        return _FEATURE_FLAGS.get(key, False)
+    return _load_feature_flags().get(key, False)
 
 
 def set_feature_flag(enabled: bool, user_id: int | None, key: str = FEATURE_FLAG_KEY) -> None:
@@ -110,6 +134,9 @@ def set_feature_flag(enabled: bool, user_id: int | None, key: str = FEATURE_FLAG
     )
     conn.commit()
     conn.close()
+    with _FEATURE_FLAGS_LOCK:
+        if _feature_flags_source is not None and _feature_flags_source[0] == str(db_module.DB_PATH):
+            _FEATURE_FLAGS[key] = bool(enabled)
 
 
 def dashboard_metrics() -> dict[str, Any]:
@@ -1233,6 +1260,8 @@ def restore_backup(backup_id: str, user_id: int | None) -> dict[str, Any]:
         # Backup preventivo antes del restore.
         pre_restore = create_backup(user_id=user_id, reason=f"pre_restore:{backup_id}")
         _restore_sqlite_backup(backup_path, db_module.DB_PATH)
+        invalidate_feature_flags()
+        bump_permission_version()
 
         conn = get_db()
         cursor = conn.cursor()
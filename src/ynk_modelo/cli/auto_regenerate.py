@@ -4,7 +4,7 @@ from __future__ import annotations
 import time
 from datetime import datetime
 
-from ynk_modelo.cli.main import generate_reports
+from ynk_modelo.cli.main import generate_reports, generation_version
 from ynk_modelo.config import (
     AUTO_REGENERATE,
     CHECK_INTERVAL,
@@ -13,11 +13,22 @@ from ynk_modelo.config import (
     IS_PRODUCTION,
 )
 from ynk_modelo.utils.file_watcher import FileWatcher
+from ynk_modelo.utils.regeneration import RegenerationCoordinator, report_coordinator
 from ynk_modelo.utils.logger import get_logger
 
 logger = get_logger()
 
 
+def regenerate(watcher: FileWatcher, coordinator: RegenerationCoordinator) -> bool:
+    """Genera los reportes salvo que otro proceso ya haya generado esta versión."""
+    generado = coordinator.run(
+        generation_version(watcher),
+        lambda: generate_reports(HTML_STATE_OUTPUT, HTML_SIMULATOR_OUTPUT),
+    )
+    watcher.update_cache()
+    return generado
+
+
 def run_auto_regenerate() -> None:
     """Ejecuta loop de auto-regeneración en PROD."""
     
@@ -36,13 +47,15 @@ def run_auto_regenerate() -> None:
     logger.info("=" * 70)
     
     watcher = FileWatcher()
+    coordinator = report_coordinator()
     
     # Primera generación al iniciar
     logger.info("Generando reportes iniciales...")
     try:
-        generate_reports(HTML_STATE_OUTPUT, HTML_SIMULATOR_OUTPUT)
-        watcher.update_cache()
-        logger.info("✓ Reportes iniciales generados exitosamente")
+        if regenerate(watcher, coordinator):
+            logger.info("✓ Reportes iniciales generados exitosamente")
+        else:
+            logger.info("✓ Reportes iniciales ya vigentes")
     except Exception as e:
         logger.error(f"✗ Error al generar reportes iniciales: {e}", exc_info=True)
     
@@ -68,10 +81,12 @@ def run_auto_regenerate() -> None:
                 
                 try:
                     start_time = time.time()
-                    generate_reports(HTML_STATE_OUTPUT, HTML_SIMULATOR_OUTPUT)
+                    generado = regenerate(watcher, coordinator)
                     elapsed = time.time() - start_time
                     
-                    watcher.update_cache()
+                    if not generado:
+                        logger.info("✓ Otro proceso ya generó esta versión de data")
+                        continue
                     
                     logger.info("=" * 70)
                     logger.info(f"✓ REPORTES REGENERADOS EXITOSAMENTE")
@@ -2,7 +2,10 @@
 from __future__ import annotations
 
 import argparse
+import hmac
 import os
+import shutil
+import threading
 import time
 from datetime import datetime
 from functools import wraps
@@ -10,6 +13,7 @@ from pathlib import Path
 
 from flask import (
     Flask,
+    jsonify,
     redirect,
     render_template,
     request,
@@ -28,19 +32,59 @@ from flask_login import (
 
 from ynk_modelo.arriendos import create_blueprint
 from ynk_modelo.arriendos import service as arriendos_service
-from ynk_modelo.cli.main import generate_reports
+from ynk_modelo.cli.main import generate_reports, generation_version
 from ynk_modelo.config import (
     AUTO_REGENERATE,
+    CHECK_INTERVAL,
+    EERR_TEMPLATE,
     HTML_SIMULATOR_OUTPUT,
     HTML_STATE_OUTPUT,
     IS_PRODUCTION,
+    METRICS_TOKEN,
     OUTPUT_DIR,
     PORT,
     PROJECT_ROOT,
+    SERVER_MODE,
+    SERVER_THREADS,
+    SERVER_WORKERS,
+    SIMULATOR_TEMPLATE,
     STATIC_DIR,
 )
 from ynk_modelo.database import init_db, User as DBUser
+from ynk_modelo.database.db import set_query_observer
+from ynk_modelo.interfaces.artifacts import (
+    Artifact,
+    content_hash,
+    etag_matches,
+    json_artifact,
+    load_artifact,
+    negotiate,
+)
+from ynk_modelo.interfaces.fragments import report_fragments
+from ynk_modelo.interfaces.heatmap import (
+    heatmap_grids_path,
+    parse_structure_request,
+    stores_heatmap,
+    structure_heatmap,
+)
+from ynk_modelo.interfaces.static_assets import IMMUTABLE_CACHE_CONTROL, StaticAssets
+from ynk_modelo.interfaces.simulation import (
+    load_simulation_context,
+    parse_simulation_request,
+    run_simulation,
+)
+from ynk_modelo.interfaces.store_payload import (
+    changes_artifact,
+    load_store_manifest,
+    load_store_payload,
+    store_artifact,
+    store_payload_path,
+    stores_artifact,
+)
+from ynk_modelo.utils import metrics, prefork
 from ynk_modelo.utils.file_watcher import FileWatcher
+from ynk_modelo.utils.regeneration import report_coordinator
+from ynk_modelo.utils.regenerator import BackgroundRegenerator
 from ynk_modelo.utils.logger import get_logger
 
 logger = get_logger()
@@ -56,15 +100,23 @@ class User(UserMixin):
         self.email = db_user.email
         self._db_user = db_user
         self._is_active = db_user.is_active
+        self._permissions: frozenset[str] | None = None
     
     @property
     def is_active(self) -> bool:
         """Propiedad is_active requerida por Flask-Login."""
         return self._is_active
     
+    @property
+    def permissions(self) -> frozenset[str]:
+        """Permisos del usuario, leídos una vez por request desde la caché del modelo."""
+        if self._permissions is None:
+            self._permissions = self._db_user.get_permissions()
+        return self._permissions
+    
     def has_permission(self, permission_name: str) -> bool:
         """Verifica si el usuario tiene un permiso."""
-        return self._db_user.has_permission(permission_name)
+        return permission_name in self.permissions
     
     def has_role(self, role_name: str) -> bool:
         """Verifica si el usuario tiene un rol."""
@@ -75,14 +127,47 @@ class User(UserMixin):
         return self._db_user.get_roles()
 
 
-# Inicializar Flask
+# Inicializar Flask (``serve_static`` atiende /static con huellas de contenido)
 app = Flask(
     __name__,
     template_folder=str(PROJECT_ROOT / "templates"),
-    static_folder=str(STATIC_DIR),
+    static_folder=None,
 )
 app.secret_key = os.getenv("SECRET_KEY", "ynk-dev-secret-key-change-in-production")
 
+# Huellas de los estáticos; ``prepare_server`` las calcula al iniciar (antes de
+# crear workers), no al importar el módulo.
+static_assets = StaticAssets(STATIC_DIR, verificar_cambios=not IS_PRODUCTION)
+
+
+def static_url(filename: str) -> str:
+    """URL con huella de contenido de un archivo de ``static/``."""
+    return url_for("serve_static", filename=static_assets.fingerprinted(filename))
+
+
+app.jinja_env.globals["static_url"] = static_url
+
+# Métricas por endpoint; con varios workers cada uno publica su instantánea aquí.
+METRICS_DIR = OUTPUT_DIR / ".metrics"
+METRICS_SNAPSHOT_SECONDS = 5.0
+metrics_snapshot_path: Path | None = None
+
+
+@app.before_request
+def start_request_metrics():
+    metrics.start_request()
+
+
+@app.after_request
+def finish_request_metrics(response):
+    metrics.finish_request(
+        request.endpoint or "not_found",
+        request.method,
+        response.status_code,
+        response.content_length or 0,
+    )
+    return response
+
 # Inicializar Flask-Login
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -132,7 +217,7 @@ app.register_blueprint(create_blueprint())
 def load_user(user_id: str) -> User | None:
     """Carga usuario desde ID."""
     try:
-        db_user = DBUser.get_by_id(int(user_id))
+        db_user = DBUser.get_cached(int(user_id))
         if db_user and db_user.is_active:
             return User(db_user)
     except (ValueError, TypeError):
@@ -163,11 +248,76 @@ def permission_required(permission_name: str):
     return decorator
 
 
+# Una sola generación por versión de data, también frente a ynk-auto/ynk-server.
+coordinator = report_coordinator()
+
+
+def _generate_reports(eerr_workers: int | None = None) -> None:
+    with metrics.timed_stage("total"):
+        generate_reports(HTML_STATE_OUTPUT, HTML_SIMULATOR_OUTPUT, workers=eerr_workers)
+
+
+def regenerate_reports(eerr_workers: int | None = None) -> None:
+    """Genera ambos reportes y registra los timestamps de data usados.
+
+    ``eerr_workers`` fija los procesos del cálculo del EERR (por defecto
+    ``EERR_WORKERS``).
+    """
+    start_time = time.time()
+    generado = coordinator.run(
+        generation_version(file_watcher),
+        lambda: _generate_reports(eerr_workers),
+    )
+    elapsed = time.time() - start_time
+
+    file_watcher.update_cache()
+    if not generado:
+        logger.info("✓ Reportes ya vigentes para la versión actual de data")
+        return
+
+    logger.info("✓ REPORTES REGENERADOS EXITOSAMENTE")
+    logger.info(f"  Tiempo: {elapsed:.2f}s")
+    logger.info(f"  Fecha/Hora: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+# Las rutas sirven la última versión publicada mientras se genera la nueva.
+regenerator = BackgroundRegenerator(regenerate_reports)
+# Con varios workers solo el designado detecta cambios y regenera.
+regenerates_here = True
+
+
+# Espera máxima de un worker no designado por un reporte que aún no existe.
+REPORT_WAIT_SECONDS = 300.0
+
+
+def request_regeneration(motivo: str) -> bool:
+    """Encola una regeneración si este proceso es el encargado de regenerar."""
+    if not regenerates_here:
+        return False
+    return regenerator.request(motivo)
+
+
+def wait_for_report(output_path: Path) -> None:
+    """Espera la primera versión publicada de ``output_path``.
+
+    El worker encargado la genera; los demás se la piden con el archivo de
+    pedido del coordinador y esperan a que aparezca, sin generar por su cuenta.
+    """
+    motivo = f"falta {output_path.name}"
+    if regenerates_here:
+        regenerator.request(motivo)
+        regenerator.wait()
+        return
+    coordinator.request_remote(motivo)
+    if not coordinator.wait_until(lambda: _report_published(output_path), REPORT_WAIT_SECONDS):
+        logger.warning(f"{output_path.name} no se publicó tras {REPORT_WAIT_SECONDS:.0f}s")
+
+
 def check_and_regenerate() -> tuple[bool, list[str]]:
-    """Verifica cambios y regenera si es necesario."""
+    """Verifica cambios y encola la regeneración en segundo plano si corresponde."""
     # Verificar si auto-regeneración está habilitada
-    if not AUTO_REGENERATE:
-        logger.debug("Auto-regeneración deshabilitada")
+    if not AUTO_REGENERATE or not regenerates_here:
+        logger.debug("Auto-regeneración deshabilitada en este proceso")
         return False, []
 
     try:
@@ -175,29 +325,86 @@ def check_and_regenerate() -> tuple[bool, list[str]]:
 
         if has_changes:
             logger.info("=" * 70)
-            logger.info("¡CAMBIOS DETECTADOS! Regenerando reportes...")
+            logger.info("¡CAMBIOS DETECTADOS! Encolando regeneración de reportes...")
             logger.info("-" * 70)
             for file_info in changed_files:
                 logger.info(f"  • {file_info}")
-            logger.info("-" * 70)
-
-            start_time = time.time()
-            generate_reports(HTML_STATE_OUTPUT, HTML_SIMULATOR_OUTPUT)
-            elapsed = time.time() - start_time
-
-            file_watcher.update_cache()
-
-            logger.info("✓ REPORTES REGENERADOS EXITOSAMENTE")
-            logger.info(f"  Tiempo: {elapsed:.2f}s")
-            logger.info(f"  Fecha/Hora: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
             logger.info("=" * 70)
+            request_regeneration("cambios en data")
 
         return has_changes, changed_files
     except Exception as e:
-        logger.error(f"✗ ERROR al verificar/regenerar: {e}", exc_info=True)
+        logger.error(f"✗ ERROR al verificar cambios: {e}", exc_info=True)
         return False, []
 
 
+# Permisos que cambian el brand-bar de las páginas de reporte.
+PAGE_PERMISSIONS = (
+    "access_eerr_report",
+    "access_simulator",
+    "access_admin_users",
+    "access_arriendos_dashboard",
+)
+WRAPPER_TEMPLATES = ("report_wrapper.html", "base.html", "_brand_bar.html")
+
+# Páginas ya renderizadas y comprimidas, por ETag.
+_PAGE_CACHE: dict[str, Artifact] = {}
+_PAGE_CACHE_MAX = 64
+
+
+def artifact_response(artefacto: Artifact, mimetype: str):
+    """Sirve un artefacto respetando Accept-Encoding e If-None-Match."""
+    estado, cuerpo, cabeceras = negotiate(
+        artefacto,
+        request.headers.get("Accept-Encoding"),
+        request.headers.get("If-None-Match"),
+    )
+    return app.response_class(cuerpo, status=estado, mimetype=mimetype, headers=cabeceras)
+
+
+def page_etag(output_path: Path, active_page: str) -> str | None:
+    """ETag de una página de reporte para el usuario actual.
+
+    Combina el hash del HTML generado, los permisos que cambian el brand-bar,
+    las huellas de los estáticos y la versión de las plantillas que lo envuelven.
+    """
+    try:
+        artefacto = load_artifact(output_path)
+    except FileNotFoundError:
+        return None
+    templates_dir = PROJECT_ROOT / "templates"
+    firma = [
+        artefacto.etag,
+        active_page,
+        *("1" if current_user.has_permission(permiso) else "0" for permiso in PAGE_PERMISSIONS),
+        "1" if arriendos_service.is_feature_enabled() else "0",
+        static_assets.version,
+        *(str((templates_dir / nombre).stat().st_mtime_ns) for nombre in WRAPPER_TEMPLATES),
+    ]
+    return content_hash("|".join(firma).encode("utf-8"))
+
+
+def cached_page(etag: str | None) -> Artifact | None:
+    """Página ya renderizada para el ETag, o marcador vacío si el cliente la tiene."""
+    if etag is None:
+        return None
+    artefacto = _PAGE_CACHE.get(etag)
+    if artefacto is None and etag_matches(request.headers.get("If-None-Match"), etag):
+        artefacto = Artifact(b"", etag)
+    return artefacto
+
+
+def page_response(html: str, etag: str | None):
+    """Responde una página renderizada, guardándola comprimida bajo su ETag."""
+    if etag is None:
+        return html
+    if len(_PAGE_CACHE) >= _PAGE_CACHE_MAX:
+        _PAGE_CACHE.clear()
+    artefacto = Artifact(html.encode("utf-8"), etag)
+    _PAGE_CACHE[etag] = artefacto
+    return artifact_response(artefacto, "text/html")
+
+
 # ============================================================================
 # RUTAS DE AUTENTICACIÓN
 # ============================================================================
@@ -276,261 +483,70 @@ def dashboard():
                          arriendos_enabled=arriendos_enabled)
 
 
-@app.route("/EERR_por_tienda.html")
-@permission_required("access_eerr_report")
-def eerr_report():
-    """Sirve el reporte de EERR."""
-    from ynk_modelo.config import EERR_TEMPLATE, HTML_STATE_OUTPUT
-    
-    # Verificar si el template es más reciente que el output
-    template_path = EERR_TEMPLATE
-    output_path = HTML_STATE_OUTPUT
-    
-    should_regenerate = False
-    if not output_path.exists():
-        should_regenerate = True
-        logger.info("Archivo EERR_por_tienda.html no existe, regenerando...")
-    elif template_path.exists():
-        template_mtime = template_path.stat().st_mtime
-        output_mtime = output_path.stat().st_mtime
-        if template_mtime > output_mtime:
-            should_regenerate = True
-            logger.info("Template eerr_report.html es más reciente, regenerando...")
-    
-    if should_regenerate:
-        try:
-            from ynk_modelo.cli.main import generate_reports
-            generate_reports(HTML_STATE_OUTPUT, HTML_SIMULATOR_OUTPUT)
-            logger.info("✓ Reporte EERR regenerado exitosamente")
-        except Exception as e:
-            logger.error(f"Error al regenerar reporte EERR: {e}", exc_info=True)
+def _report_published(output_path: Path) -> bool:
+    return output_path.exists() and store_payload_path(output_path).exists()
+
+
+def report_page(output_path: Path, template_path: Path, active_page: str, nombre: str):
+    """Sirve un reporte generado dentro de ``report_wrapper.html``.
+
+    Si la plantilla es más reciente o cambió la data se encola la regeneración
+    y se responde con la versión publicada; solo se espera cuando aún no
+    existe ninguna. El contenido y los scripts se extraen una vez por versión.
+    """
+    if not _report_published(output_path):
+        # Sin una versión publicada no hay nada que servir: se espera la generación.
+        logger.info(f"Archivo {output_path.name} no existe, regenerando...")
+        wait_for_report(output_path)
+    elif template_path.exists() and template_path.stat().st_mtime > output_path.stat().st_mtime:
+        logger.info(f"Template {template_path.name} es más reciente, regenerando en segundo plano...")
+        request_regeneration(f"plantilla {template_path.name} modificada")
     else:
         # Verificar cambios en datos también
         check_and_regenerate()
-    
-    # Leer el contenido del HTML generado
-    if output_path.exists():
-        html_content_raw = output_path.read_text(encoding="utf-8")
-        # Extraer el contenido del container y los scripts por separado
-        # El HTML generado tiene: <body><div class="container">...</div><script>...</script></body>
-        container_start = html_content_raw.find('<div class="container">')
-        script_start = html_content_raw.find('<script>', container_start) if container_start != -1 else -1
-        body_end = html_content_raw.rfind('</body>')
-        
-        if container_start != -1:
-            # Extraer solo el container (sin scripts)
-            if script_start != -1:
-                # Buscar el cierre del container principal antes del script
-                before_script = html_content_raw[container_start:script_start]
-                # Contar divs para encontrar el cierre correcto del container
-                last_div_pos = -1
-                for i in range(len(before_script) - 6, -1, -1):
-                    if before_script[i:i+6] == '</div>':
-                        # Verificar si este cierra el container principal
-                        before_this_div = before_script[:i]
-                        divs_open = before_this_div.count('<div')
-                        divs_close = before_this_div.count('</div>')
-                        if divs_open == divs_close + 1:
-                            # Este es el cierre del container principal
-                            last_div_pos = container_start + i + 6
-                            break
-                if last_div_pos != -1:
-                    html_content = html_content_raw[container_start:last_div_pos]
-                else:
-                    # Fallback: tomar hasta antes del script
-                    html_content = html_content_raw[container_start:script_start].rstrip()
-            else:
-                # Si no hay script, buscar hasta </body>
-                if body_end != -1:
-                    html_content = html_content_raw[container_start:body_end].rstrip()
-                else:
-                    html_content = html_content_raw[container_start:]
-            
-            # Extraer los scripts por separado
-            if script_start != -1 and body_end != -1:
-                html_scripts = html_content_raw[script_start:body_end].rstrip()
-            else:
-                html_scripts = ""
-        else:
-            # Si no encuentra el container, buscar body y extraer todo excepto brand-bar
-            body_start = html_content_raw.find('<body>')
-            if body_start != -1:
-                if body_end != -1:
-                    body_content = html_content_raw[body_start + 6:body_end]
-                    # Eliminar brand-bar si existe
-                    brand_bar_start = body_content.find('<div class="brand-bar">')
-                    if brand_bar_start != -1:
-                        # Buscar el cierre del brand-bar contando divs
-                        pos = brand_bar_start
-                        depth = 1
-                        brand_bar_end = -1
-                        while pos < len(body_content) and depth > 0:
-                            pos = body_content.find('</div>', pos + 1)
-                            if pos == -1:
-                                break
-                            # Contar divs antes de esta posición
-                            before = body_content[brand_bar_start:pos]
-                            depth = before.count('<div') - before.count('</div>')
-                            if depth == 0:
-                                brand_bar_end = pos + 6
-                                break
-                        if brand_bar_end != -1:
-                            body_content = body_content[:brand_bar_start] + body_content[brand_bar_end:]
-                    html_content = body_content
-                    html_scripts = ""
-                else:
-                    html_content = html_content_raw[body_start + 6:]
-                    html_scripts = ""
-            else:
-                html_content = "<div class='container'><p>Error: No se pudo generar el reporte.</p></div>"
-                html_scripts = ""
-    else:
-        html_content = "<div class='container'><p>Error: No se pudo generar el reporte.</p></div>"
-        html_scripts = ""
-    
+
+    etag = page_etag(output_path, active_page)
+    cached = cached_page(etag)
+    if cached is not None:
+        return artifact_response(cached, "text/html")
+
+    try:
+        html_content, html_scripts = report_fragments(output_path)
+    except FileNotFoundError:
+        html_content, html_scripts = "", ""
+    if not html_content:
+        html_content = f"<div class='container'><p>Error: No se pudo generar el {nombre}.</p></div>"
+
     # Obtener permisos para el brand-bar
     has_eerr = current_user.has_permission("access_eerr_report")
     has_simulator = current_user.has_permission("access_simulator")
     has_admin = current_user.has_permission("access_admin_users")
-    
-    logger.info(f"Renderizando report_wrapper.html con html_content length: {len(html_content)}")
-    logger.info(f"Permisos - EERR: {has_eerr}, Simulator: {has_simulator}, Admin: {has_admin}")
-    
-    return render_template("report_wrapper.html",
+
+    logger.debug(f"Renderizando report_wrapper.html ({active_page}) con html_content length: {len(html_content)}")
+
+    html = render_template("report_wrapper.html",
                          html_content=html_content,
                          html_scripts=html_scripts,
-                         active_page="eerr",
+                         report_version=report_version(output_path),
+                         active_page=active_page,
                          has_access_eerr_report=has_eerr,
                          has_access_simulator=has_simulator,
                          has_access_admin_users=has_admin)
+    return page_response(html, etag)
+
+
+@app.route("/EERR_por_tienda.html")
+@permission_required("access_eerr_report")
+def eerr_report():
+    """Sirve el reporte de EERR."""
+    return report_page(HTML_STATE_OUTPUT, EERR_TEMPLATE, "eerr", "reporte")
 
 
 @app.route("/Simulador_EERR.html")
 @permission_required("access_simulator")
 def simulator():
     """Sirve el simulador."""
-    from ynk_modelo.config import SIMULATOR_TEMPLATE, HTML_SIMULATOR_OUTPUT
-    
-    # Verificar si el template es más reciente que el output
-    template_path = SIMULATOR_TEMPLATE
-    output_path = HTML_SIMULATOR_OUTPUT
-    
-    should_regenerate = False
-    if not output_path.exists():
-        should_regenerate = True
-        logger.info("Archivo Simulador_EERR.html no existe, regenerando...")
-    elif template_path.exists():
-        template_mtime = template_path.stat().st_mtime
-        output_mtime = output_path.stat().st_mtime
-        if template_mtime > output_mtime:
-            should_regenerate = True
-            logger.info("Template simulador.html es más reciente, regenerando...")
-    
-    if should_regenerate:
-        try:
-            from ynk_modelo.cli.main import generate_reports
-            generate_reports(HTML_STATE_OUTPUT, HTML_SIMULATOR_OUTPUT)
-            logger.info("✓ Simulador regenerado exitosamente")
-        except Exception as e:
-            logger.error(f"Error al regenerar simulador: {e}", exc_info=True)
-    else:
-        # Verificar cambios en datos también
-        check_and_regenerate()
-    
-    # Leer el contenido del HTML generado
-    if output_path.exists():
-        html_content_raw = output_path.read_text(encoding="utf-8")
-        # Extraer el contenido del container y los scripts por separado
-        container_start = html_content_raw.find('<div class="container">')
-        script_start = html_content_raw.find('<script>', container_start) if container_start != -1 else -1
-        body_end = html_content_raw.rfind('</body>')
-        
-        if container_start != -1:
-            # Extraer solo el container (sin scripts)
-            if script_start != -1:
-                # Buscar el cierre del container principal antes del script
-                before_script = html_content_raw[container_start:script_start]
-                # Contar divs para encontrar el cierre correcto del container
-                last_div_pos = -1
-                for i in range(len(before_script) - 6, -1, -1):
-                    if before_script[i:i+6] == '</div>':
-                        # Verificar si este cierra el container principal
-                        before_this_div = before_script[:i]
-                        divs_open = before_this_div.count('<div')
-                        divs_close = before_this_div.count('</div>')
-                        if divs_open == divs_close + 1:
-                            # Este es el cierre del container principal
-                            last_div_pos = container_start + i + 6
-                            break
-                if last_div_pos != -1:
-                    html_content = html_content_raw[container_start:last_div_pos]
-                else:
-                    # Fallback: tomar hasta antes del script
-                    html_content = html_content_raw[container_start:script_start].rstrip()
-            else:
-                # Si no hay script, buscar hasta </body>
-                if body_end != -1:
-                    html_content = html_content_raw[container_start:body_end].rstrip()
-                else:
-                    html_content = html_content_raw[container_start:]
-            
-            # Extraer los scripts por separado
-            if script_start != -1 and body_end != -1:
-                html_scripts = html_content_raw[script_start:body_end].rstrip()
-            else:
-                html_scripts = ""
-        else:
-            # Si no encuentra el container, buscar body y extraer todo excepto brand-bar
-            body_start = html_content_raw.find('<body>')
-            if body_start != -1:
-                if body_end != -1:
-                    body_content = html_content_raw[body_start + 6:body_end]
-                    # Eliminar brand-bar si existe
-                    brand_bar_start = body_content.find('<div class="brand-bar">')
-                    if brand_bar_start != -1:
-                        # Buscar el cierre del brand-bar contando divs
-                        pos = brand_bar_start
-                        depth = 1
-                        brand_bar_end = -1
-                        while pos < len(body_content) and depth > 0:
-                            pos = body_content.find('</div>', pos + 1)
-                            if pos == -1:
-                                break
-                            # Contar divs antes de esta posición
-                            before = body_content[brand_bar_start:pos]
-                            depth = before.count('<div') - before.count('</div>')
-                            if depth == 0:
-                                brand_bar_end = pos + 6
-                                break
-                        if brand_bar_end != -1:
-                            body_content = body_content[:brand_bar_start] + body_content[brand_bar_end:]
-                    html_content = body_content
-                    html_scripts = ""
-                else:
-                    html_content = html_content_raw[body_start + 6:]
-                    html_scripts = ""
-            else:
-                html_content = "<div class='container'><p>Error: No se pudo generar el simulador.</p></div>"
-                html_scripts = ""
-    else:
-        html_content = "<div class='container'><p>Error: No se pudo generar el simulador.</p></div>"
-        html_scripts = ""
-    
-    # Obtener permisos para el brand-bar
-    has_eerr = current_user.has_permission("access_eerr_report")
-    has_simulator = current_user.has_permission("access_simulator")
-    has_admin = current_user.has_permission("access_admin_users")
-    
-    logger.info(f"Renderizando report_wrapper.html (simulator) con html_content length: {len(html_content)}")
-    logger.info(f"Permisos - EERR: {has_eerr}, Simulator: {has_simulator}, Admin: {has_admin}")
-    
-    return render_template("report_wrapper.html",
-                         html_content=html_content,
-                         html_scripts=html_scripts,
-                         active_page="simulator",
-                         has_access_eerr_report=has_eerr,
-                         has_access_simulator=has_simulator,
-                         has_access_admin_users=has_admin)
+    return report_page(HTML_SIMULATOR_OUTPUT, SIMULATOR_TEMPLATE, "simulator", "simulador")
 
 
 # ============================================================================
@@ -540,8 +556,16 @@ def simulator():
 
 @app.route("/static/<path:filename>")
 def serve_static(filename):
-    """Sirve archivos estáticos (CSS, imágenes, etc.)."""
-    return send_from_directory(STATIC_DIR, filename)
+    """Sirve archivos estáticos (CSS, imágenes, etc.).
+
+    Las URLs con la huella vigente se cachean un año como inmutables; el resto
+    se revalida como antes.
+    """
+    archivo, inmutable = static_assets.resolve(filename)
+    respuesta = send_from_directory(STATIC_DIR, archivo)
+    if inmutable:
+        respuesta.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return respuesta
 
 
 @app.route("/api/check")
@@ -552,7 +576,7 @@ def api_check():
 
     if has_changes:
         return {
-            "status": "regenerated",
+            "status": "regenerating",
             "changed_files": changed_files,
             "timestamp": datetime.now().isoformat(),
         }
@@ -560,6 +584,48 @@ def api_check():
     return {"status": "no_changes", "timestamp": datetime.now().isoformat()}
 
 
+@app.route("/api/metrics")
+def api_metrics():
+    """Métricas por endpoint y de regeneración en formato de texto de Prometheus.
+
+    Se leen con ``Authorization: Bearer <METRICS_TOKEN>`` o con una sesión de
+    administrador. Con varios workers suma las instantáneas de los demás.
+    """
+    autorizacion = request.headers.get("Authorization", "")
+    por_token = bool(METRICS_TOKEN) and hmac.compare_digest(autorizacion, f"Bearer {METRICS_TOKEN}")
+    if not por_token and not (current_user.is_authenticated and current_user.has_permission("access_admin_users")):
+        return jsonify({"error": "No autorizado", "code": "UNAUTHORIZED"}), 401
+
+    instantaneas = []
+    if metrics_snapshot_path is not None:
+        instantaneas = metrics.read_snapshots(METRICS_DIR, excluir=metrics_snapshot_path)
+    return app.response_class(metrics.REGISTRY.render(instantaneas), content_type=metrics.CONTENT_TYPE)
+
+
+def report_version(output_path: Path) -> str | None:
+    """Versión publicada (ETag) de un reporte, o ``None`` si no existe."""
+    try:
+        return load_artifact(output_path).etag
+    except FileNotFoundError:
+        return None
+
+
+@app.route("/api/version")
+@login_required
+def api_version():
+    """Versión publicada de cada reporte y estado de la regeneración de fondo.
+
+    Las páginas lo consultan para avisar cuando hay datos nuevos.
+    """
+    return {
+        "versions": {
+            "eerr": report_version(HTML_STATE_OUTPUT),
+            "simulator": report_version(HTML_SIMULATOR_OUTPUT),
+        },
+        **regenerator.status(),
+    }
+
+
 @app.route("/api/status")
 @login_required
 def api_status():
@@ -572,6 +638,123 @@ def api_status():
     }
 
 
+def store_payload_response(output: Path, store: str | None = None):
+    """Responde con la ficha de una tienda o un lote ``?store=A&store=B``.
+
+    Los datos salen del artefacto escrito junto al HTML generado, que se
+    mantiene en memoria mientras el archivo no cambie. El artefacto completo
+    se sirve con su variante gzip precomprimida.
+    """
+    ruta = store_payload_path(output)
+    try:
+        if store is not None:
+            artefacto = store_artifact(ruta, store)
+        elif request.args.getlist("store"):
+            artefacto = stores_artifact(ruta, request.args.getlist("store"))
+        else:
+            artefacto = load_artifact(ruta)
+    except FileNotFoundError:
+        return jsonify({"error": "Datos por tienda no generados", "code": "PAYLOAD_NOT_FOUND"}), 404
+
+    if artefacto is None:
+        return jsonify({"error": "Tienda no encontrada", "code": "STORE_NOT_FOUND"}), 404
+    return artifact_response(artefacto, "application/json")
+
+
+def store_changes_response(output: Path):
+    """Responde las fichas que cambiaron desde ``?since=<versión>``.
+
+    ``?store=A&store=B`` limita el delta a las tiendas que el cliente ya
+    cargó; una versión desconocida devuelve ``full`` con todas ellas.
+    """
+    tiendas = request.args.getlist("store") or None
+    try:
+        artefacto = changes_artifact(output, request.args.get("since"), tiendas)
+    except FileNotFoundError:
+        return jsonify({"error": "Datos por tienda no generados", "code": "PAYLOAD_NOT_FOUND"}), 404
+    return artifact_response(artefacto, "application/json")
+
+
+@app.route("/api/eerr/stores")
+@app.route("/api/eerr/stores/<path:store>")
+@permission_required("access_eerr_report")
+def api_eerr_stores(store: str | None = None):
+    """Fichas de EERR por tienda para la carga bajo demanda del reporte."""
+    return store_payload_response(HTML_STATE_OUTPUT, store)
+
+
+@app.route("/api/simulator/stores")
+@app.route("/api/simulator/stores/<path:store>")
+@permission_required("access_simulator")
+def api_simulator_stores(store: str | None = None):
+    """Configuración del simulador por tienda para la carga bajo demanda."""
+    return store_payload_response(HTML_SIMULATOR_OUTPUT, store)
+
+
+@app.route("/api/simulator/heatmap", methods=["GET", "POST"])
+@app.route("/api/simulator/heatmap/<path:store>")
+@permission_required("access_simulator")
+def api_simulator_heatmap(store: str | None = None):
+    """Grilla de margen EBITDA por venta y margen, calculada en el servidor.
+
+    ``GET`` usa la estructura de costos de cada tienda (una o todas) con los
+    ejes de la query (``sales_min``, ``sales_step``, ``sales_levels``, ...);
+    sin ejes ni filtro de tiendas responde las grillas precalculadas. ``POST``
+    recibe ``{"structure", "sales", "margins"}`` para el escenario editado.
+    """
+    try:
+        if request.method == "POST":
+            estructura, ventas, margenes = parse_structure_request(request.get_data())
+            return artifact_response(
+                json_artifact(structure_heatmap(estructura, ventas, margenes)), "application/json"
+            )
+        tiendas = [store] if store is not None else request.args.getlist("store") or None
+        if tiendas is None and not request.args:
+            return artifact_response(load_artifact(heatmap_grids_path(HTML_STATE_OUTPUT)), "application/json")
+        grillas = stores_heatmap(store_payload_path(HTML_STATE_OUTPUT), tiendas, request.args)
+    except FileNotFoundError:
+        return jsonify({"error": "Datos por tienda no generados", "code": "PAYLOAD_NOT_FOUND"}), 404
+    except ValueError as exc:
+        return jsonify({"error": str(exc), "code": "INVALID_HEATMAP"}), 400
+
+    if store is not None:
+        if store not in grillas:
+            return jsonify({"error": "Tienda no encontrada", "code": "STORE_NOT_FOUND"}), 404
+        return artifact_response(json_artifact(grillas[store]), "application/json")
+    return artifact_response(json_artifact(grillas), "application/json")
+
+
+@app.route("/api/simulator/simulate", methods=["POST"])
+@permission_required("access_simulator")
+def api_simulator_simulate():
+    """EBITDA simulado por tienda y mes para un lote de ajustes.
+
+    Recibe ``{"stores" | "banner", "year", "months", "adjustments"}`` (ver
+    ``parse_simulation_request``) y evalúa todas las combinaciones de una vez.
+    """
+    try:
+        resultado = run_simulation(HTML_SIMULATOR_OUTPUT, parse_simulation_request(request.get_data()))
+    except FileNotFoundError:
+        return jsonify({"error": "Datos por tienda no generados", "code": "PAYLOAD_NOT_FOUND"}), 404
+    except ValueError as exc:
+        return jsonify({"error": str(exc), "code": "INVALID_SIMULATION"}), 400
+    return artifact_response(json_artifact(resultado), "application/json")
+
+
+@app.route("/api/eerr/changes")
+@permission_required("access_eerr_report")
+def api_eerr_changes():
+    """Fichas de EERR que cambiaron desde la versión que tiene el cliente."""
+    return store_changes_response(HTML_STATE_OUTPUT)
+
+
+@app.route("/api/simulator/changes")
+@permission_required("access_simulator")
+def api_simulator_changes():
+    """Configuraciones del simulador que cambiaron desde la versión del cliente."""
+    return store_changes_response(HTML_SIMULATOR_OUTPUT)
+
+
 # ============================================================================
 # GESTIÓN DE USUARIOS (requiere permiso manage_users)
 # ============================================================================
@@ -1096,14 +1279,137 @@ def admin_permissions_delete(permission_id: int):
 # ============================================================================
 
 
-def run_server(host: str = "0.0.0.0", port: int = PORT) -> None:
-    """Inicia el servidor Flask."""
+def preload_reports() -> None:
+    """Publica los reportes si faltan y los deja en memoria antes de crear workers.
+
+    Corre en el proceso maestro antes del fork, de modo que los workers heredan
+    las cachés por copy-on-write. El EERR se calcula aquí en forma secuencial:
+    con ``EERR_WORKERS`` > 1 el pool de procesos dejaría hilos vivos en el
+    maestro y hacer fork con hilos activos puede dejar candados tomados en los
+    workers.
+    """
+    salidas = (HTML_STATE_OUTPUT, HTML_SIMULATOR_OUTPUT)
+    try:
+        faltan = not all(o.exists() and store_payload_path(o).exists() for o in salidas)
+        if faltan or (AUTO_REGENERATE and not coordinator.is_current(generation_version(file_watcher))):
+            regenerate_reports(eerr_workers=1)
+    except Exception as e:
+        logger.error(f"✗ Error al generar reportes antes de iniciar: {e}", exc_info=True)
+
+    for salida in salidas:
+        try:
+            load_artifact(salida)
+            report_fragments(salida)
+            load_store_payload(store_payload_path(salida))
+            load_store_manifest(salida)
+        except FileNotFoundError as e:
+            logger.warning(f"No se pudo precargar {salida.name}: {e}")
+    for precarga in (
+        lambda: load_simulation_context(HTML_SIMULATOR_OUTPUT),
+        lambda: load_artifact(heatmap_grids_path(HTML_STATE_OUTPUT)),
+    ):
+        try:
+            precarga()
+        except FileNotFoundError:
+            pass
+
+
+def _vigilar_cambios() -> None:
+    while True:
+        time.sleep(CHECK_INTERVAL)
+        check_and_regenerate()
+
+
+def _atender_pedidos() -> None:
+    """Regenera cuando otro worker pide un reporte que aún no existe."""
+    while True:
+        time.sleep(REQUEST_POLL_SECONDS)
+        motivo = coordinator.take_request()
+        if motivo is not None:
+            request_regeneration(motivo)
+
+
+# Frecuencia con que el worker encargado revisa pedidos de los demás.
+REQUEST_POLL_SECONDS = 1.0
+
+
+# Con más de un worker cada uno publica sus métricas para /api/metrics.
+publish_metrics = False
+
+
+def _publicar_metricas() -> None:
+    while True:
+        time.sleep(METRICS_SNAPSHOT_SECONDS)
+        try:
+            metrics.write_snapshot(metrics_snapshot_path)
+        except OSError as e:
+            logger.warning(f"No se pudo publicar la instantánea de métricas: {e}")
+
+
+def start_worker(indice: int) -> None:
+    """Designa al worker 0 como el único que detecta cambios y regenera."""
+    global regenerates_here, metrics_snapshot_path
+    regenerates_here = indice == 0
+    if regenerates_here and AUTO_REGENERATE:
+        threading.Thread(target=_vigilar_cambios, name="vigilante-data", daemon=True).start()
+    if regenerates_here:
+        threading.Thread(target=_atender_pedidos, name="pedidos-regeneracion", daemon=True).start()
+    if publish_metrics:
+        # Por pid: un worker reemplazado no pisa lo que publicó el anterior.
+        metrics_snapshot_path = metrics.snapshot_path(METRICS_DIR)
+        try:
+            metrics.retire_dead_snapshots(METRICS_DIR)
+        except OSError as e:
+            logger.warning(f"No se pudieron retirar instantáneas de métricas: {e}")
+        threading.Thread(target=_publicar_metricas, name="metricas", daemon=True).start()
+
+
+def stop_worker(indice: int) -> None:
+    """Deja terminar una regeneración en curso antes de salir."""
+    if regenerates_here and not regenerator.wait(prefork.SHUTDOWN_TIMEOUT_SECONDS):
+        logger.warning("La regeneración en curso no terminó antes del cierre")
+    if metrics_snapshot_path is not None:
+        metrics.write_snapshot(metrics_snapshot_path)
+
+
+def prepare_server() -> None:
+    """Prepara el proceso que va a atender: calcula las huellas de los estáticos
+    y activa la medición de consultas a la base para las métricas.
+
+    Corre al iniciar el servidor, antes de crear workers, para que importar el
+    módulo no tenga efectos.
+    """
+    logger.info(f"✓ {static_assets.build()} archivos estáticos con huella de contenido")
+    set_query_observer(metrics.observe_query)
+
+
+def run_server(
+    host: str = "0.0.0.0",
+    port: int = PORT,
+    mode: str = SERVER_MODE,
+    workers: int = SERVER_WORKERS,
+    threads: int = SERVER_THREADS,
+) -> None:
+    """Inicia el servidor Flask.
+
+    En modo ``dev`` (por defecto) usa el servidor de desarrollo de Flask; en
+    modo ``prod``, que se activa con ``SERVER_MODE=prod`` o ``--mode prod``,
+    atiende con ``workers`` procesos (0 = uno por núcleo) de ``threads`` hilos.
+    """
+    if mode not in ("dev", "prod"):
+        raise ValueError(f"Modo de servidor desconocido: {mode!r} (use dev o prod).")
+    workers = workers if workers > 0 else os.cpu_count() or 1
+
     logger.info("=" * 70)
     logger.info("YNK Modelo - Servidor Flask con Autenticación")
     logger.info("=" * 70)
     logger.info(f"Ambiente: {'PRODUCCIÓN' if IS_PRODUCTION else 'LOCAL'}")
     logger.info(f"Auto-verificación: {'ACTIVADA' if IS_PRODUCTION else 'DESACTIVADA'}")
     logger.info(f"Servidor: http://{host}:{port}")
+    if mode == "prod":
+        logger.info(f"Modo: producción ({workers} procesos × {threads} hilos)")
+    else:
+        logger.info("Modo: desarrollo (servidor de Flask)")
     logger.info("-" * 70)
     logger.info("Páginas disponibles:")
     logger.info(f"  • http://localhost:{port}/login")
@@ -1117,7 +1423,23 @@ def run_server(host: str = "0.0.0.0", port: int = PORT) -> None:
     logger.info("✓ Autenticación activada - Se requiere login para acceder")
     logger.info("")
 
-    app.run(host=host, port=port, debug=False)
+    prepare_server()
+    if mode == "dev":
+        app.run(host=host, port=port, debug=False)
+        return
+    global publish_metrics
+    publish_metrics = workers > 1
+    shutil.rmtree(METRICS_DIR, ignore_errors=True)
+    prefork.serve(
+        app,
+        host,
+        port,
+        workers,
+        threads,
+        preload=preload_reports,
+        on_worker_start=start_worker,
+        on_worker_stop=stop_worker,
+    )
 
 
 def main() -> None:
@@ -1125,9 +1447,12 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Servidor Flask con autenticación")
     parser.add_argument("--host", default="0.0.0.0", help="Host del servidor")
     parser.add_argument("--port", type=int, default=PORT, help="Puerto del servidor")
+    parser.add_argument("--mode", choices=("dev", "prod"), default=SERVER_MODE, help="Servidor de desarrollo o de producción")
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS, help="Procesos en modo prod (0 = uno por núcleo del host)")
+    parser.add_argument("--threads", type=int, default=SERVER_THREADS, help="Hilos por proceso en modo prod")
 
     args = parser.parse_args()
-    run_server(args.host, args.port)
+    run_server(args.host, args.port, args.mode, args.workers, args.threads)
 
 
 if __name__ == "__main__":
@@ -2,25 +2,52 @@
 from __future__ import annotations
 
 import argparse
+import json
+import os
+import pickle
+import sys
 from pathlib import Path
 
 import pandas as pd
 
 from ynk_modelo.config import (
+    EERR_SHARDING,
     EXCLUDED_COMMISSION_ROLES,
     HTML_SIMULATOR_OUTPUT,
     HTML_STATE_OUTPUT,
+    LAZY_STORE_DATA,
+    NETWORK_ALLOCATION_POLICY,
     ROLE_MAP,
     TOTAL_SALES_COMMISSIONS,
 )
-from ynk_modelo.domain.eerr import build_eerr, build_store_base
+from ynk_modelo.domain.eerr import (
+    EERR_SHARDING_MODES,
+    build_consolidated_eerr,
+    build_eerr,
+    build_store_base,
+    eerr_en_columnas,
+)
+from ynk_modelo.domain.network import (
+    NETWORK_ALLOCATION_POLICIES,
+    reallocate_network_costs,
+    resolve_policy,
+)
 from ynk_modelo.interfaces.simulator import build_simulator_interface
 from ynk_modelo.interfaces.state_report import (
     build_html_interface,
     mostrar_eerr_sucursal,
     mostrar_selector,
+    volcar_eerr_todas,
 )
+from ynk_modelo.interfaces.store_payload import PAYLOAD_FORMAT
 from ynk_modelo.io.excel import get_role_cost_metadata
+from ynk_modelo.utils.build_info import code_version
+from ynk_modelo.utils.file_watcher import FileWatcher
+from ynk_modelo.utils.logger import get_logger
+from ynk_modelo.utils.metrics import timed_stage
+from ynk_modelo.utils.regeneration import REPORT_INPUTS
+
+logger = get_logger()
 
 
 def parse_args() -> argparse.Namespace:
@@ -48,18 +75,176 @@ def parse_args() -> argparse.Namespace:
         default=HTML_SIMULATOR_OUTPUT,
         help="Ruta del HTML del simulador (por defecto Simulador_EERR.html).",
     )
+    parser.add_argument(
+        "--asignacion-redes",
+        choices=NETWORK_ALLOCATION_POLICIES,
+        default=None,
+        help="Política de asignación del costo de redes (por defecto NETWORK_ALLOCATION).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Procesos para calcular el EERR en paralelo (por defecto EERR_WORKERS; 1 = secuencial).",
+    )
+    parser.add_argument(
+        "--particion",
+        choices=EERR_SHARDING_MODES,
+        default=None,
+        help="Cómo repartir las sucursales entre procesos (por defecto EERR_SHARDING).",
+    )
+    parser.add_argument(
+        "--cache-eerr",
+        type=Path,
+        default=None,
+        metavar="ARCHIVO",
+        help=(
+            "Reutiliza el EERR guardado en ARCHIVO si la data no cambió; con otra "
+            "política de redes solo se reasigna ese costo."
+        ),
+    )
+    parser.add_argument(
+        "--consolidado",
+        type=Path,
+        default=None,
+        metavar="ARCHIVO",
+        help="Exporta el EERR consolidado de la compañía (por mes) a CSV o XLSX.",
+    )
+    parser.add_argument(
+        "--exportar-columnas",
+        type=Path,
+        default=None,
+        help="Exporta el EERR completo en formato ancho (meses como columnas) a CSV o XLSX.",
+    )
+    parser.add_argument(
+        "--dump-all",
+        nargs="?",
+        const="-",
+        default=None,
+        metavar="ARCHIVO",
+        help=(
+            "Vuelca en texto el EERR de todas las sucursales a ARCHIVO (o a stdout con '-') "
+            "sin generar los HTML."
+        ),
+    )
     return parser.parse_args()
 
 
-def generate_reports(estado_path: Path, simulador_path: Path) -> tuple[pd.DataFrame, dict[str, dict[str, object]]]:
-    """Builds all data artifacts required by the HTML outputs."""
-    eerr = build_eerr()
-    store_data, banner_map, banner_summary = build_html_interface(
-        eerr,
-        estado_path,
+def generation_version(watcher: FileWatcher | None = None) -> str:
+    """Versión de los reportes que produciría ``generate_reports`` ahora.
+
+    Además de la data y las plantillas incluye la configuración que cambia el
+    resultado, el formato del payload y la versión del código, para que un
+    despliegue o un cambio de entorno no reutilice reportes generados antes.
+    """
+    watcher = watcher or FileWatcher()
+    return watcher.data_version(
+        REPORT_INPUTS,
+        settings=(
+            f"network={NETWORK_ALLOCATION_POLICY}",
+            f"lazy={LAZY_STORE_DATA}",
+            f"payload={PAYLOAD_FORMAT}",
+            f"code={code_version()}",
+        ),
+    )
+
+
+def _clave_cache_eerr(particion: str | None) -> str:
+    """Versión de la data, del código y de pandas con que se guarda el EERR."""
+    return FileWatcher().data_version(
+        settings=(
+            f"code={code_version()}",
+            f"pandas={pd.__version__}",
+            f"sharding={(particion or EERR_SHARDING).lower()}",
+        )
     )
 
-    base_df, _, uf_por_mes_map, uf_vigente = build_store_base()
+
+def _leer_cache_eerr(cache: Path, clave: str) -> tuple[str, pd.DataFrame] | None:
+    """Política y EERR guardados en ``cache`` si su clave coincide con ``clave``.
+
+    La clave va en una cabecera JSON antes del pickle y se compara antes de
+    deserializar: un caché de otro código o de otra data no se llega a cargar.
+    """
+    try:
+        with cache.open("rb") as archivo:
+            cabecera = json.loads(archivo.readline())
+            if not isinstance(cabecera, dict) or cabecera.get("clave") != clave:
+                return None
+            eerr = pickle.load(archivo)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, TypeError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as exc:
+        logger.warning(f"No se pudo leer el caché de EERR {cache}: {exc}")
+        return None
+    if not isinstance(eerr, pd.DataFrame) or not isinstance(cabecera.get("politica"), str):
+        return None
+    return cabecera["politica"], eerr
+
+
+def _guardar_cache_eerr(cache: Path, clave: str, politica: str, eerr: pd.DataFrame) -> None:
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    temporal = cache.with_name(f".{cache.name}.{os.getpid()}.tmp")
+    try:
+        with temporal.open("wb") as archivo:
+            archivo.write(json.dumps({"clave": clave, "politica": politica}).encode("utf-8") + b"\n")
+            pickle.dump(eerr, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, cache)
+    except OSError as exc:
+        logger.warning(f"No se pudo guardar el caché de EERR {cache}: {exc}")
+        temporal.unlink(missing_ok=True)
+
+
+def load_eerr(
+    politica_redes: str | None = None,
+    workers: int | None = None,
+    particion: str | None = None,
+    cache: Path | None = None,
+) -> pd.DataFrame:
+    """Arma el EERR o lo reutiliza desde ``cache`` si la data y el código no cambiaron.
+
+    El caché guarda el EERR con su clave (data, código, pandas y partición) y la
+    política de redes con que se calculó. Si solo cambia la política,
+    ``reallocate_network_costs`` recalcula ``Redes_sistemas`` y sus dependientes
+    sobre el EERR guardado en vez de volver a ejecutar ``build_eerr``.
+    """
+    politica = resolve_policy(politica_redes)
+    if cache is None:
+        return build_eerr(politica, workers=workers, particion=particion)
+
+    clave = _clave_cache_eerr(particion)
+    guardado = _leer_cache_eerr(cache, clave)
+    if guardado is not None:
+        politica_guardada, eerr = guardado
+        if politica_guardada == politica:
+            return eerr
+        logger.info(f"Reasignando costo de redes del EERR en caché: {politica_guardada} -> {politica}")
+        return reallocate_network_costs(eerr, politica)
+
+    eerr = build_eerr(politica, workers=workers, particion=particion)
+    _guardar_cache_eerr(cache, clave, politica, eerr)
+    return eerr
+
+
+def generate_reports(
+    estado_path: Path,
+    simulador_path: Path,
+    politica_redes: str | None = None,
+    workers: int | None = None,
+    particion: str | None = None,
+    eerr_cache: Path | None = None,
+) -> tuple[pd.DataFrame, dict[str, dict[str, object]]]:
+    """Builds all data artifacts required by the HTML outputs."""
+    with timed_stage("eerr"):
+        eerr = load_eerr(politica_redes, workers=workers, particion=particion, cache=eerr_cache)
+    with timed_stage("state_report"):
+        store_data, banner_map, banner_summary = build_html_interface(
+            eerr,
+            estado_path,
+        )
+
+    with timed_stage("store_base"):
+        base_df, _, uf_por_mes_map, uf_vigente = build_store_base()
     uf_por_mes_str: dict[str, float] = {}
     for clave, valor in uf_por_mes_map.items():
         try:
@@ -74,27 +259,95 @@ def generate_reports(estado_path: Path, simulador_path: Path) -> tuple[pd.DataFr
     total_sales_commissions = sorted(TOTAL_SALES_COMMISSIONS)
     excluded_roles = sorted(EXCLUDED_COMMISSION_ROLES)
 
-    build_simulator_interface(
-        store_data,
-        base_df,
-        role_costs,
-        total_sales_commissions,
-        excluded_roles,
-        staff_roles,
-        uf_por_mes_str,
-        uf_vigente,
-        simulador_path,
-    )
+    with timed_stage("simulator"):
+        build_simulator_interface(
+            store_data,
+            base_df,
+            role_costs,
+            total_sales_commissions,
+            excluded_roles,
+            staff_roles,
+            uf_por_mes_str,
+            uf_vigente,
+            simulador_path,
+            politica_redes=politica_redes,
+        )
 
     return eerr, store_data
 
 
+def _exportar_tabla(tabla: pd.DataFrame, destino: Path, index: bool = True) -> Path:
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    if destino.suffix.lower() in {".xlsx", ".xls"}:
+        tabla.to_excel(destino, index=index)
+    else:
+        tabla.to_csv(destino, index=index)
+    return destino
+
+
+def export_wide_eerr(eerr: pd.DataFrame, destino: Path) -> Path:
+    """Escribe el EERR en formato ancho; la extensión define CSV o Excel."""
+    return _exportar_tabla(eerr_en_columnas(eerr), destino)
+
+
+def export_consolidated_eerr(eerr: pd.DataFrame, destino: Path) -> Path:
+    """Escribe el EERR consolidado de la compañía; la extensión define CSV o Excel."""
+    consolidado = build_consolidated_eerr(eerr)
+    consolidado["Mes"] = pd.to_datetime(consolidado["Mes"]).dt.strftime("%Y-%m")
+    return _exportar_tabla(consolidado, destino, index=False)
+
+
+def dump_all(eerr: pd.DataFrame, destino: str) -> int:
+    """Vuelca el EERR de todas las sucursales a un archivo o a stdout."""
+    if destino == "-":
+        return volcar_eerr_todas(eerr, sys.stdout)
+    ruta = Path(destino)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    with ruta.open("w", encoding="utf-8") as archivo:
+        return volcar_eerr_todas(eerr, archivo)
+
+
+def run_dump_all(args: argparse.Namespace) -> None:
+    """Arma solo el EERR y lo vuelca, sin generar los HTML ni sus payloads.
+
+    Los mensajes de avance van a stderr para que stdout lleve solo el volcado.
+    """
+    eerr = load_eerr(
+        args.asignacion_redes,
+        workers=args.workers,
+        particion=args.particion,
+        cache=args.cache_eerr,
+    )
+    if args.exportar_columnas:
+        print("EERR en columnas exportado:", export_wide_eerr(eerr, args.exportar_columnas), file=sys.stderr)
+    if args.consolidado:
+        print("EERR consolidado exportado:", export_consolidated_eerr(eerr, args.consolidado), file=sys.stderr)
+    total = dump_all(eerr, args.dump_all)
+    if args.dump_all != "-":
+        print(f"EERR de {total} sucursales volcado en:", args.dump_all, file=sys.stderr)
+
+
 def main() -> None:
     args = parse_args()
-    eerr, _ = generate_reports(args.output, args.simulador)
+    if args.dump_all:
+        run_dump_all(args)
+        return
+
+    eerr, _ = generate_reports(
+        args.output,
+        args.simulador,
+        args.asignacion_redes,
+        workers=args.workers,
+        particion=args.particion,
+        eerr_cache=args.cache_eerr,
+    )
 
     print("Interfaz generada:", args.output)
     print("Simulador generado:", args.simulador)
+    if args.exportar_columnas:
+        print("EERR en columnas exportado:", export_wide_eerr(eerr, args.exportar_columnas))
+    if args.consolidado:
+        print("EERR consolidado exportado:", export_consolidated_eerr(eerr, args.consolidado))
 
     if args.sucursal:
         mostrar_eerr_sucursal(eerr, args.sucursal)
@@ -1,33 +1,80 @@
-"""Servidor web con auto-regeneración al cargar página."""
+"""Servidor web con auto-regeneración al cargar página.
+
+Atiende cada conexión en su propio hilo. Los artefactos de ``output/`` se
+sirven desde memoria con ETag, Last-Modified y su variante gzip; los demás
+archivos grandes se envían con ``sendfile``. La regeneración corre en un hilo
+de fondo mientras se sigue sirviendo la última versión publicada.
+"""
 from __future__ import annotations
 
 import json
-import mimetypes
 import time
 from datetime import datetime
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from urllib.parse import parse_qs, urlparse
+from urllib.parse import parse_qs, unquote, urlparse
 
-from ynk_modelo.cli.main import generate_reports
+from ynk_modelo.cli.main import generate_reports, generation_version
 from ynk_modelo.config import (
     HTML_SIMULATOR_OUTPUT,
     HTML_STATE_OUTPUT,
     IS_PRODUCTION,
     OUTPUT_DIR,
     PROJECT_ROOT,
-    STATIC_DIR,
+)
+from ynk_modelo.interfaces.artifacts import (
+    CACHE_CONTROL,
+    Artifact,
+    etag_matches,
+    load_artifact,
+    negotiate,
+)
+from ynk_modelo.interfaces.store_payload import (
+    EERR_CHANGES_ENDPOINT,
+    EERR_STORES_ENDPOINT,
+    SIMULATOR_CHANGES_ENDPOINT,
+    SIMULATOR_STORES_ENDPOINT,
+    changes_artifact,
+    store_artifact,
+    store_payload_path,
+    stores_artifact,
 )
 from ynk_modelo.utils.file_watcher import FileWatcher
+from ynk_modelo.utils.regeneration import report_coordinator
+from ynk_modelo.utils.regenerator import BackgroundRegenerator
 from ynk_modelo.utils.logger import get_logger
 
 logger = get_logger()
 
+# Desde este tamaño los archivos fuera de output/ se envían con sendfile.
+SENDFILE_MIN_BYTES = 256 * 1024
+# URL de cada reporte -> archivo generado (exista o no todavía).
+REPORT_PAGES = {
+    '/': HTML_STATE_OUTPUT,
+    '/EERR_por_tienda.html': HTML_STATE_OUTPUT,
+    '/Simulador_EERR.html': HTML_SIMULATOR_OUTPUT,
+}
+
+
+def not_modified_since(if_modified_since: str | None, modificado: float) -> bool:
+    """Indica si ``If-Modified-Since`` cubre la fecha de modificación (en segundos)."""
+    if not if_modified_since:
+        return False
+    try:
+        fecha = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return int(modificado) <= fecha.timestamp()
+
 
 class AutoRegenHandler(SimpleHTTPRequestHandler):
     """Handler HTTP que verifica cambios antes de servir páginas."""
     
+    protocol_version = "HTTP/1.1"
     file_watcher = FileWatcher()
+    coordinator = report_coordinator()
+    regenerator: BackgroundRegenerator
     
     def __init__(self, *args, **kwargs):
         # Cambiar directorio base al proyecto
@@ -48,42 +95,80 @@ class AutoRegenHandler(SimpleHTTPRequestHandler):
             self.handle_status()
             return
         
+        # Fichas cambiadas desde la versión del cliente
+        for endpoint, output in (
+            (EERR_CHANGES_ENDPOINT, HTML_STATE_OUTPUT),
+            (SIMULATOR_CHANGES_ENDPOINT, HTML_SIMULATOR_OUTPUT),
+        ):
+            if path == endpoint:
+                self.handle_store_changes(output, parsed.query)
+                return
+        
+        # Datos por tienda bajo demanda
+        for endpoint, output in (
+            (EERR_STORES_ENDPOINT, HTML_STATE_OUTPUT),
+            (SIMULATOR_STORES_ENDPOINT, HTML_SIMULATOR_OUTPUT),
+        ):
+            if path == endpoint or path.startswith(endpoint + '/'):
+                self.handle_store_payload(output, path[len(endpoint) + 1:], parsed.query)
+                return
+        
         # Para páginas HTML, verificar cambios primero
-        if path.endswith('.html') or path in ('/', '/EERR_por_tienda.html', '/Simulador_EERR.html'):
+        reporte = REPORT_PAGES.get(path or '/')
+        if reporte is not None:
+            self.ensure_published(reporte)
+        if reporte is not None or path.endswith('.html'):
             self.check_and_regenerate()
         
-        # Servir archivos estáticos
-        super().do_GET()
+        self.serve_path(Path(self.translate_path(self.path)))
     
-    def check_and_regenerate(self):
-        """Verifica cambios y regenera si es necesario."""
+    def do_HEAD(self):
+        """Maneja peticiones HEAD con las mismas cabeceras que GET."""
+        self.serve_path(Path(self.translate_path(self.path)), head=True)
+    
+    @classmethod
+    def regenerate(cls) -> bool:
+        """Genera los reportes una sola vez por versión de data (entre procesos)."""
+        start_time = time.time()
+        generado = cls.coordinator.run(
+            generation_version(cls.file_watcher),
+            lambda: generate_reports(HTML_STATE_OUTPUT, HTML_SIMULATOR_OUTPUT),
+        )
+        cls.file_watcher.update_cache()
+        if generado:
+            logger.info("✓ REPORTES REGENERADOS EXITOSAMENTE")
+            logger.info(f"  Tiempo: {time.time() - start_time:.2f}s")
+            logger.info(f"  Fecha/Hora: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        return generado
+    
+    def ensure_published(self, ruta: Path):
+        """Espera la generación solo si el reporte pedido aún no existe."""
+        if not ruta.exists():
+            logger.info(f"Archivo {ruta.name} no existe, regenerando...")
+            self.regenerator.request(f"falta {ruta.name}")
+            self.regenerator.wait()
+    
+    def check_and_regenerate(self) -> tuple[bool, list[str]]:
+        """Verifica cambios y encola la regeneración en segundo plano si corresponde."""
         if not IS_PRODUCTION:
             logger.debug("Modo LOCAL - Verificación deshabilitada")
-            return
+            return False, []
         
         try:
             has_changes, changed_files = self.file_watcher.check_changes()
             
             if has_changes:
                 logger.info("=" * 70)
-                logger.info("¡CAMBIOS DETECTADOS! Regenerando reportes...")
+                logger.info("¡CAMBIOS DETECTADOS! Encolando regeneración de reportes...")
                 logger.info("-" * 70)
                 for file_info in changed_files:
                     logger.info(f"  • {file_info}")
-                logger.info("-" * 70)
-                
-                start_time = time.time()
-                generate_reports(HTML_STATE_OUTPUT, HTML_SIMULATOR_OUTPUT)
-                elapsed = time.time() - start_time
-                
-                self.file_watcher.update_cache()
-                
-                logger.info("✓ REPORTES REGENERADOS EXITOSAMENTE")
-                logger.info(f"  Tiempo: {elapsed:.2f}s")
-                logger.info(f"  Fecha/Hora: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
                 logger.info("=" * 70)
+                self.regenerator.request("cambios en data")
+            return has_changes, changed_files
         except Exception as e:
-            logger.error(f"✗ ERROR al verificar/regenerar: {e}", exc_info=True)
+            logger.error(f"✗ ERROR al verificar cambios: {e}", exc_info=True)
+            return False, []
     
     def handle_check(self):
         """Endpoint para verificación manual de cambios."""
@@ -91,18 +176,12 @@ class AutoRegenHandler(SimpleHTTPRequestHandler):
             has_changes, changed_files = self.file_watcher.check_changes()
             
             if has_changes:
-                start_time = time.time()
-                generate_reports(HTML_STATE_OUTPUT, HTML_SIMULATOR_OUTPUT)
-                elapsed = time.time() - start_time
-                self.file_watcher.update_cache()
-                
+                self.regenerator.request("verificación manual")
                 response = {
-                    "status": "regenerated",
+                    "status": "regenerating",
                     "changes": changed_files,
-                    "elapsed": round(elapsed, 2),
                     "timestamp": datetime.now().isoformat(),
                 }
-                logger.info(f"✓ Reportes regenerados en {elapsed:.2f}s")
             else:
                 response = {
                     "status": "no_changes",
@@ -118,20 +197,117 @@ class AutoRegenHandler(SimpleHTTPRequestHandler):
                 "message": str(e),
             }, status=500)
     
+    def handle_store_payload(self, output: Path, store: str, query: str):
+        """Sirve la ficha de una tienda o un lote ``?store=A&store=B``."""
+        ruta = store_payload_path(output)
+        store = unquote(store)
+        tiendas = parse_qs(query).get("store", [])
+        try:
+            if store:
+                artefacto = store_artifact(ruta, store)
+            elif tiendas:
+                artefacto = stores_artifact(ruta, tiendas)
+            else:
+                artefacto = load_artifact(ruta)
+        except FileNotFoundError:
+            self.send_json_response({"error": "Datos por tienda no generados"}, status=404)
+            return
+        
+        if artefacto is None:
+            self.send_json_response({"error": "Tienda no encontrada"}, status=404)
+            return
+        self.send_artifact(artefacto, "application/json", ruta.stat().st_mtime)
+    
+    def handle_store_changes(self, output: Path, query: str):
+        """Sirve las fichas que cambiaron desde ``?since=<versión>``."""
+        params = parse_qs(query)
+        try:
+            artefacto = changes_artifact(
+                output,
+                params.get("since", [None])[0],
+                params.get("store") or None,
+            )
+        except FileNotFoundError:
+            self.send_json_response({"error": "Datos por tienda no generados"}, status=404)
+            return
+        self.send_artifact(artefacto, "application/json")
+    
     def handle_status(self):
         """Endpoint de estado del sistema."""
         summary = self.file_watcher.get_summary()
         summary["environment"] = "PROD" if IS_PRODUCTION else "LOCAL"
         summary["auto_check"] = IS_PRODUCTION
+        summary["regeneration"] = self.regenerator.status()
         self.send_json_response(summary)
     
     def send_json_response(self, data: dict, status: int = 200):
         """Envía respuesta JSON."""
+        cuerpo = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
         self.send_response(status)
         self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
         self.send_header("Access-Control-Allow-Origin", "*")
         self.end_headers()
-        self.wfile.write(json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
+        self.wfile.write(cuerpo)
+    
+    def send_artifact(self, artefacto: Artifact, tipo: str, modificado: float | None = None, head: bool = False):
+        """Envía un artefacto en memoria respetando ETag, Last-Modified y gzip."""
+        if_none_match = self.headers.get("If-None-Match")
+        estado, cuerpo, cabeceras = negotiate(artefacto, self.headers.get("Accept-Encoding"), if_none_match)
+        if modificado is not None:
+            cabeceras["Last-Modified"] = formatdate(modificado, usegmt=True)
+            if if_none_match is None and not_modified_since(self.headers.get("If-Modified-Since"), modificado):
+                estado, cuerpo = 304, b""
+        self.send_response(estado)
+        self.send_header("Content-Type", tipo)
+        for nombre, valor in cabeceras.items():
+            self.send_header(nombre, valor)
+        if estado != 304:
+            self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        if not head and cuerpo:
+            self.wfile.write(cuerpo)
+    
+    def send_static_file(self, ruta: Path, tipo: str, head: bool = False):
+        """Envía un archivo del disco; los grandes sin copiarlos a memoria (``sendfile``)."""
+        estado = ruta.stat()
+        etag = f"{estado.st_mtime_ns:x}-{estado.st_size:x}"
+        if_none_match = self.headers.get("If-None-Match")
+        sin_cambios = (
+            etag_matches(if_none_match, etag)
+            if if_none_match is not None
+            else not_modified_since(self.headers.get("If-Modified-Since"), estado.st_mtime)
+        )
+        self.send_response(304 if sin_cambios else 200)
+        self.send_header("Content-Type", tipo)
+        self.send_header("ETag", f'W/"{etag}"')
+        self.send_header("Last-Modified", formatdate(estado.st_mtime, usegmt=True))
+        self.send_header("Cache-Control", CACHE_CONTROL)
+        if not sin_cambios:
+            self.send_header("Content-Length", str(estado.st_size))
+        self.end_headers()
+        if head or sin_cambios:
+            return
+        with open(ruta, "rb") as archivo:
+            if estado.st_size >= SENDFILE_MIN_BYTES:
+                self.connection.sendfile(archivo)
+            else:
+                self.wfile.write(archivo.read())
+    
+    def serve_path(self, ruta: Path, head: bool = False):
+        """Sirve un archivo: desde memoria si es un artefacto de ``output/``."""
+        try:
+            ruta = ruta.resolve()
+            if not ruta.is_relative_to(PROJECT_ROOT.resolve()) or not ruta.is_file():
+                self.send_error(404, "Archivo no encontrado")
+                return
+            tipo = self.guess_type(str(ruta))
+            if ruta.is_relative_to(OUTPUT_DIR.resolve()):
+                self.send_artifact(load_artifact(ruta), tipo, ruta.stat().st_mtime, head)
+            else:
+                self.send_static_file(ruta, tipo, head)
+        except FileNotFoundError:
+            self.send_error(404, "Archivo no encontrado")
     
     def log_message(self, format, *args):
         """Override para usar nuestro logger."""
@@ -142,9 +318,10 @@ class AutoRegenHandler(SimpleHTTPRequestHandler):
         # Remover query string
         path = urlparse(path).path
         
-        # Rutas especiales
-        if path == '/' or path == '':
-            return str(OUTPUT_DIR / 'EERR_por_tienda.html')
+        # Reportes generados
+        reporte = REPORT_PAGES.get(path or '/')
+        if reporte is not None:
+            return str(reporte)
         
         # Archivos HTML en output/
         if path.endswith('.html'):
@@ -163,6 +340,9 @@ class AutoRegenHandler(SimpleHTTPRequestHandler):
         return str(PROJECT_ROOT / path.lstrip('/'))
 
 
+AutoRegenHandler.regenerator = BackgroundRegenerator(AutoRegenHandler.regenerate, "regenerador-ynk-server")
+
+
 def run_server(host: str = "0.0.0.0", port: int = 8000):
     """Ejecuta el servidor HTTP."""
     
@@ -189,7 +369,7 @@ def run_server(host: str = "0.0.0.0", port: int = 8000):
     
     logger.info("\nPresiona Ctrl+C para detener el servidor\n")
     
-    server = HTTPServer((host, port), AutoRegenHandler)
+    server = ThreadingHTTPServer((host, port), AutoRegenHandler)
     
     try:
         server.serve_forever()
@@ -197,7 +377,9 @@ def run_server(host: str = "0.0.0.0", port: int = 8000):
         logger.info("\n" + "=" * 70)
         logger.info("Servidor detenido por el usuario")
         logger.info("=" * 70)
-        server.shutdown()
+    finally:
+        server.server_close()
+        AutoRegenHandler.regenerator.wait(timeout=30)
 
 
 def main():
@@ -30,6 +30,26 @@ AUTO_REGENERATE = os.getenv("AUTO_REGENERATE", "true").lower() == "true"
 CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", "300"))
 PORT = int(os.getenv("PORT", "8000"))
 
+# Servidor de ynk-server-auth: "dev" (por defecto) usa el de Flask; "prod" usa
+# procesos y pool de hilos y solo se activa si se pide explícitamente.
+SERVER_MODE = os.getenv("SERVER_MODE", "dev").lower()
+# Procesos del modo prod (0 = uno por núcleo del host) e hilos por proceso.
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "2"))
+SERVER_THREADS = int(os.getenv("SERVER_THREADS", "8"))
+# Token para leer /api/metrics sin sesión (Authorization: Bearer <token>).
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Política de asignación del costo de redes y sistemas: equal, sales o m2.
+NETWORK_ALLOCATION_POLICY = os.getenv("NETWORK_ALLOCATION", "equal").lower()
+
+# Cálculo paralelo del EERR: procesos (1 = secuencial) y partición (banner o tienda).
+EERR_WORKERS = int(os.getenv("EERR_WORKERS", "1"))
+EERR_SHARDING = os.getenv("EERR_SHARDING", "banner").lower()
+
+# Datos por tienda bajo demanda: la página inicial solo lleva el índice de tiendas
+# y cada ficha se pide a la API; con "false" los HTML incluyen todos los datos.
+LAZY_STORE_DATA = os.getenv("LAZY_STORE_DATA", "true").lower() == "true"
+
 REAL_SCENARIO = "Real"
 BUDGET_SCENARIO = "Presupuesto"
 
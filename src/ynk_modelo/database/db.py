@@ -2,8 +2,9 @@
 from __future__ import annotations
 
 import sqlite3
+import time
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from ynk_modelo.config import PROJECT_ROOT
 from ynk_modelo.utils.logger import get_logger
@@ -13,13 +14,57 @@ logger = get_logger()
 # Ruta de la base de datos
 DB_PATH = PROJECT_ROOT / "data" / "ynk_users.db"
 
+# Recibe la duración (segundos) de cada consulta; sin observador no se mide nada.
+_query_observer: Callable[[float], None] | None = None
+
+
+def set_query_observer(observador: Callable[[float], None] | None) -> None:
+    """Registra quién recibe la duración de cada consulta (p. ej. métricas)."""
+    global _query_observer
+    _query_observer = observador
+
+
+class _TimedCursor(sqlite3.Cursor):
+    """Cursor que informa la duración de cada consulta al observador."""
+
+    def _medir(self, ejecutar, *args):
+        inicio = time.perf_counter()
+        try:
+            return ejecutar(*args)
+        finally:
+            observador = _query_observer
+            if observador is not None:
+                observador(time.perf_counter() - inicio)
+
+    def execute(self, sql, parameters=(), /):
+        return self._medir(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        return self._medir(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script, /):
+        return self._medir(super().executescript, sql_script)
+
+
+class _TimedConnection(sqlite3.Connection):
+    """Conexión cuyos cursores (también los de ``execute``) miden sus consultas."""
+
+    def cursor(self, factory=_TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=(), /):
+        return self.cursor().execute(sql, parameters)
+
 
 def get_db() -> sqlite3.Connection:
     """Obtiene una conexión a la base de datos."""
     # Crear directorio si no existe
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     
-    conn = sqlite3.connect(str(DB_PATH))
+    if _query_observer is not None:
+        conn = sqlite3.connect(str(DB_PATH), factory=_TimedConnection)
+    else:
+        conn = sqlite3.connect(str(DB_PATH))
     conn.row_factory = sqlite3.Row  # Permite acceso por nombre de columna
     return conn
 
@@ -1,10 +1,89 @@
 """Modelos de datos para usuarios, roles y permisos."""
 from __future__ import annotations
 
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
 from typing import Any
 from werkzeug.security import check_password_hash, generate_password_hash
 
+from ynk_modelo.database import db as _db
 from ynk_modelo.database.db import get_db
+from ynk_modelo.utils.locks import file_lock
+
+# Versión de usuarios, roles y permisos: un contador de 8 bytes en un archivo
+# junto a la base, mapeado en memoria y compartido por todos los procesos. Solo
+# las ediciones de usuarios, roles y permisos lo incrementan (no cualquier
+# escritura en la base) y leerlo no consulta la base ni el disco.
+VERSION_SUFFIX = ".authversion"
+_version_maps: dict[str, mmap.mmap] = {}
+_version_lock = threading.Lock()
+
+# Permisos por usuario: (base, id) -> (versión, permisos), en orden LRU.
+_PERMISSION_SETS: OrderedDict[tuple[str, int], tuple[int, frozenset[str]]] = OrderedDict()
+_PERMISSION_SETS_MAX = 1024
+_permission_sets_lock = threading.Lock()
+
+# Registros de usuario para el user loader: (base, id) -> (vence, versión, fila),
+# en orden LRU. Una edición hecha en cualquier proceso incrementa la versión y
+# descarta la fila guardada.
+USER_CACHE_TTL_SECONDS = 60.0
+USER_CACHE_MAX = 256
+_USER_ROWS: OrderedDict[tuple[str, int], tuple[float, int, tuple]] = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+
+def _version_path() -> Path:
+    return Path(f"{_db.DB_PATH}{VERSION_SUFFIX}")
+
+
+def _version_map() -> mmap.mmap:
+    """Mapa en memoria del contador de versión de la base vigente."""
+    clave = str(_db.DB_PATH)
+    mapa = _version_maps.get(clave)
+    if mapa is not None:
+        return mapa
+    with _version_lock:
+        mapa = _version_maps.get(clave)
+        if mapa is None:
+            ruta = _version_path()
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            with open(ruta, "a+b") as archivo:
+                if os.fstat(archivo.fileno()).st_size < 8:
+                    archivo.truncate(8)
+                mapa = mmap.mmap(archivo.fileno(), 8)
+            _version_maps[clave] = mapa
+    return mapa
+
+
+def bump_permission_version() -> int:
+    """Invalida, en todos los procesos, los usuarios y permisos en caché.
+
+    Se llama tras editar usuarios, roles, permisos o asignaciones.
+    """
+    mapa = _version_map()
+    with _version_lock, file_lock(_version_path()):
+        version = struct.unpack_from("<Q", mapa)[0] + 1
+        struct.pack_into("<Q", mapa, 0, version)
+    return version
+
+
+def permission_version() -> int:
+    """Versión vigente de usuarios, roles y permisos (lectura en memoria)."""
+    return struct.unpack_from("<Q", _version_map())[0]
+
+
+def invalidate_cached_user(user_id: int | None = None) -> None:
+    """Descarta un usuario de la caché del user loader, o todos si no se indica."""
+    with _user_cache_lock:
+        if user_id is None:
+            _USER_ROWS.clear()
+        else:
+            _USER_ROWS.pop((str(_db.DB_PATH), user_id), None)
 
 
 class User:
@@ -80,6 +159,35 @@ class User:
             )
         return None
     
+    @classmethod
+    def get_cached(cls, user_id: int) -> User | None:
+        """Obtiene un usuario por ID desde la caché, consultando la base sólo si
+        expiró o si algún proceso editó usuarios o roles desde que se guardó.
+
+        Cada llamada devuelve una instancia nueva; los usuarios inexistentes no
+        se guardan.
+        """
+        clave = (str(_db.DB_PATH), user_id)
+        ahora = time.monotonic()
+        version = permission_version()
+        with _user_cache_lock:
+            guardado = _USER_ROWS.get(clave)
+            if guardado is not None and guardado[0] > ahora and guardado[1] == version:
+                _USER_ROWS.move_to_end(clave)
+                return cls(*guardado[2])
+
+        user = cls.get_by_id(user_id)
+        if user is None:
+            invalidate_cached_user(user_id)
+            return None
+        fila = (user.id, user.username, user.password_hash, user.full_name, user.email, user.is_active)
+        with _user_cache_lock:
+            _USER_ROWS[clave] = (ahora + USER_CACHE_TTL_SECONDS, version, fila)
+            _USER_ROWS.move_to_end(clave)
+            while len(_USER_ROWS) > USER_CACHE_MAX:
+                _USER_ROWS.popitem(last=False)
+        return user
+    
     @classmethod
     def create(
         cls,
@@ -123,6 +231,8 @@ class User:
         )
         conn.commit()
         conn.close()
+        invalidate_cached_user(self.id)
+        bump_permission_version()
     
     def delete(self) -> None:
         """Elimina el usuario de la base de datos."""
@@ -131,6 +241,8 @@ class User:
         cursor.execute("DELETE FROM users WHERE id = ?", (self.id,))
         conn.commit()
         conn.close()
+        invalidate_cached_user(self.id)
+        bump_permission_version()
     
     def get_roles(self) -> list[str]:
         """Obtiene los roles del usuario."""
@@ -147,21 +259,39 @@ class User:
         conn.close()
         return roles
     
-    def has_permission(self, permission_name: str) -> bool:
-        """Verifica si el usuario tiene un permiso específico."""
+    def get_permissions(self) -> frozenset[str]:
+        """Obtiene todos los permisos del usuario, en caché hasta la próxima edición."""
+        clave = (str(_db.DB_PATH), self.id)
+        version = permission_version()
+        with _permission_sets_lock:
+            guardado = _PERMISSION_SETS.get(clave)
+            if guardado is not None and guardado[0] == version:
+                _PERMISSION_SETS.move_to_end(clave)
+                return guardado[1]
+
         conn = get_db()
         cursor = conn.cursor()
         cursor.execute(
-            """SELECT COUNT(*) 
+            """SELECT DISTINCT p.name 
                FROM permissions p
                INNER JOIN role_permissions rp ON p.id = rp.permission_id
                INNER JOIN user_roles ur ON rp.role_id = ur.role_id
-               WHERE ur.user_id = ? AND p.name = ?""",
-            (self.id, permission_name)
+               WHERE ur.user_id = ?""",
+            (self.id,)
         )
-        count = cursor.fetchone()[0]
+        permissions = frozenset(row[0] for row in cursor.fetchall())
         conn.close()
-        return count > 0
+
+        with _permission_sets_lock:
+            _PERMISSION_SETS[clave] = (version, permissions)
+            _PERMISSION_SETS.move_to_end(clave)
+            while len(_PERMISSION_SETS) > _PERMISSION_SETS_MAX:
+                _PERMISSION_SETS.popitem(last=False)
+        return permissions
+    
+    def has_permission(self, permission_name: str) -> bool:
+        """Verifica si el usuario tiene un permiso específico."""
+        return permission_name in self.get_permissions()
     
     def has_role(self, role_name: str) -> bool:
         """Verifica si el usuario tiene un rol específico."""
@@ -300,6 +430,7 @@ class Role:
         cursor.execute("DELETE FROM roles WHERE id = ?", (self.id,))
         conn.commit()
         conn.close()
+        bump_permission_version()
     
     def set_permissions(self, permission_ids: list[int]) -> None:
         """Establece los permisos del rol (reemplaza los existentes)."""
@@ -318,6 +449,7 @@ class Role:
         
         conn.commit()
         conn.close()
+        bump_permission_version()
 
 
 class Permission:
@@ -439,6 +571,7 @@ class Permission:
         )
         conn.commit()
         conn.close()
+        bump_permission_version()
     
     def delete(self) -> None:
         """Elimina el permiso de la base de datos."""
@@ -447,6 +580,7 @@ class Permission:
         cursor.execute("DELETE FROM permissions WHERE id = ?", (self.id,))
         conn.commit()
         conn.close()
+        bump_permission_version()
 
 
 class UserRole:
@@ -463,6 +597,7 @@ class UserRole:
         )
         conn.commit()
         conn.close()
+        bump_permission_version()
     
     @staticmethod
     def remove(user_id: int, role_id: int) -> None:
@@ -475,6 +610,7 @@ class UserRole:
         )
         conn.commit()
         conn.close()
+        bump_permission_version()
     
     @staticmethod
     def set_user_roles(user_id: int, role_ids: list[int]) -> None:
@@ -494,6 +630,7 @@ class UserRole:
         
         conn.commit()
         conn.close()
+        bump_permission_version()
 
 
 class RolePermission:
@@ -510,6 +647,7 @@ class RolePermission:
         )
         conn.commit()
         conn.close()
+        bump_permission_version()
     
     @staticmethod
     def remove(role_id: int, permission_id: int) -> None:
@@ -522,3 +660,4 @@ class RolePermission:
         )
         conn.commit()
         conn.close()
+        bump_permission_version()
@@ -2,21 +2,26 @@
 from __future__ import annotations
 
 import math
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from typing import Iterable
 
+import numpy as np
 import pandas as pd
 
 from ynk_modelo.config import (
     BUDGET_SCENARIO,
+    EERR_SHARDING,
+    EERR_WORKERS,
     METRIC_CONFIG,
     REAL_SCENARIO,
 )
+from ynk_modelo.domain.network import allocate_network_costs, network_cost_by_store
 from ynk_modelo.domain.uf import latest_uf_value, uf_promedio_mensual
 from ynk_modelo.io.excel import (
     get_role_cost_metadata,
     load_contribution,
     load_dictionary,
-    load_network_costs,
     load_other_costs,
     load_payment_commission,
     load_rent,
@@ -50,6 +55,89 @@ def variable_rent_threshold(
     return umbral
 
 
+def variable_rent_thresholds(
+    arriendo_minimo_clp: np.ndarray,
+    arriendo_porcentual: np.ndarray,
+) -> np.ndarray:
+    """Versión vectorizada de ``variable_rent_threshold``; NaN donde no hay umbral."""
+    minimo = np.asarray(arriendo_minimo_clp, dtype=float)
+    porcentaje = np.asarray(arriendo_porcentual, dtype=float)
+    porcentaje = np.where(porcentaje > 1, porcentaje / 100.0, porcentaje)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        umbral = minimo / porcentaje
+    valido = ~(minimo <= 0) & ~(porcentaje <= 0) & np.isfinite(umbral) & (umbral > 0)
+    return np.where(valido, umbral, np.nan)
+
+
+# Parámetros de la estructura de costos con que se evalúa el heatmap de EBITDA.
+HEATMAP_STRUCTURE_FIELDS = (
+    "dotacion_fijo",
+    "tasa_por_vendedor",
+    "tasa_total_ventas",
+    "otros_costos_rate",
+    "arriendo_minimo",
+    "arriendo_porcentual",
+    "fondo_promocion_pct",
+    "arriendo_ggcc",
+    "network_systems_cost",
+    "payment_commission_rate",
+)
+
+
+def heatmap_structure_arrays(estructuras: Iterable[dict[str, object] | None]) -> dict[str, np.ndarray]:
+    """Apila estructuras de heatmap en arreglos ``(tiendas, 1, 1)`` listos para broadcasting.
+
+    Los campos ausentes, nulos o no finitos valen 0, igual que ``|| 0`` en el
+    simulador.
+    """
+    filas = [estructura or {} for estructura in estructuras]
+    arreglos: dict[str, np.ndarray] = {}
+    for campo in HEATMAP_STRUCTURE_FIELDS:
+        valores = np.array(
+            [float(fila.get(campo) or 0.0) for fila in filas], dtype=float
+        ).reshape(-1, 1, 1)
+        arreglos[campo] = np.nan_to_num(valores, nan=0.0, posinf=0.0, neginf=0.0)
+    return arreglos
+
+
+def ebitda_margin_grid(
+    estructura: dict[str, np.ndarray | float],
+    ventas: np.ndarray,
+    margenes: np.ndarray,
+) -> np.ndarray:
+    """Margen EBITDA (%) para cada combinación de venta y margen de contribución.
+
+    Replica ``computeEbitdaMarginForHeatmap`` del simulador con broadcasting:
+    los campos de ``estructura`` pueden ser escalares o arreglos
+    ``(tiendas, 1, 1)`` y el resultado tiene forma ``(..., ventas, márgenes)``.
+    El arriendo variable se activa cuando la venta supera el umbral
+    ``arriendo_minimo / arriendo_porcentual``. Ventas no positivas dan 0.
+    """
+    campo = {nombre: np.asarray(estructura.get(nombre, 0.0), dtype=float) for nombre in HEATMAP_STRUCTURE_FIELDS}
+    venta = np.asarray(ventas, dtype=float)[:, None]
+    margen = np.asarray(margenes, dtype=float)[None, :]
+
+    comisiones = venta * (campo["tasa_por_vendedor"] + campo["tasa_total_ventas"])
+    arriendo_base = np.maximum(campo["arriendo_minimo"], venta * campo["arriendo_porcentual"])
+    arriendo_variable = np.maximum(0.0, arriendo_base - campo["arriendo_minimo"])
+    arriendo_total = (
+        campo["arriendo_minimo"]
+        + arriendo_variable
+        + arriendo_base * campo["fondo_promocion_pct"]
+        + campo["arriendo_ggcc"]
+    )
+    gasto_operacional = (
+        campo["dotacion_fijo"]
+        + comisiones
+        + arriendo_total
+        + campo["network_systems_cost"]
+        + venta * (campo["payment_commission_rate"] + campo["otros_costos_rate"])
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resultado = (venta * margen - gasto_operacional) / venta * 100.0
+    return np.where(venta > 0, resultado, 0.0)
+
+
 def build_store_base() -> tuple[pd.DataFrame, bool, dict[pd.Timestamp, float], float]:
     """Devuelve la base de costos por sucursal junto a UF mensuales y factor de diciembre."""
     diccionario = load_dictionary()[["Sucursal", "Banner"]].drop_duplicates()
@@ -235,6 +323,7 @@ def build_break_even_table() -> pd.DataFrame:
 def build_breakeven_table_full_range(
     margen_paso: float = 0.1,
     usar_factor_diciembre: bool = True,
+    politica_redes: str | None = None,
 ) -> pd.DataFrame:
     """Calcula la venta necesaria para breakeven (EBITDA >= 0) con rango completo de márgenes.
     
@@ -243,21 +332,17 @@ def build_breakeven_table_full_range(
         usar_factor_diciembre: Si True, aplica el factor de diciembre cuando el último mes es diciembre.
                                Si False, siempre usa factor 1.0 (útil para comparar con simulador HTML).
                                Default: True
+        politica_redes: Política de asignación del costo de redes (equal, sales, m2).
+                        Por defecto usa NETWORK_ALLOCATION.
     
     Returns:
         DataFrame con columnas: Sucursal, Margen_contribucion (%), Venta_necesaria ($)
     """
     base, es_diciembre, uf_por_mes, uf_vigente = build_store_base()
     
-    # Cargar costos de redes y calcular por tienda
-    network_params = load_network_costs()
-    ventas = load_sales()
-    stores_with_sales = set(ventas["Sucursal"].unique()) if not ventas.empty else set()
-    num_stores = len(stores_with_sales) if stores_with_sales else 1
-    network_cost_per_store = (network_params["gasto_mensual"] * network_params["pct_retail"]) / num_stores
-    
-    # Agregar costo de redes a la base
-    base["Redes_sistemas"] = network_cost_per_store
+    # Costo de redes por tienda según la política de asignación vigente
+    costos_redes = network_cost_by_store(load_sales(), base["Sucursal"], politica_redes)
+    base["Redes_sistemas"] = base["Sucursal"].map(costos_redes)
     
     # Eliminar duplicados por Sucursal (mantener primera ocurrencia)
     base = base.drop_duplicates(subset=["Sucursal"], keep="first").reset_index(drop=True)
@@ -444,8 +529,134 @@ def _append_missing_months(
     return work
 
 
-def build_eerr() -> pd.DataFrame:
-    """Arma el estado de resultados mensual por tienda."""
+EERR_METRIC_COLUMNS = [
+    "Venta",
+    "Costo_de_venta",
+    "Contribucion",
+    "Margen_contribucion",
+    "Arriendo_fijo",
+    "Arriendo_variable",
+    "Arriendo_fondo_promocion",
+    "Arriendo_GGCC",
+    "Arriendo_total",
+    "Remuneraciones_fijo",
+    "Remuneraciones_comisiones",
+    "Remuneraciones_total",
+    "Redes_sistemas",
+    "Comision_medio_pago",
+    "Otros_costos",
+    "Gastos_operacionales",
+    "EBITDA",
+    "Margen_EBITDA",
+]
+EERR_COLUMNS = ["Sucursal", "Banner", "Mes", "Escenario", "Es_presupuesto", *EERR_METRIC_COLUMNS]
+EERR_SHARDING_MODES = ("banner", "tienda")
+
+# Entradas compartidas por todos los shards de un mismo cálculo de EERR.
+_ENTRADAS_WORKER: dict[str, object] = {}
+
+
+# Orden y llaves de los left joins que arman el EERR a partir de las ventas.
+_JOIN_PLAN = (
+    ("contrib", ("Sucursal", "Mes", "Escenario")),
+    ("diccionario", ("Sucursal",)),
+    ("staff", ("Sucursal",)),
+    ("arriendo", ("Sucursal",)),
+    ("otros", ("Banner",)),
+    ("medio_pago", ("Banner",)),
+)
+
+
+def _codificar(columnas: list[pd.Series]) -> list[np.ndarray]:
+    """Codifica varias columnas con un mismo diccionario de enteros.
+
+    Igual que ``merge``, los NaN se tratan como un valor más de la llave.
+    """
+    valores = pd.concat([col.reset_index(drop=True) for col in columnas], ignore_index=True)
+    codigos, _ = pd.factorize(valores, use_na_sentinel=False)
+    cortes = np.cumsum([len(col) for col in columnas])[:-1]
+    return np.split(codigos, cortes)
+
+
+def _posiciones_join(izquierda: np.ndarray, derecha: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Posiciones de un left join sobre códigos enteros, en el orden de ``merge``.
+
+    Cada fila izquierda se repite una vez por coincidencia (en el orden de la
+    tabla derecha); sin coincidencia la posición derecha es -1.
+    """
+    grupos = int(max(izquierda.max(initial=-1), derecha.max(initial=-1))) + 1
+    orden = np.argsort(derecha, kind="stable")
+    conteo = np.bincount(derecha, minlength=grupos)
+    inicio = np.cumsum(conteo) - conteo
+
+    coincidencias = conteo[izquierda]
+    repeticiones = np.maximum(coincidencias, 1)
+    filas = np.repeat(np.arange(len(izquierda)), repeticiones)
+    desplazamiento = np.arange(len(filas)) - np.repeat(np.cumsum(repeticiones) - repeticiones, repeticiones)
+
+    posiciones = np.full(len(filas), -1, dtype=np.int64)
+    hay = np.repeat(coincidencias > 0, repeticiones)
+    posiciones[hay] = orden[(np.repeat(inicio[izquierda], repeticiones) + desplazamiento)[hay]]
+    return filas, posiciones
+
+
+def _plan_union(tablas: dict[str, pd.DataFrame]) -> dict[str, np.ndarray]:
+    """Resuelve la cadena de left joins del EERR como posiciones por tabla.
+
+    Las tiendas (``store_idx``) y banners (``banner_idx``) se codifican una sola
+    vez para todas las tablas; cada join solo mueve arreglos de enteros (fila de
+    ventas y fila de cada tabla de atributos, -1 si no hay match) en vez de
+    copiar el frame completo.
+    """
+    ventas = tablas["ventas"]
+    por_tienda = ["ventas", *(nombre for nombre, llaves in _JOIN_PLAN if "Sucursal" in llaves)]
+    store_idx = dict(zip(por_tienda, _codificar([tablas[nombre]["Sucursal"] for nombre in por_tienda])))
+    por_banner = ["diccionario", *(nombre for nombre, llaves in _JOIN_PLAN if llaves == ("Banner",))]
+    # Se agrega un NaN al final: las filas sin diccionario (posición -1) toman
+    # ese código, igual que ``merge`` empareja llaves NaN.
+    codigos_banner = _codificar([*(tablas[nombre]["Banner"] for nombre in por_banner), pd.Series([np.nan])])
+    banner_idx = dict(zip(por_banner, codigos_banner))
+    banner_diccionario = np.concatenate([banner_idx["diccionario"], codigos_banner[-1]])
+
+    plan = {"ventas": np.arange(len(ventas))}
+    for nombre, llaves in _JOIN_PLAN:
+        if nombre == "contrib":
+            mes, escenario = (_codificar([ventas[llave], tablas[nombre][llave]]) for llave in ("Mes", "Escenario"))
+            ancho_mes = int(max(mes[0].max(initial=0), mes[1].max(initial=0))) + 1
+            ancho_esc = int(max(escenario[0].max(initial=0), escenario[1].max(initial=0))) + 1
+            izquierda = ((store_idx["ventas"] * ancho_mes + mes[0]) * ancho_esc + escenario[0])[plan["ventas"]]
+            derecha = (store_idx[nombre] * ancho_mes + mes[1]) * ancho_esc + escenario[1]
+        elif llaves == ("Sucursal",):
+            izquierda, derecha = store_idx["ventas"][plan["ventas"]], store_idx[nombre]
+        else:
+            izquierda, derecha = banner_diccionario[plan["diccionario"]], banner_idx[nombre]
+        filas, posiciones = _posiciones_join(izquierda, derecha)
+        plan = {clave: valores[filas] for clave, valores in plan.items()}
+        plan[nombre] = posiciones
+    return plan
+
+
+def _aplicar_plan(tablas: dict[str, pd.DataFrame], plan: dict[str, np.ndarray]) -> pd.DataFrame:
+    """Materializa el plan: una sola toma posicional por tabla, sin frames intermedios."""
+    bloques = [tablas["ventas"].reset_index(drop=True).take(plan["ventas"])]
+    for nombre, llaves in _JOIN_PLAN:
+        columnas = [col for col in tablas[nombre].columns if col not in llaves]
+        bloque = tablas[nombre][columnas].reset_index(drop=True).reindex(plan[nombre])
+        bloques.append(bloque)
+    for bloque in bloques:
+        bloque.index = pd.RangeIndex(len(plan["ventas"]))
+    return pd.concat(bloques, axis=1)
+
+
+def _cargar_entradas_eerr(politica_redes: str | None = None) -> dict[str, object]:
+    """Carga las fuentes del EERR y calcula los valores que dependen del portafolio completo.
+
+    El costo de redes depende de la cantidad total de tiendas (o de los totales
+    mensuales), y el UF promedio de los meses presentes, por lo que ambos se
+    calculan una sola vez aquí y se adjuntan a las ventas antes de particionar.
+    El plan de joins del portafolio completo queda en ``plan`` para que el
+    cálculo secuencial no lo vuelva a resolver.
+    """
     ventas = load_sales()
     contrib = load_contribution()
     staff = load_staff_costs()
@@ -453,21 +664,71 @@ def build_eerr() -> pd.DataFrame:
     otros = load_other_costs()
     medio_pago = load_payment_commission()
     diccionario = load_dictionary()
-    
-    # Load network costs and calculate per-store cost
-    network_params = load_network_costs()
-    # Use stores that actually had sales, not all stores in dictionary
-    stores_with_sales = set(ventas["Sucursal"].unique()) if not ventas.empty else set()
-    num_stores = len(stores_with_sales) if stores_with_sales else 1  # Avoid division by zero
-    network_cost_per_store = (network_params["gasto_mensual"] * network_params["pct_retail"]) / num_stores
-
-    merge_keys = ["Sucursal", "Mes", "Escenario"]
-    eerr = ventas.merge(contrib, how="left", on=merge_keys)
-    eerr = eerr.merge(diccionario, how="left", on="Sucursal")
-    eerr = eerr.merge(staff, how="left", on="Sucursal")
-    eerr = eerr.merge(arriendo, how="left", on="Sucursal")
-    eerr = eerr.merge(otros, how="left", on="Banner")
-    eerr = eerr.merge(medio_pago, how="left", on="Banner")
+
+    ventas = ventas.copy()
+    ventas["_fila"] = np.arange(len(ventas))
+
+    # El reparto se hace sobre las mismas filas que produce la cadena de joins
+    # (incluidas las duplicadas), sin materializar el resto de las columnas.
+    tablas = {
+        "ventas": ventas,
+        "contrib": contrib,
+        "diccionario": diccionario,
+        "staff": staff,
+        "arriendo": arriendo,
+        "otros": otros,
+        "medio_pago": medio_pago,
+    }
+    plan = _plan_union(tablas)
+    filas = plan["ventas"]
+    llaves = ventas[["Sucursal", "Mes", "Ventas"]].iloc[filas].reset_index(drop=True)
+    redes = allocate_network_costs(llaves, politica_redes)
+    ventas["_redes"] = redes.groupby(filas).first().reindex(ventas["_fila"]).to_numpy()
+
+    return {
+        "ventas": ventas,
+        "contrib": contrib,
+        "staff": staff,
+        "arriendo": arriendo,
+        "otros": otros,
+        "medio_pago": medio_pago,
+        "diccionario": diccionario,
+        "uf_promedios": uf_promedio_mensual(ventas["Mes"]),
+        "plan": plan,
+    }
+
+
+def _eerr_parcial(entradas: dict[str, object], sucursales: Iterable[str] | None = None) -> pd.DataFrame:
+    """Calcula el EERR de un subconjunto de sucursales (todas si ``sucursales`` es None).
+
+    Devuelve las filas sin el orden final; la columna ``_fila`` conserva la
+    posición de la venta original para poder recombinar shards.
+    """
+    ventas = entradas["ventas"]
+    contrib = entradas["contrib"]
+    staff = entradas["staff"]
+    arriendo = entradas["arriendo"]
+    diccionario = entradas["diccionario"]
+    if sucursales is not None:
+        seleccion = pd.Index(list(sucursales))
+        ventas = ventas[ventas["Sucursal"].isin(seleccion)]
+        contrib = contrib[contrib["Sucursal"].isin(seleccion)]
+        staff = staff[staff["Sucursal"].isin(seleccion)]
+        arriendo = arriendo[arriendo["Sucursal"].isin(seleccion)]
+        diccionario = diccionario[diccionario["Sucursal"].isin(seleccion)]
+    uf_promedios = entradas["uf_promedios"]
+
+    tablas = {
+        "ventas": ventas,
+        "contrib": contrib,
+        "diccionario": diccionario,
+        "staff": staff,
+        "arriendo": arriendo,
+        "otros": entradas["otros"],
+        "medio_pago": entradas["medio_pago"],
+    }
+    plan = entradas.get("plan") if sucursales is None else None
+    eerr = _aplicar_plan(tablas, plan if plan is not None else _plan_union(tablas))
 
     fill_zero = {
         "Margen_pct": 0,
@@ -490,7 +751,6 @@ def build_eerr() -> pd.DataFrame:
     eerr["Margen_contribucion"] = eerr["Ventas"] * eerr["Margen_pct"]
     eerr["Costo_venta"] = eerr["Ventas"] - eerr["Margen_contribucion"]
 
-    uf_promedios = uf_promedio_mensual(eerr["Mes"])
     eerr["UF_promedio"] = eerr["Mes"].map(uf_promedios)
 
     factores_diciembre = eerr["Mes"].dt.month.eq(12)
@@ -509,8 +769,8 @@ def build_eerr() -> pd.DataFrame:
     eerr["Arriendo_total"] = arriendo_fijo + arriendo_variable + arriendo_fondo_promocion + eerr["Arriendo_GGCC"]
     eerr["Otros_costos"] = eerr["Ventas"] * eerr["Total otros costos"]
     
-    # New cost calculations
-    eerr["Redes_sistemas"] = network_cost_per_store  # Fixed cost per store
+    # Costo de redes asignado globalmente por (tienda, mes) antes de particionar
+    eerr["Redes_sistemas"] = eerr.pop("_redes")
     eerr["Comision_medio_pago"] = eerr["Ventas"] * eerr["Comision_medio_pago"]
 
     eerr["Comisiones_variables"] = 0.0
@@ -576,36 +836,8 @@ def build_eerr() -> pd.DataFrame:
 
     eerr["Es_presupuesto"] = eerr["Escenario"].eq(BUDGET_SCENARIO)
 
-    metric_columns = [
-        "Venta",
-        "Costo_de_venta",
-        "Contribucion",
-        "Margen_contribucion",
-        "Arriendo_fijo",
-        "Arriendo_variable",
-        "Arriendo_fondo_promocion",
-        "Arriendo_GGCC",
-        "Arriendo_total",
-        "Remuneraciones_fijo",
-        "Remuneraciones_comisiones",
-        "Remuneraciones_total",
-        "Redes_sistemas",
-        "Comision_medio_pago",
-        "Otros_costos",
-        "Gastos_operacionales",
-        "EBITDA",
-        "Margen_EBITDA",
-    ]
-    ordered_columns = [
-        "Sucursal",
-        "Banner",
-        "Mes",
-        "Escenario",
-        "Es_presupuesto",
-        *metric_columns,
-    ]
-    eerr = eerr[ordered_columns]
-    eerr = _append_missing_months(eerr, metric_columns, scenario_column="Escenario")
+    eerr = eerr[[*EERR_COLUMNS, "_fila"]]
+    eerr = _append_missing_months(eerr, EERR_METRIC_COLUMNS, scenario_column="Escenario")
 
     eerr["Es_presupuesto"] = eerr["Escenario"].eq(BUDGET_SCENARIO)
 
@@ -614,58 +846,240 @@ def build_eerr() -> pd.DataFrame:
             eerr.loc[eerr["Es_presupuesto"], ["Sucursal", "Mes"]]
         )
         if len(claves_presupuesto) > 0:
-            metric_na = eerr[[*metric_columns]].isna().all(axis=1)
+            metric_na = eerr[EERR_METRIC_COLUMNS].isna().all(axis=1)
             es_real = ~eerr["Es_presupuesto"]
             claves = pd.MultiIndex.from_frame(eerr[["Sucursal", "Mes"]])
             filler_mask = es_real & metric_na & claves.isin(claves_presupuesto)
             if filler_mask.any():
                 eerr = eerr.loc[~filler_mask].reset_index(drop=True)
 
-    return eerr[ordered_columns].sort_values(["Sucursal", "Mes"]).reset_index(drop=True)
+    return eerr
+
+
+def _combinar_eerr(partes: list[pd.DataFrame]) -> pd.DataFrame:
+    """Une shards en el mismo orden que produce el cálculo en un solo bloque.
+
+    Las filas calculadas siguen el orden de las ventas (``_fila``) y las filas
+    agregadas para completar meses van al final, por sucursal, escenario y mes.
+    """
+    eerr = pd.concat(partes, ignore_index=True, sort=False) if len(partes) > 1 else partes[0]
+    if len(partes) > 1:
+        # Un shard sin datos en una columna (p. ej. tiendas sin banner) no debe
+        # degradar el tipo que tendría el cálculo secuencial.
+        tipos = {}
+        for columna in eerr.columns:
+            con_datos = [parte[columna].dtype for parte in partes if parte[columna].notna().any()]
+            if con_datos and eerr[columna].dtype != con_datos[0]:
+                tipos[columna] = con_datos[0]
+        eerr = eerr.astype(tipos)
+        calculadas = eerr["_fila"].notna()
+        eerr = pd.concat(
+            [
+                eerr.loc[calculadas].sort_values("_fila", kind="stable"),
+                eerr.loc[~calculadas].sort_values(["Sucursal", "Escenario", "Mes"], kind="stable"),
+            ],
+            ignore_index=True,
+        )
+    return eerr[EERR_COLUMNS].sort_values(["Sucursal", "Mes"]).reset_index(drop=True)
+
+
+def _shards_eerr(entradas: dict[str, object], workers: int, particion: str) -> list[list[str]]:
+    """Agrupa las sucursales en shards por banner o por hash del nombre."""
+    sucursales = pd.unique(entradas["ventas"]["Sucursal"])
+    if particion == "banner":
+        banners = entradas["diccionario"].dropna(subset=["Sucursal"]).groupby("Sucursal")["Banner"].first()
+        claves = pd.Series(sucursales).map(banners).fillna("").to_numpy()
+    else:
+        claves = np.array([zlib.crc32(str(nombre).encode("utf-8")) % workers for nombre in sucursales])
+
+    shards: dict[object, list[str]] = {}
+    for nombre, clave in zip(sucursales, claves):
+        shards.setdefault(clave, []).append(nombre)
+    return [shards[clave] for clave in sorted(shards, key=str)]
+
+
+def _iniciar_worker_eerr(entradas: dict[str, object]) -> None:
+    _ENTRADAS_WORKER.clear()
+    _ENTRADAS_WORKER.update(entradas)
+
+
+def _eerr_shard(sucursales: list[str]) -> pd.DataFrame:
+    return _eerr_parcial(_ENTRADAS_WORKER, sucursales)
+
+
+def build_eerr(
+    politica_redes: str | None = None,
+    workers: int | None = None,
+    particion: str | None = None,
+) -> pd.DataFrame:
+    """Arma el estado de resultados mensual por tienda.
+
+    Con ``workers`` > 1 las sucursales se reparten en shards (por banner o por
+    hash de tienda) que se calculan en un pool de procesos. Las entradas
+    compartidas se envían una vez por proceso y el resultado es idéntico al
+    cálculo secuencial.
+    """
+    workers = EERR_WORKERS if workers is None else workers
+    particion = (particion or EERR_SHARDING).lower()
+    if particion not in EERR_SHARDING_MODES:
+        opciones = ", ".join(EERR_SHARDING_MODES)
+        raise ValueError(f"Partición de EERR desconocida: '{particion}'. Opciones: {opciones}.")
+
+    entradas = _cargar_entradas_eerr(politica_redes)
+    if workers <= 1:
+        return _combinar_eerr([_eerr_parcial(entradas)])
+
+    shards = _shards_eerr(entradas, workers, particion)
+    if len(shards) <= 1:
+        return _combinar_eerr([_eerr_parcial(entradas)])
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(shards)),
+        initializer=_iniciar_worker_eerr,
+        # Cada shard resuelve su propio plan; el del portafolio no se envía.
+        initargs=({clave: valor for clave, valor in entradas.items() if clave != "plan"},),
+    ) as pool:
+        partes = list(pool.map(_eerr_shard, shards))
+    return _combinar_eerr(partes)
+
+
+def build_consolidated_eerr(eerr: pd.DataFrame) -> pd.DataFrame:
+    """Consolida el EERR de todas las tiendas en un estado de resultados mensual de la compañía."""
+    metric_ids = [clave for clave, _, _ in METRIC_CONFIG]
+    currency_ids = [clave for clave, _, formato in METRIC_CONFIG if formato == "currency"]
+    if eerr.empty:
+        return pd.DataFrame(columns=["Mes", "Escenario", "Tiendas", *metric_ids])
+
+    agrupado = eerr.groupby("Mes", sort=True)
+    consolidado = agrupado[currency_ids].sum(min_count=1)
+    consolidado["Tiendas"] = agrupado["Venta"].apply(lambda serie: int((serie > 0).sum()))
+    tiene_real = agrupado["Es_presupuesto"].apply(lambda serie: bool((~serie.astype(bool)).any()))
+    consolidado["Escenario"] = tiene_real.map({True: REAL_SCENARIO, False: BUDGET_SCENARIO})
+
+    venta = consolidado["Venta"]
+    con_venta = venta.where(venta != 0)
+    consolidado["Margen_contribucion"] = consolidado["Contribucion"] / con_venta * 100
+    consolidado["Margen_EBITDA"] = consolidado["EBITDA"] / con_venta * 100
+
+    consolidado = consolidado.reset_index()
+    return consolidado[["Mes", "Escenario", "Tiendas", *metric_ids]]
+
+
+def etiquetas_mes(meses: pd.DatetimeIndex) -> np.ndarray:
+    """Devuelve las etiquetas ``YYYY-MM`` de los meses en una sola operación vectorizada."""
+    meses = pd.DatetimeIndex(meses)
+    anios = meses.year.to_numpy().astype(str)
+    numeros = np.char.zfill(meses.month.to_numpy().astype(str), 2)
+    return np.char.add(np.char.add(anios, "-"), numeros)
+
+
+def eerr_cubo(
+    eerr: pd.DataFrame,
+    metricas: Iterable[str] | None = None,
+) -> tuple[np.ndarray, pd.MultiIndex, pd.DatetimeIndex, list[str]]:
+    """Reordena el EERR como un cubo (tienda, mes, métrica).
+
+    Las tiendas (Sucursal, Banner) y los meses se indexan con códigos ordenados y
+    los valores se copian con una sola asignación por posición. Las celdas sin
+    dato quedan en NaN; si hay filas duplicadas se conserva el primer valor no
+    nulo, igual que ``pivot_table(aggfunc="first")``.
+    """
+    metricas = list(metricas) if metricas is not None else [clave for clave, _, _ in METRIC_CONFIG]
+    claves = ["Sucursal", "Banner", "Mes"]
+    datos = eerr.dropna(subset=claves)
+    if datos.duplicated(claves).any():
+        datos = datos.groupby(claves, sort=False)[metricas].first().reset_index()
+
+    codigos_tienda, tiendas = pd.MultiIndex.from_frame(datos[["Sucursal", "Banner"]]).factorize(sort=True)
+    codigos_mes, meses = pd.factorize(datos["Mes"], sort=True)
+    tiendas = pd.MultiIndex.from_tuples(list(tiendas), names=["Sucursal", "Banner"])
+    meses = pd.DatetimeIndex(meses, name="Mes")
+
+    cubo = np.full((len(tiendas), len(meses), len(metricas)), np.nan)
+    cubo[codigos_tienda, codigos_mes] = datos[metricas].to_numpy(dtype=float, na_value=np.nan)
+    return cubo, tiendas, meses, metricas
 
 
 def eerr_en_columnas(eerr: pd.DataFrame) -> pd.DataFrame:
     """Devuelve el EERR con los meses como columnas y métricas como subcolumnas."""
-    columnas_metricas = [
-        "Venta",
-        "Costo_de_venta",
-        "Contribucion",
-        "Margen_contribucion",
-        "Arriendo_fijo",
-        "Arriendo_variable",
-        "Arriendo_fondo_promocion",
-        "Arriendo_GGCC",
-        "Arriendo_total",
-        "Remuneraciones_fijo",
-        "Remuneraciones_comisiones",
-        "Remuneraciones_total",
-        "Redes_sistemas",
-        "Comision_medio_pago",
-        "Otros_costos",
-        "Gastos_operacionales",
-        "EBITDA",
-        "Margen_EBITDA",
-    ]
-
-    tabla = eerr.pivot_table(
-        index=["Sucursal", "Banner"],
-        columns="Mes",
-        values=columnas_metricas,
-        aggfunc="first",
-    )
+    columnas_metricas = sorted(clave for clave, _, _ in METRIC_CONFIG)
+    cubo, tiendas, meses, metricas = eerr_cubo(eerr, columnas_metricas)
 
-    if tabla.empty:
-        return tabla
+    if cubo.size == 0:
+        return pd.DataFrame(
+            index=pd.MultiIndex.from_tuples([], names=["Sucursal", "Banner"]),
+            columns=pd.MultiIndex.from_tuples([], names=["Mes", "Cuenta"]),
+        )
 
-    tabla = tabla.swaplevel(axis=1).sort_index(axis=1, level=0)
-    tabla.columns = pd.MultiIndex.from_tuples(
+    columnas = pd.MultiIndex.from_arrays(
         [
-            (mes.strftime("%Y-%m"), cuenta)
-            for mes, cuenta in tabla.columns
+            np.repeat(etiquetas_mes(meses), len(metricas)).tolist(),
+            np.tile(np.asarray(metricas, dtype=object), len(meses)).tolist(),
         ],
         names=["Mes", "Cuenta"],
     )
-    return tabla.sort_index()
+    tabla = pd.DataFrame(cubo.reshape(len(tiendas), -1), index=tiendas, columns=columnas)
+
+    # Igual que pivot_table: se descartan filas y columnas sin ningún dato.
+    con_dato = ~np.isnan(tabla.to_numpy())
+    return tabla.loc[con_dato.any(axis=1), con_dato.any(axis=0)]
+
+
+def _agrupar_miles(enteros: np.ndarray) -> np.ndarray:
+    """Inserta separadores de miles sobre enteros no negativos, grupo a grupo."""
+    texto = np.char.zfill((enteros % 1000).astype(str), 3)
+    resto = enteros // 1000
+    while resto.any():
+        activo = resto > 0
+        alto = np.char.zfill((resto % 1000).astype(str), 3)
+        texto = np.where(activo, np.char.add(np.char.add(alto, ","), texto), texto)
+        resto = resto // 1000
+    texto = np.char.lstrip(texto, "0")
+    return np.where(np.char.str_len(texto) == 0, "0", texto)
+
+
+def formatear_valores(valores: np.ndarray, porcentaje: np.ndarray | bool = False) -> np.ndarray:
+    """Formatea una matriz de números como ``f"{v:,.0f}"`` (o ``f"{v:,.1f}%"``).
+
+    Los montos se redondean con ``np.rint`` (mitad al par, igual que Python) y
+    los separadores de miles se agregan con aritmética entera; solo los
+    porcentajes pasan por ``printf`` para conservar el redondeo decimal exacto.
+    Los NaN se muestran como ``-``.
+    """
+    valores = np.asarray(valores, dtype=float)
+    porcentaje = np.broadcast_to(np.asarray(porcentaje, dtype=bool), valores.shape)
+    finito = np.isfinite(valores)
+    absolutos = np.where(finito, np.abs(valores), 0.0)
+
+    enteros = np.rint(absolutos).astype(np.int64)
+    decimales = np.zeros(valores.shape, dtype="<U1")
+    if porcentaje.any():
+        redondeado = np.char.mod("%.1f", absolutos[porcentaje])
+        partes = np.char.partition(redondeado, ".")
+        enteros[porcentaje] = partes[:, 0].astype(np.int64)
+        decimales[porcentaje] = partes[:, 2]
+
+    texto = _agrupar_miles(enteros)
+    texto = np.where(porcentaje, np.char.add(np.char.add(np.char.add(texto, "."), decimales), "%"), texto)
+    texto = np.where(np.signbit(valores), np.char.add("-", texto), texto)
+
+    if finito.all():
+        return texto
+    infinitos = np.char.add(valores.astype(str), np.where(porcentaje, "%", ""))
+    return np.where(finito, texto, np.where(np.isnan(valores), "-", infinitos))
+
+
+def componer_tabla(headers: Iterable[str], etiquetas: Iterable[str], celdas: np.ndarray) -> str:
+    """Alinea a la derecha celdas ya formateadas y arma la tabla de texto."""
+    headers = np.asarray(list(headers), dtype=str)
+    cuerpo = np.column_stack([np.asarray(list(etiquetas), dtype=str), celdas])
+
+    anchos = np.maximum(np.char.str_len(headers), np.char.str_len(cuerpo).max(axis=0))
+    filas = np.char.rjust(np.vstack([headers, cuerpo]), anchos).tolist()
+
+    linea_sep = "-+-".join("-" * int(ancho) for ancho in anchos)
+    lineas = [" | ".join(fila) for fila in filas]
+    return "\n".join([lineas[0], linea_sep, *lineas[1:]])
 
 
 def formatear_tabla(df: pd.DataFrame) -> str:
@@ -673,31 +1087,7 @@ def formatear_tabla(df: pd.DataFrame) -> str:
     if df.empty:
         return "(sin datos)"
 
-    headers = ["Cuenta"] + [str(col) for col in df.columns]
-    cuerpo = []
-    for idx, row in df.iterrows():
-        idx_str = str(idx)
-        idx_lower = idx_str.lower()
-        fila = [idx_str]
-        for valor in row:
-            if pd.isna(valor):
-                fila.append("-")
-            else:
-                if idx_lower.startswith("margen"):
-                    fila.append(f"{valor:,.1f}%")
-                else:
-                    fila.append(f"{valor:,.0f}")
-        cuerpo.append(fila)
-
-    anchos = [len(titulo) for titulo in headers]
-    for fila in cuerpo:
-        for i, celda in enumerate(fila):
-            anchos[i] = max(anchos[i], len(celda))
-
-    def _fmt(fila: list[str]) -> str:
-        return " | ".join(celda.rjust(anchos[i]) for i, celda in enumerate(fila))
-
-    linea_header = _fmt(headers)
-    linea_sep = "-+-".join("-" * ancho for ancho in anchos)
-    lineas_datos = [_fmt(fila) for fila in cuerpo]
-    return "\n".join([linea_header, linea_sep, *lineas_datos])
+    etiquetas = np.array([str(idx) for idx in df.index])
+    porcentaje = np.char.startswith(np.char.lower(etiquetas), "margen")[:, None]
+    celdas = formatear_valores(df.to_numpy(dtype=float, na_value=np.nan), porcentaje)
+    return componer_tabla(["Cuenta"] + [str(col) for col in df.columns], etiquetas, celdas)
@@ -0,0 +1,157 @@
+"""Asignación del costo corporativo de redes y sistemas entre tiendas."""
+from __future__ import annotations
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from ynk_modelo.config import NETWORK_ALLOCATION_POLICY
+from ynk_modelo.io.excel import load_network_costs, load_store_surfaces
+
+
+NETWORK_ALLOCATION_POLICIES = ("equal", "sales", "m2")
+
+
+def resolve_policy(politica: str | None) -> str:
+    """Normaliza la política de asignación y valida que sea conocida."""
+    valor = (politica or NETWORK_ALLOCATION_POLICY or "equal").strip().lower()
+    if valor not in NETWORK_ALLOCATION_POLICIES:
+        opciones = ", ".join(NETWORK_ALLOCATION_POLICIES)
+        raise ValueError(
+            f"Política de asignación de redes desconocida: '{politica}'. Opciones: {opciones}."
+        )
+    return valor
+
+
+def network_pool(params: dict[str, float] | None = None) -> float:
+    """Devuelve el gasto mensual de redes asignable a retail."""
+    if params is None:
+        params = load_network_costs()
+    return float(params.get("gasto_mensual", 0.0)) * float(params.get("pct_retail", 0.0))
+
+
+def equal_share(sucursales: pd.Series, params: dict[str, float] | None = None) -> float:
+    """Cuota pareja: pool dividido por las tiendas con venta registrada."""
+    num_stores = int(pd.Series(sucursales).nunique()) or 1
+    return network_pool(params) / num_stores
+
+
+def allocate_network_costs(
+    frame: pd.DataFrame,
+    politica: str | None = None,
+    params: dict[str, float] | None = None,
+    superficies: pd.Series | None = None,
+    venta_col: str = "Ventas",
+) -> pd.Series:
+    """Asigna el pool de redes a cada fila (tienda, mes) en un solo paso vectorizado.
+
+    - ``equal``: cuota fija por tienda con venta (comportamiento histórico).
+    - ``sales``: proporcional a la venta de la tienda dentro de cada mes.
+    - ``m2``: proporcional a la superficie de las tiendas con venta en el mes.
+
+    Con ``sales`` y ``m2`` las filas sin venta positiva no reciben costo y, si un
+    mes no tiene pesos válidos, el pool se reparte en partes iguales entre las
+    tiendas activas de ese mes.
+    """
+    politica = resolve_policy(politica)
+    if params is None:
+        params = load_network_costs()
+    if frame.empty:
+        return pd.Series(dtype=float, index=frame.index)
+
+    if politica == "equal":
+        return pd.Series(equal_share(frame["Sucursal"], params), index=frame.index)
+
+    pool = network_pool(params)
+    ventas = frame[venta_col].to_numpy(dtype=float, na_value=0.0)
+    activa = ventas > 0
+
+    if politica == "sales":
+        pesos = np.where(activa, ventas, 0.0)
+    else:
+        if superficies is None:
+            superficies = load_store_surfaces()
+        m2 = frame["Sucursal"].map(superficies).to_numpy(dtype=float, na_value=0.0)
+        pesos = np.where(activa, np.clip(m2, 0.0, None), 0.0)
+
+    codigos, uniques = pd.factorize(frame["Mes"])
+    codigos = np.where(codigos < 0, len(uniques), codigos)
+    grupos = len(uniques) + 1
+    total_mes = np.bincount(codigos, weights=pesos, minlength=grupos)[codigos]
+    activas_mes = np.bincount(codigos, weights=activa.astype(float), minlength=grupos)[codigos]
+
+    cuota = np.divide(pesos, total_mes, out=np.zeros_like(pesos), where=total_mes > 0)
+    sin_pesos = activa & (total_mes <= 0) & (activas_mes > 0)
+    cuota[sin_pesos] = 1.0 / activas_mes[sin_pesos]
+    return pd.Series(pool * cuota, index=frame.index)
+
+
+def network_cost_by_store(
+    ventas: pd.DataFrame,
+    sucursales: Iterable[str] | None = None,
+    politica: str | None = None,
+    params: dict[str, float] | None = None,
+    superficies: pd.Series | None = None,
+    venta_col: str = "Ventas",
+) -> pd.Series:
+    """Costo mensual representativo por tienda (promedio de los meses con venta).
+
+    Las tiendas sin venta reciben la cuota pareja, igual que en el cálculo histórico.
+    """
+    politica = resolve_policy(politica)
+    if params is None:
+        params = load_network_costs()
+    cuota_pareja = (
+        equal_share(ventas["Sucursal"], params) if not ventas.empty else network_pool(params)
+    )
+
+    if politica == "equal" or ventas.empty:
+        tiendas = ventas["Sucursal"].unique() if not ventas.empty else []
+        costos = pd.Series(cuota_pareja, index=pd.Index(tiendas, name="Sucursal"), dtype=float)
+    else:
+        asignado = allocate_network_costs(ventas, politica, params, superficies, venta_col)
+        activa = ventas[venta_col].fillna(0) > 0
+        costos = asignado[activa].groupby(ventas.loc[activa, "Sucursal"]).mean()
+
+    if sucursales is not None:
+        indice = costos.index.union(pd.Index(list(sucursales)).unique())
+        costos = costos.reindex(indice)
+    return costos.fillna(cuota_pareja)
+
+
+def reallocate_network_costs(
+    eerr: pd.DataFrame,
+    politica: str | None = None,
+    params: dict[str, float] | None = None,
+    superficies: pd.Series | None = None,
+) -> pd.DataFrame:
+    """Reasigna ``Redes_sistemas`` sobre un EERR ya calculado.
+
+    Solo se recalculan la columna asignada y sus dependientes directos
+    (``Gastos_operacionales``, ``EBITDA`` y ``Margen_EBITDA``); el resto de las
+    columnas del EERR se reutiliza tal cual. Se reescriben todas las filas con
+    venta registrada, con cualquier política, y las cerradas quedan sin costo
+    como en ``build_eerr``; las filas de relleno (venta vacía) no se tocan.
+    """
+    resultado = eerr.copy()
+    if eerr.empty:
+        return resultado
+
+    venta = eerr["Venta"].to_numpy(dtype=float, na_value=np.nan)
+    registrada = ~np.isnan(venta)
+    abierta = venta > 0
+    asignado = allocate_network_costs(eerr, politica, params, superficies, venta_col="Venta").to_numpy()
+    nuevo = np.where(abierta, asignado, 0.0)
+    anterior = eerr["Redes_sistemas"].to_numpy(dtype=float, na_value=0.0)
+
+    delta = np.where(registrada, nuevo - anterior, 0.0)
+    redes = np.where(registrada, nuevo, eerr["Redes_sistemas"].to_numpy(dtype=float, na_value=np.nan))
+    resultado["Redes_sistemas"] = redes
+    resultado["Gastos_operacionales"] = eerr["Gastos_operacionales"].to_numpy(dtype=float, na_value=np.nan) + delta
+    ebitda = eerr["EBITDA"].to_numpy(dtype=float, na_value=np.nan) - delta
+    resultado["EBITDA"] = ebitda
+    margen = eerr["Margen_EBITDA"].to_numpy(dtype=float, na_value=np.nan).copy()
+    margen[abierta] = ebitda[abierta] / venta[abierta] * 100
+    resultado["Margen_EBITDA"] = margen
+    return resultado
@@ -0,0 +1,145 @@
+"""Simulación de EBITDA por tienda y mes con la misma aritmética del simulador web."""
+from __future__ import annotations
+
+import math
+from typing import Iterable, Mapping
+
+import numpy as np
+
+
+def _numero(valor: object) -> float:
+    """Equivalente a ``Number(valor || 0)`` en JS: nulos, NaN y texto valen 0."""
+    if isinstance(valor, bool):
+        return float(valor)
+    if isinstance(valor, (int, float)):
+        numero = float(valor)
+        return numero if math.isfinite(numero) else 0.0
+    try:
+        numero = float(valor)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return 0.0
+    return numero if math.isfinite(numero) else 0.0
+
+
+def _redondear(valor: float) -> int:
+    """``Math.round`` de JS: las mitades suben hacia +infinito."""
+    return math.floor(valor + 0.5)
+
+
+def staff_aggregates(
+    staff: Mapping[str, object],
+    role_costs: Mapping[str, Mapping[str, object]],
+    total_sales_commissions: Iterable[str],
+    excluded_roles: Iterable[str],
+) -> tuple[float, float, float, float]:
+    """Costo fijo, vendedores, tasa sumada y tasa sobre venta total de una dotación.
+
+    Replica ``computeStaffAggregatesForConfig``: las comisiones mayores a 1 son
+    montos fijos; los roles de comisión sobre venta total suman su tasa aparte
+    y los roles excluidos no comisionan.
+    """
+    total_ventas = set(total_sales_commissions)
+    excluidos = set(excluded_roles)
+    fijo = vendedores = tasa_sumada = tasa_total_ventas = 0.0
+    for rol, cantidad_cruda in staff.items():
+        cantidad = max(_redondear(_numero(cantidad_cruda)), 0)
+        if cantidad <= 0:
+            continue
+        metadata = role_costs.get(rol) or {}
+        fijo_unitario = _numero(metadata.get("fixed"))
+        comision = _numero(metadata.get("commission"))
+        fijo += cantidad * fijo_unitario
+
+        if rol in total_ventas and comision > 0:
+            tasa = comision if comision <= 1 else comision / 100_000_000
+            tasa_total_ventas += cantidad * tasa
+            continue
+        if rol in excluidos:
+            continue
+        if comision > 1:
+            fijo += cantidad * comision
+        elif comision > 0:
+            vendedores += cantidad
+            tasa_sumada += cantidad * comision
+    return fijo, vendedores, tasa_sumada, tasa_total_ventas
+
+
+def rent_factor_for_month(factor: object, mes: str) -> float:
+    """Factor de arriendo del mes: solo diciembre usa el factor (si es mayor a 1)."""
+    base = _numero(factor if factor is not None else 1)
+    if base <= 1:
+        return 1.0
+    partes = str(mes).split("-")
+    if len(partes) < 2 or not partes[1].isdigit() or not 1 <= int(partes[1]) <= 12:
+        return 1.0
+    return base if int(partes[1]) == 12 else 1.0
+
+
+def uf_for_month(uf_values: Mapping[str, object], uf_value: object, default_uf: float, mes: str) -> float:
+    """UF del mes con los mismos respaldos que ``getUfValueForMonth``."""
+    respaldo = _numero(uf_value)
+    if respaldo <= 0:
+        respaldo = _numero(default_uf)
+    if respaldo <= 0:
+        respaldo = 1.0
+    if mes in uf_values:
+        valor = _numero(uf_values[mes])
+        if valor > 0:
+            return valor
+    return respaldo
+
+
+def simulate_ebitda(
+    venta: np.ndarray,
+    margen_pct: np.ndarray,
+    costo_fijo: np.ndarray,
+    vendedores: np.ndarray,
+    tasa_sumada: np.ndarray,
+    tasa_total_ventas: np.ndarray,
+    arriendo_minimo: np.ndarray,
+    arriendo_porcentual: np.ndarray,
+    fondo_promocion: np.ndarray,
+    ggcc: np.ndarray,
+    redes: np.ndarray,
+    comision_medio_pago: np.ndarray,
+    otros_costos: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """EBITDA de muchas combinaciones tienda-mes en una sola pasada vectorizada.
+
+    Cada argumento es un arreglo con una posición por combinación (o un escalar
+    que se difunde). Devuelve ``(venta, ebitda, margen_ebitda_pct)``; donde la
+    venta no es positiva los tres valen 0, como en ``computeEbitdaForStoreMonth``.
+    """
+    venta = np.asarray(venta, dtype=float)
+    con_venta = venta > 0
+    venta_valida = np.where(con_venta, venta, 1.0)
+
+    contribucion = venta_valida * (np.asarray(margen_pct, dtype=float) / 100)
+    arriendo_base = np.maximum(arriendo_minimo, venta_valida * arriendo_porcentual)
+    arriendo_total = arriendo_base + arriendo_base * fondo_promocion + ggcc
+
+    vendedores = np.asarray(vendedores, dtype=float)
+    tasa_sumada = np.asarray(tasa_sumada, dtype=float)
+    tasa_total_ventas = np.asarray(tasa_total_ventas, dtype=float)
+    con_vendedores = (vendedores > 0) & (tasa_sumada > 0)
+    comisiones = np.where(
+        con_vendedores,
+        venta_valida / np.where(con_vendedores, vendedores, 1.0) * tasa_sumada,
+        0.0,
+    ) + np.where(tasa_total_ventas > 0, venta_valida * tasa_total_ventas, 0.0)
+
+    gasto_operacional = (
+        costo_fijo
+        + comisiones
+        + arriendo_total
+        + redes
+        + venta_valida * comision_medio_pago
+        + venta_valida * otros_costos
+    )
+    ebitda = contribucion - gasto_operacional
+    margen_ebitda = ebitda / venta_valida * 100
+    return (
+        np.where(con_venta, venta, 0.0),
+        np.where(con_venta, ebitda, 0.0),
+        np.where(con_venta, margen_ebitda, 0.0),
+    )
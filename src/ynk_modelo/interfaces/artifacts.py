@@ -0,0 +1,292 @@
+"""Artefactos generados listos para servir: variante gzip, ETag y caché en memoria."""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Mapping, TextIO
+
+GZIP_LEVEL = 9
+CACHE_CONTROL = "private, no-cache"
+ARTIFACT_MODE = 0o644
+
+# Caché de artefactos leídos: ruta -> ((mtime_ns, tamaño), artefacto).
+_CACHE: dict[Path, tuple[tuple[int, int], Artifact]] = {}
+
+
+def gzip_path(ruta: Path) -> Path:
+    """Ruta de la variante precomprimida de un artefacto."""
+    return ruta.with_name(ruta.name + ".gz")
+
+
+def etag_path(ruta: Path) -> Path:
+    """Ruta del archivo con el hash de contenido de un artefacto y el de su gzip."""
+    return ruta.with_name(ruta.name + ".etag")
+
+
+def content_hash(contenido: bytes) -> str:
+    """Hash de contenido usado como ETag (sha256 truncado)."""
+    return hashlib.sha256(contenido).hexdigest()[:32]
+
+
+class Artifact:
+    """Versión inmutable de un artefacto: contenido, ETag y variante gzip.
+
+    Quien sirve un artefacto puede retener esta instancia mientras responde;
+    una regeneración publica archivos nuevos sin modificarla.
+    """
+
+    __slots__ = ("etag", "content", "_gzip")
+
+    def __init__(self, content: bytes, etag: str | None = None, gzip_content: bytes | None = None):
+        self.content = content
+        self.etag = etag or content_hash(content)
+        self._gzip = gzip_content
+
+    @property
+    def gzip_content(self) -> bytes:
+        """Variante gzip; se comprime en memoria si no venía precomprimida."""
+        if self._gzip is None:
+            self._gzip = gzip.compress(self.content, compresslevel=GZIP_LEVEL, mtime=0)
+        return self._gzip
+
+
+class _Tee(io.RawIOBase):
+    """Destino binario que reparte cada bloque entre archivo, gzip y hash."""
+
+    def __init__(self, archivo: io.BufferedWriter, comprimido: gzip.GzipFile, hash_) -> None:
+        super().__init__()
+        self._archivo = archivo
+        self._comprimido = comprimido
+        self._hash = hash_
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, bloque) -> int:
+        self._archivo.write(bloque)
+        self._comprimido.write(bloque)
+        self._hash.update(bloque)
+        return len(bloque)
+
+
+class _Hashed(io.RawIOBase):
+    """Destino binario que escribe en un archivo y acumula el hash de lo escrito."""
+
+    def __init__(self, archivo: io.BufferedWriter) -> None:
+        super().__init__()
+        self._archivo = archivo
+        self.hash = hashlib.sha256()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, bloque) -> int:
+        self._archivo.write(bloque)
+        self.hash.update(bloque)
+        return len(bloque)
+
+
+def _temporal(ruta: Path, sufijo: str):
+    return tempfile.NamedTemporaryFile(
+        dir=ruta.parent, prefix=f".{ruta.name}.", suffix=sufijo, delete=False
+    )
+
+
+def _sincronizar(archivo) -> None:
+    archivo.flush()
+    os.fsync(archivo.fileno())
+    archivo.close()
+
+
+class ArtifactWriter:
+    """Escritura atómica en streaming de un artefacto con su gzip y su ETag.
+
+    El contenido se escribe en temporales del mismo directorio (``OUTPUT_DIR``
+    para los reportes) mientras se calcula el hash y se comprime; al cerrar sin
+    errores se hace ``fsync`` y se reemplazan los archivos con ``os.replace``.
+    Los lectores ven siempre la versión anterior completa o la nueva completa.
+    El archivo ``.etag`` guarda el hash del contenido y el del gzip, de modo que
+    un lector puede comprobar que las variantes corresponden al mismo cuerpo.
+
+    Uso::
+
+        with ArtifactWriter(ruta) as destino:
+            destino.write(...)
+    """
+
+    def __init__(self, ruta: Path):
+        self.path = ruta
+        self.etag: str | None = None
+        self._stream: TextIO | None = None
+
+    def __enter__(self) -> TextIO:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._archivo = _temporal(self.path, ".tmp")
+        self._archivo_gz = _temporal(self.path, ".gz.tmp")
+        self._destino_gz = _Hashed(self._archivo_gz)
+        self._gzip = gzip.GzipFile(
+            filename="", mode="wb", fileobj=self._destino_gz, compresslevel=GZIP_LEVEL, mtime=0
+        )
+        self._hash = hashlib.sha256()
+        buffer = io.BufferedWriter(_Tee(self._archivo, self._gzip, self._hash), 1 << 16)
+        self._stream = io.TextIOWrapper(buffer, encoding="utf-8")
+        return self._stream
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        temporales = [Path(self._archivo.name), Path(self._archivo_gz.name)]
+        try:
+            self._stream.close()
+            self._gzip.close()
+            _sincronizar(self._archivo)
+            _sincronizar(self._archivo_gz)
+            if exc_type is not None:
+                return
+            self.etag = self._hash.hexdigest()[:32]
+            with _temporal(self.path, ".etag.tmp") as archivo_etag:
+                temporales.append(Path(archivo_etag.name))
+                huella_gz = self._destino_gz.hash.hexdigest()[:32]
+                archivo_etag.write(f"{self.etag}\n{huella_gz}\n".encode("ascii"))
+                archivo_etag.flush()
+                os.fsync(archivo_etag.fileno())
+            for temporal in temporales:
+                # Los temporales nacen con permisos 0600.
+                os.chmod(temporal, ARTIFACT_MODE)
+            # Entre un reemplazo y otro un lector puede ver variantes de la
+            # versión anterior; ``load_artifact`` las descarta por sus hashes.
+            os.replace(temporales[0], self.path)
+            os.replace(temporales[1], gzip_path(self.path))
+            os.replace(temporales[2], etag_path(self.path))
+        finally:
+            for temporal in temporales:
+                temporal.unlink(missing_ok=True)
+
+
+def write_json(
+    valor: object,
+    destino: TextIO,
+    separadores: tuple[str, str] = (", ", ": "),
+) -> None:
+    """Serializa ``valor`` como JSON en ``destino`` de forma incremental.
+
+    Los mapeos se escriben entrada por entrada, así nunca existe en memoria
+    más de una entrada serializada; el resultado es idéntico a ``json.dumps``
+    con los mismos ``separadores``.
+    """
+    if not isinstance(valor, Mapping):
+        destino.write(json.dumps(valor, ensure_ascii=False, separators=separadores))
+        return
+    coma, dos_puntos = separadores
+    destino.write("{")
+    for posicion, (clave, contenido) in enumerate(valor.items()):
+        if posicion:
+            destino.write(coma)
+        destino.write(json.dumps(clave, ensure_ascii=False))
+        destino.write(dos_puntos)
+        destino.write(json.dumps(contenido, ensure_ascii=False, separators=separadores))
+    destino.write("}")
+
+
+def json_artifact(valor: object) -> Artifact:
+    """Artefacto en memoria con ``valor`` serializado como JSON compacto."""
+    return Artifact(
+        json.dumps(valor, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    )
+
+
+def _huellas(ruta: Path) -> tuple[str, str] | None:
+    """Hash del contenido y del gzip guardados en el ``.etag`` de ``ruta``."""
+    try:
+        lineas = etag_path(ruta).read_text(encoding="ascii").split()
+    except (FileNotFoundError, UnicodeDecodeError):
+        return None
+    return (lineas[0], lineas[1]) if len(lineas) >= 2 else None
+
+
+def load_artifact(ruta: Path) -> Artifact:
+    """Lee un artefacto publicado, reutilizando la copia en memoria si no cambió.
+
+    El ETag es siempre el hash del contenido leído. La variante gzip escrita
+    por ``ArtifactWriter`` se usa solo si el ``.etag`` corresponde a ese
+    contenido y el hash del gzip coincide; si no (por ejemplo, en medio de una
+    publicación) se comprime en memoria.
+    """
+    if not ruta.exists():
+        raise FileNotFoundError(f"No se encontró el artefacto {ruta}.")
+    estado = ruta.stat()
+    firma = (estado.st_mtime_ns, estado.st_size)
+    guardado = _CACHE.get(ruta)
+    if guardado is not None and guardado[0] == firma:
+        return guardado[1]
+
+    contenido = ruta.read_bytes()
+    etag = content_hash(contenido)
+    comprimido = None
+    huellas = _huellas(ruta)
+    if huellas is not None and huellas[0] == etag:
+        try:
+            candidato = gzip_path(ruta).read_bytes()
+        except FileNotFoundError:
+            candidato = None
+        if candidato is not None and content_hash(candidato) == huellas[1]:
+            comprimido = candidato
+    artefacto = Artifact(contenido, etag, comprimido)
+    _CACHE[ruta] = (firma, artefacto)
+    return artefacto
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """Interpreta ``Accept-Encoding`` y dice si el cliente acepta gzip."""
+    for parte in (accept_encoding or "").split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        if nombre.strip().lower() not in {"gzip", "*"}:
+            continue
+        calidad = parametros.strip()
+        if calidad.startswith("q="):
+            try:
+                return float(calidad[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Indica si ``If-None-Match`` contiene el ETag (en cualquier codificación)."""
+    for valor in (if_none_match or "").split(","):
+        valor = valor.strip()
+        if valor == "*":
+            return True
+        valor = valor.removeprefix("W/").strip('"')
+        if valor in {etag, f"{etag}-gz"}:
+            return True
+    return False
+
+
+def negotiate(
+    artefacto: Artifact,
+    accept_encoding: str | None,
+    if_none_match: str | None,
+) -> tuple[int, bytes, dict[str, str]]:
+    """Resuelve estado, cuerpo y cabeceras para servir un artefacto.
+
+    Devuelve 304 sin cuerpo si el cliente ya tiene la versión vigente; si no,
+    el contenido gzip o sin comprimir según ``Accept-Encoding``.
+    """
+    usar_gzip = accepts_gzip(accept_encoding)
+    etag = f"{artefacto.etag}-gz" if usar_gzip else artefacto.etag
+    cabeceras = {
+        "ETag": f'"{etag}"',
+        "Vary": "Accept-Encoding",
+        "Cache-Control": CACHE_CONTROL,
+    }
+    if etag_matches(if_none_match, artefacto.etag):
+        return 304, b"", cabeceras
+    if usar_gzip:
+        cabeceras["Content-Encoding"] = "gzip"
+        return 200, artefacto.gzip_content, cabeceras
+    return 200, artefacto.content, cabeceras
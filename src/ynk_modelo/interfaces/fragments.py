@@ -0,0 +1,75 @@
+"""Fragmentos de un reporte generado para insertarlos en ``report_wrapper.html``."""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+from ynk_modelo.interfaces.artifacts import load_artifact
+
+CONTAINER_TAG = '<div class="container">'
+BRAND_BAR_TAG = '<div class="brand-bar">'
+_DIV = re.compile(r"<div|</div>")
+
+# Fragmentos ya extraídos: ruta -> (ETag del artefacto, (contenido, scripts)).
+_FRAGMENTS: dict[Path, tuple[str, tuple[str, str]]] = {}
+
+
+def _cierres(html: str, inicio: int, fin: int):
+    """Posiciones (tras ``</div>``) donde la profundidad vuelve a cero desde ``inicio``."""
+    profundidad = 0
+    for marca in _DIV.finditer(html, inicio, fin):
+        profundidad += -1 if marca.group() == "</div>" else 1
+        if profundidad == 0:
+            yield marca.end()
+
+
+def split_report(html: str) -> tuple[str, str]:
+    """Separa el container principal y los scripts de un reporte generado.
+
+    El reporte tiene ``<body><div class="container">...</div><script>...</body>``;
+    el contenido llega hasta el último ``</div>`` que cierra el nivel del
+    container antes del primer ``<script>``. Sin container se devuelve el body
+    sin el brand-bar. Recorre el documento una sola vez.
+    """
+    container_start = html.find(CONTAINER_TAG)
+    body_end = html.rfind("</body>")
+    if container_start != -1:
+        script_start = html.find("<script>", container_start)
+        if script_start != -1:
+            cierre = None
+            for cierre in _cierres(html, container_start, script_start):
+                pass
+            contenido = html[container_start:cierre] if cierre else html[container_start:script_start].rstrip()
+        elif body_end != -1:
+            contenido = html[container_start:body_end].rstrip()
+        else:
+            contenido = html[container_start:]
+        scripts = html[script_start:body_end].rstrip() if script_start != -1 and body_end != -1 else ""
+        return contenido, scripts
+
+    body_start = html.find("<body>")
+    if body_start == -1:
+        return "", ""
+    if body_end == -1:
+        return html[body_start + 6 :], ""
+    contenido = html[body_start + 6 : body_end]
+    brand_bar_start = contenido.find(BRAND_BAR_TAG)
+    if brand_bar_start != -1:
+        brand_bar_end = next(_cierres(contenido, brand_bar_start, len(contenido)), None)
+        if brand_bar_end is not None:
+            contenido = contenido[:brand_bar_start] + contenido[brand_bar_end:]
+    return contenido, ""
+
+
+def report_fragments(ruta: Path) -> tuple[str, str]:
+    """Contenido y scripts de un reporte publicado, extraídos una vez por versión.
+
+    Lanza ``FileNotFoundError`` si el reporte no existe.
+    """
+    artefacto = load_artifact(ruta)
+    guardado = _FRAGMENTS.get(ruta)
+    if guardado is not None and guardado[0] == artefacto.etag:
+        return guardado[1]
+    fragmentos = split_report(artefacto.content.decode("utf-8"))
+    _FRAGMENTS[ruta] = (artefacto.etag, fragmentos)
+    return fragmentos
@@ -0,0 +1,238 @@
+"""Heatmap de margen EBITDA calculado en el servidor para el simulador."""
+from __future__ import annotations
+
+import json
+import math
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Mapping
+
+import numpy as np
+
+from ynk_modelo.domain.eerr import ebitda_margin_grid, heatmap_structure_arrays
+from ynk_modelo.interfaces.artifacts import ArtifactWriter, write_json
+from ynk_modelo.interfaces.store_payload import (
+    COMPACT_SEPARATORS,
+    load_store_payload,
+    payload_signature,
+)
+
+HEATMAP_ENDPOINT = "/api/simulator/heatmap"
+# Tope de niveles por eje, el mismo que usa ``buildRange`` en el simulador.
+MAX_LEVELS = 1000
+GRID_DECIMALS = 2
+
+# Ejes de un heatmap: (venta mín, venta máx, paso, niveles, margen mín, margen máx, paso, niveles).
+Axes = tuple[float, float, float, int | None, float, float, float, int | None]
+
+# Grillas ya calculadas: (ruta, firma, tienda, ejes) -> grilla serializable.
+_GRIDS: OrderedDict[tuple[object, ...], dict[str, object]] = OrderedDict()
+_GRIDS_MAX = 512
+
+_PARAMETROS = (
+    ("sales_min", float),
+    ("sales_max", float),
+    ("sales_step", float),
+    ("sales_levels", int),
+    ("margin_min", float),
+    ("margin_max", float),
+    ("margin_step", float),
+    ("margin_levels", int),
+)
+
+
+def heatmap_grids_path(output: Path) -> Path:
+    """Ruta del artefacto con las grillas por defecto precalculadas."""
+    return output.with_suffix(".heatmaps.json")
+
+
+def heatmap_axis(minimo: float, maximo: float, paso: float, niveles: int | None = None) -> np.ndarray:
+    """Valores de un eje del heatmap, equivalente a ``buildRange`` del simulador.
+
+    Con paso se avanza desde ``minimo`` (hasta ``niveles`` valores o hasta
+    pasar ``maximo``); sin paso se reparten ``niveles`` valores entre los
+    extremos. Todo valor queda acotado a ``[minimo, maximo]``.
+    """
+    if niveles is not None:
+        niveles = min(max(1, int(niveles)), MAX_LEVELS)
+    if math.isfinite(paso) and paso > 0:
+        if niveles is None:
+            niveles = min(int((maximo + paso / 10 - minimo) // paso) + 1, MAX_LEVELS)
+        valores = minimo + np.arange(max(niveles, 1)) * paso
+    elif niveles is not None and niveles > 1 and maximo > minimo:
+        valores = np.linspace(minimo, maximo, niveles)
+    else:
+        valores = np.array([minimo] + [maximo] * ((niveles or 1) - 1), dtype=float)
+    return np.clip(valores, minimo, max(minimo, maximo))
+
+
+def default_axes(rango: Mapping[str, object] | None) -> Axes:
+    """Ejes por defecto a partir de ``heatmap.range`` de la ficha EERR."""
+    rango = rango or {}
+    return (
+        float(rango.get("sales_min") or 5_000_000.0),
+        float(rango.get("sales_max") or 15_000_000.0),
+        float(rango.get("default_sale_step") or 500_000.0),
+        None,
+        float(rango.get("margin_min") or 0.25),
+        float(rango.get("margin_max") or 0.45),
+        float(rango.get("default_margin_step") or 0.01),
+        None,
+    )
+
+
+def axes_from_params(params: Mapping[str, str], rango: Mapping[str, object] | None = None) -> Axes:
+    """Ejes pedidos por query string; lo que falte se toma de los por defecto.
+
+    Los márgenes van como fracción (0.35 = 35 %). Lanza ``ValueError`` si un
+    parámetro no es numérico o pide más de ``MAX_LEVELS`` niveles.
+    """
+    ejes = list(default_axes(rango))
+    for posicion, (nombre, tipo) in enumerate(_PARAMETROS):
+        texto = params.get(nombre)
+        if texto in (None, ""):
+            continue
+        try:
+            valor = tipo(texto)
+        except ValueError:
+            raise ValueError(f"El parámetro {nombre} debe ser numérico.") from None
+        if tipo is float and not math.isfinite(valor):
+            raise ValueError(f"El parámetro {nombre} debe ser finito.")
+        if tipo is int and not 1 <= valor <= MAX_LEVELS:
+            raise ValueError(f"El parámetro {nombre} debe estar entre 1 y {MAX_LEVELS}.")
+        ejes[posicion] = valor
+    # Como en el simulador, el máximo crece para que quepan los niveles pedidos;
+    # el margen nunca supera el 100 %.
+    for inicio, nombre_max, tope in ((0, "sales_max", math.inf), (4, "margin_max", 1.0)):
+        minimo, maximo, paso, niveles = ejes[inicio : inicio + 4]
+        if niveles is not None and params.get(nombre_max) in (None, "") and paso > 0:
+            ejes[inicio + 1] = min(max(maximo, minimo + paso * (niveles - 1)), max(tope, minimo))
+    return tuple(ejes)  # type: ignore[return-value]
+
+
+def _grilla(ventas: np.ndarray, margenes: np.ndarray, valores: np.ndarray) -> dict[str, object]:
+    return {
+        "sales": ventas.round(0).tolist(),
+        "margins": margenes.round(6).tolist(),
+        "ebitda_margin": np.round(valores, GRID_DECIMALS).tolist(),
+    }
+
+
+def _guardar(clave: tuple[object, ...], grilla: dict[str, object]) -> dict[str, object]:
+    _GRIDS[clave] = grilla
+    _GRIDS.move_to_end(clave)
+    while len(_GRIDS) > _GRIDS_MAX:
+        _GRIDS.popitem(last=False)
+    return grilla
+
+
+def stores_heatmap(
+    ruta: Path,
+    tiendas: Iterable[str] | None = None,
+    params: Mapping[str, str] | None = None,
+) -> dict[str, dict[str, object]]:
+    """Grillas de margen EBITDA por tienda a partir de ``heatmap.structure``.
+
+    Con ejes explícitos en ``params`` todas las tiendas comparten ejes y se
+    calculan en una sola operación vectorizada; sin ellos cada tienda usa su
+    rango por defecto. Cada grilla queda en caché por tienda, ejes y versión
+    del artefacto.
+    """
+    payload = load_store_payload(ruta)
+    firma = payload_signature(ruta)
+    pedidas = [t for t in dict.fromkeys(tiendas if tiendas is not None else payload) if t in payload]
+    params = params or {}
+    explicitos = any(params.get(nombre) not in (None, "") for nombre, _ in _PARAMETROS)
+    if explicitos:
+        # Valida los parámetros aunque ninguna tienda pedida exista.
+        axes_from_params(params)
+
+    resultado: dict[str, dict[str, object]] = {}
+    pendientes: dict[Axes, list[str]] = {}
+    for tienda in pedidas:
+        heatmap = payload[tienda].get("heatmap") or {}
+        ejes = axes_from_params(params, None if explicitos else heatmap.get("range"))
+        clave = (ruta, firma, tienda, ejes)
+        if clave in _GRIDS:
+            _GRIDS.move_to_end(clave)
+            resultado[tienda] = _GRIDS[clave]
+        else:
+            pendientes.setdefault(ejes, []).append(tienda)
+
+    for ejes, grupo in pendientes.items():
+        ventas = heatmap_axis(*ejes[:4])
+        margenes = heatmap_axis(*ejes[4:])
+        estructura = heatmap_structure_arrays(
+            (payload[tienda].get("heatmap") or {}).get("structure") for tienda in grupo
+        )
+        valores = ebitda_margin_grid(estructura, ventas, margenes)
+        for indice, tienda in enumerate(grupo):
+            resultado[tienda] = _guardar(
+                (ruta, firma, tienda, ejes), _grilla(ventas, margenes, valores[indice])
+            )
+    return {tienda: resultado[tienda] for tienda in pedidas}
+
+
+def structure_heatmap(
+    estructura: Mapping[str, object],
+    ventas: Iterable[float],
+    margenes: Iterable[float],
+) -> dict[str, object]:
+    """Grilla para una estructura arbitraria (el escenario editado en el simulador).
+
+    Se guarda en caché por el contenido de la estructura y los ejes.
+    """
+    ventas_arr = np.asarray(list(ventas), dtype=float)
+    margenes_arr = np.asarray(list(margenes), dtype=float)
+    if not 0 < len(ventas_arr) <= MAX_LEVELS or not 0 < len(margenes_arr) <= MAX_LEVELS:
+        raise ValueError(f"Cada eje debe tener entre 1 y {MAX_LEVELS} valores.")
+    if not (np.isfinite(ventas_arr).all() and np.isfinite(margenes_arr).all()):
+        raise ValueError("Los ejes del heatmap deben ser numéricos y finitos.")
+    campos = heatmap_structure_arrays([dict(estructura)])
+    clave = (
+        "estructura",
+        tuple(float(campos[nombre][0, 0, 0]) for nombre in sorted(campos)),
+        ventas_arr.tobytes(),
+        margenes_arr.tobytes(),
+    )
+    if clave in _GRIDS:
+        _GRIDS.move_to_end(clave)
+        return _GRIDS[clave]
+    valores = ebitda_margin_grid(campos, ventas_arr, margenes_arr)[0]
+    return _guardar(clave, _grilla(ventas_arr, margenes_arr, valores))
+
+
+def write_heatmap_grids(output: Path, store_data: Mapping[str, Mapping[str, object]]) -> Path:
+    """Precalcula en la generación la grilla por defecto de cada tienda."""
+    grillas: dict[str, dict[str, object]] = {}
+    for tienda, datos in store_data.items():
+        heatmap = datos.get("heatmap") or {}
+        ejes = default_axes(heatmap.get("range"))
+        ventas = heatmap_axis(*ejes[:4])
+        margenes = heatmap_axis(*ejes[4:])
+        valores = ebitda_margin_grid(
+            heatmap_structure_arrays([heatmap.get("structure")]), ventas, margenes
+        )
+        grillas[tienda] = _grilla(ventas, margenes, valores[0])
+    ruta = heatmap_grids_path(output)
+    with ArtifactWriter(ruta) as destino:
+        write_json(grillas, destino, COMPACT_SEPARATORS)
+    return ruta
+
+
+def parse_structure_request(cuerpo: bytes) -> tuple[dict[str, object], list[float], list[float]]:
+    """Valida el cuerpo ``{"structure", "sales", "margins"}`` de una grilla a pedido."""
+    try:
+        datos = json.loads(cuerpo or b"{}")
+    except ValueError:
+        raise ValueError("El cuerpo debe ser JSON.") from None
+    if not isinstance(datos, dict) or not isinstance(datos.get("structure"), dict):
+        raise ValueError("Falta la estructura de costos del heatmap.")
+    ventas = datos.get("sales")
+    margenes = datos.get("margins")
+    if not isinstance(ventas, list) or not isinstance(margenes, list):
+        raise ValueError("Faltan los ejes de venta y margen del heatmap.")
+    try:
+        return datos["structure"], [float(v) for v in ventas], [float(m) for m in margenes]
+    except (TypeError, ValueError):
+        raise ValueError("Los ejes del heatmap deben ser numéricos y finitos.") from None
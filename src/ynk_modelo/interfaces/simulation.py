@@ -0,0 +1,315 @@
+"""Simulación por lotes del simulador: ajustes para muchas tiendas y meses a la vez."""
+from __future__ import annotations
+
+import json
+import math
+from pathlib import Path
+from typing import Mapping
+
+import numpy as np
+
+from ynk_modelo.domain.simulation import (
+    rent_factor_for_month,
+    simulate_ebitda,
+    staff_aggregates,
+    uf_for_month,
+)
+from ynk_modelo.interfaces.artifacts import ArtifactWriter, write_json
+from ynk_modelo.interfaces.store_payload import (
+    COMPACT_SEPARATORS,
+    decode_simulator_store,
+    load_json_artifact,
+    load_store_payload,
+    store_payload_path,
+)
+
+SIMULATION_ENDPOINT = "/api/simulator/simulate"
+# Ajustes aceptados: variación % de venta, venta y margen (%) fijados por mes,
+# dotación por rol y parámetros de arriendo.
+ADJUSTMENT_KEYS = ("deflators", "sales", "margins", "staff", "rent")
+MAX_STORES = 1000
+BASELINE_DECIMALS = 2
+
+
+def simulation_context_path(output: Path) -> Path:
+    """Ruta de los parámetros comunes de la simulación asociados al simulador."""
+    return output.with_suffix(".context.json")
+
+
+def simulation_context(
+    role_costs: Mapping[str, Mapping[str, float]],
+    total_sales_commissions: list[str],
+    excluded_roles: list[str],
+    default_uf: float,
+) -> dict[str, object]:
+    """Parámetros comunes a todas las tiendas que necesita la simulación."""
+    return {
+        "role_costs": role_costs,
+        "total_sales_commissions": total_sales_commissions,
+        "excluded_roles": excluded_roles,
+        "default_uf": default_uf,
+    }
+
+
+def write_simulation_context(output: Path, contexto: Mapping[str, object]) -> Path:
+    """Publica los costos por rol y la UF por defecto que usa el simulador."""
+    ruta = simulation_context_path(output)
+    with ArtifactWriter(ruta) as destino:
+        write_json(contexto, destino, COMPACT_SEPARATORS)
+    return ruta
+
+
+def load_simulation_context(output: Path) -> dict[str, object]:
+    """Lee los parámetros comunes de la simulación escritos en la generación."""
+    ruta = simulation_context_path(output)
+    if not ruta.exists():
+        raise FileNotFoundError(f"No se encontró el contexto de simulación en {ruta}.")
+    return load_json_artifact(ruta)
+
+
+def _finito(valor: object) -> float | None:
+    if isinstance(valor, bool) or valor is None:
+        return None
+    try:
+        numero = float(valor)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return None
+    return numero if math.isfinite(numero) else None
+
+
+def _ajuste(valor: object, nombre: str) -> dict[str, dict[str, object]]:
+    if valor is None:
+        valor = {}
+    if not isinstance(valor, Mapping):
+        raise ValueError(f"Los ajustes de {nombre} deben ser un objeto.")
+    ajuste: dict[str, dict[str, object]] = {}
+    for clave in ADJUSTMENT_KEYS:
+        contenido = valor.get(clave) or {}
+        if not isinstance(contenido, Mapping):
+            raise ValueError(f"El ajuste '{clave}' de {nombre} debe ser un objeto.")
+        ajuste[clave] = dict(contenido)
+    return ajuste
+
+
+def parse_simulation_request(cuerpo: bytes) -> dict[str, object]:
+    """Valida el cuerpo JSON de una simulación por lotes.
+
+    Forma esperada::
+
+        {"stores": ["A", "B"] | {"A": {ajustes}}, "banner": "...",
+         "year": "2026", "months": ["2026-01"], "adjustments": {ajustes}}
+
+    donde ``ajustes`` admite ``deflators``, ``sales`` y ``margins`` por mes,
+    ``staff`` por rol y ``rent`` con los campos de arriendo a reemplazar.
+    """
+    try:
+        peticion = json.loads(cuerpo or b"{}")
+    except ValueError:
+        raise ValueError("El cuerpo debe ser JSON.") from None
+    if not isinstance(peticion, dict):
+        raise ValueError("El cuerpo debe ser un objeto JSON.")
+
+    tiendas = peticion.get("stores") or {}
+    if isinstance(tiendas, list):
+        tiendas = {str(tienda): {} for tienda in tiendas}
+    if not isinstance(tiendas, Mapping):
+        raise ValueError("'stores' debe ser una lista o un objeto por tienda.")
+    if not tiendas and not peticion.get("banner"):
+        raise ValueError("Indica 'stores' o 'banner' para simular.")
+    if len(tiendas) > MAX_STORES:
+        raise ValueError(f"Se pueden simular hasta {MAX_STORES} tiendas por petición.")
+    meses = peticion.get("months")
+    if meses is not None and not isinstance(meses, list):
+        raise ValueError("'months' debe ser una lista de meses YYYY-MM.")
+    return {
+        "stores": {str(tienda): _ajuste(ajuste, str(tienda)) for tienda, ajuste in tiendas.items()},
+        "banner": peticion.get("banner"),
+        "year": str(peticion["year"]) if peticion.get("year") else None,
+        "months": [str(mes) for mes in meses] if meses is not None else None,
+        "adjustments": _ajuste(peticion.get("adjustments"), "la petición"),
+    }
+
+
+def _totales(venta: np.ndarray, ebitda: np.ndarray, con_datos: np.ndarray) -> dict[str, float]:
+    """Totales como ``computeYearTotals``: solo meses con datos y venta positiva."""
+    incluidos = con_datos & (venta > 0)
+    total_venta = float(venta[incluidos].sum())
+    total_ebitda = float(ebitda[incluidos].sum())
+    if not incluidos.any() or total_venta == 0:
+        return {"sales": 0.0, "ebitda": 0.0, "ebitda_margin": 0.0, "months": 0}
+    return {
+        "sales": total_venta,
+        "ebitda": total_ebitda,
+        "ebitda_margin": total_ebitda / total_venta * 100,
+        "months": int(incluidos.sum()),
+    }
+
+
+def _filas(
+    config: Mapping[str, object],
+    ajuste: Mapping[str, Mapping[str, object]],
+    contexto: Mapping[str, object],
+    meses: list[str],
+) -> list[tuple[float, ...]]:
+    """Entradas de ``simulate_ebitda`` (más la marca de datos) para cada mes de una tienda."""
+    arriendo = {**config["rent"], **ajuste["rent"]}
+    fijo, vendedores, tasa_sumada, tasa_total = staff_aggregates(
+        {**(config.get("staff") or {}), **ajuste["staff"]},
+        contexto["role_costs"],
+        contexto["total_sales_commissions"],
+        contexto["excluded_roles"],
+    )
+    ventas, margenes = config["sales"], config["margins"]
+    filas = []
+    for mes in meses:
+        venta = max(_finito(ventas.get(mes)) or 0.0, 0.0)
+        margen = max(_finito(margenes.get(mes)) or 0.0, 0.0)
+        fijada = _finito(ajuste["sales"].get(mes))
+        if fijada is not None:
+            venta = max(fijada, 0.0)
+        variacion = _finito(ajuste["deflators"].get(mes))
+        if variacion is not None:
+            venta *= 1 + variacion / 100
+        margen_fijado = _finito(ajuste["margins"].get(mes))
+        if margen_fijado is not None:
+            margen = max(margen_fijado, 0.0)
+        uf = uf_for_month(arriendo.get("uf_values") or {}, arriendo.get("uf_value"), contexto["default_uf"], mes)
+        filas.append(
+            (
+                venta, margen, fijo, vendedores, tasa_sumada, tasa_total,
+                (_finito(arriendo.get("vmm_uf")) or 0.0) * uf * rent_factor_for_month(arriendo.get("factor"), mes),
+                _finito(arriendo.get("percent")) or 0.0,
+                _finito(arriendo.get("fondo_promocion")) or 0.0,
+                _finito(arriendo.get("ggcc")) or 0.0,
+                _finito(config.get("network_systems_cost")) or 0.0,
+                _finito(config.get("payment_commission_rate")) or 0.0,
+                _finito(config.get("others_rate")) or 0.0,
+                ventas.get(mes) is not None or margenes.get(mes) is not None or fijada is not None,
+            )
+        )
+    return filas
+
+
+def simulate_stores(
+    configs: Mapping[str, Mapping[str, object]],
+    ajustes: Mapping[str, Mapping[str, Mapping[str, object]]],
+    contexto: Mapping[str, object],
+    meses: list[str] | None = None,
+    anio: str | None = None,
+) -> dict[str, tuple[list[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+    """Simula todas las tiendas y meses pedidos en una sola pasada vectorizada.
+
+    ``configs`` son configuraciones ya decodificadas (``decode_simulator_store``).
+    Devuelve por tienda ``(meses, venta, ebitda, margen_ebitda, con_datos)``.
+    """
+    filas: list[tuple[float, ...]] = []
+    tramos: list[tuple[str, list[str]]] = []
+    for tienda, ajuste in ajustes.items():
+        config = configs[tienda]
+        meses_tienda = meses or list(config.get("months") or [])
+        if anio:
+            meses_tienda = [mes for mes in meses_tienda if mes.startswith(f"{anio}-")]
+        tramos.append((tienda, meses_tienda))
+        filas.extend(_filas(config, ajuste, contexto, meses_tienda))
+
+    columnas = np.asarray(filas, dtype=float).reshape(len(filas), 14).T
+    venta, ebitda, margen_ebitda = simulate_ebitda(*columnas[:13])
+    con_datos = columnas[13].astype(bool)
+
+    resultado = {}
+    inicio = 0
+    for tienda, meses_tienda in tramos:
+        fin = inicio + len(meses_tienda)
+        tramo = slice(inicio, fin)
+        resultado[tienda] = (meses_tienda, venta[tramo], ebitda[tramo], margen_ebitda[tramo], con_datos[tramo])
+        inicio = fin
+    return resultado
+
+
+def run_simulation(output: Path, peticion: Mapping[str, object]) -> dict[str, object]:
+    """Evalúa los ajustes pedidos para cada tienda y mes en una pasada vectorizada.
+
+    Los ajustes de ``adjustments`` aplican a todas las tiendas (las de
+    ``banner`` incluidas) y los de cada tienda en ``stores`` los complementan.
+    ``sales`` reemplaza la venta base del mes antes de aplicar ``deflators``.
+    """
+    payload = load_store_payload(store_payload_path(output))
+    contexto = load_simulation_context(output)
+    por_tienda: dict[str, dict[str, dict[str, object]]] = dict(peticion["stores"])
+    banner = peticion.get("banner")
+    if banner:
+        for tienda, ficha in payload.items():
+            if ficha.get("banner") == banner:
+                por_tienda.setdefault(tienda, _ajuste(None, tienda))
+    faltantes = [tienda for tienda in por_tienda if tienda not in payload]
+    comun: dict[str, dict[str, object]] = peticion["adjustments"]
+    ajustes = {
+        tienda: {clave: {**comun[clave], **propio[clave]} for clave in ADJUSTMENT_KEYS}
+        for tienda, propio in por_tienda.items()
+        if tienda in payload
+    }
+    configs = {tienda: decode_simulator_store(payload[tienda]) for tienda in ajustes}
+    simulado = simulate_stores(configs, ajustes, contexto, peticion.get("months"), peticion.get("year"))
+
+    resultados: dict[str, object] = {}
+    for tienda, (meses, venta, ebitda, margen_ebitda, con_datos) in simulado.items():
+        resultados[tienda] = {
+            "months": meses,
+            "sales": venta.tolist(),
+            "ebitda": ebitda.tolist(),
+            "ebitda_margin": margen_ebitda.tolist(),
+            "totals": _totales(venta, ebitda, con_datos),
+        }
+    partes = list(simulado.values())
+    return {
+        "stores": resultados,
+        "totals": _totales(
+            np.concatenate([parte[1] for parte in partes] or [np.zeros(0)]),
+            np.concatenate([parte[2] for parte in partes] or [np.zeros(0)]),
+            np.concatenate([parte[4] for parte in partes] or [np.zeros(0, dtype=bool)]),
+        ),
+        "missing": faltantes,
+    }
+
+
+def simulator_baselines(
+    configs: Mapping[str, Mapping[str, object]],
+    contexto: Mapping[str, object],
+) -> tuple[dict[str, list[float]], dict[str, dict[str, dict[str, object]]]]:
+    """Línea base sin ajustes del simulador, calculada una vez en la generación.
+
+    Devuelve el EBITDA base de cada tienda alineado a sus ``months`` y, por
+    banner y año, las tiendas con su aporte (venta y EBITDA de los meses con
+    venta) y el total del banner, con la misma regla que ``computeYearTotals``.
+    """
+    simulado = simulate_stores(configs, {tienda: _ajuste(None, tienda) for tienda in configs}, contexto)
+    series: dict[str, list[float]] = {}
+    aportes: dict[str, dict[str, dict[str, list[float]]]] = {}
+    for tienda, (meses, venta, ebitda, _margen, _con_datos) in simulado.items():
+        series[tienda] = np.round(ebitda, BASELINE_DECIMALS).tolist()
+        por_anio = aportes.setdefault(str(configs[tienda].get("banner")), {})
+        for mes, venta_mes, ebitda_mes in zip(meses, venta.tolist(), series[tienda]):
+            if venta_mes <= 0:
+                continue
+            aporte = por_anio.setdefault(mes[:4], {}).setdefault(tienda, [0.0, 0.0])
+            aporte[0] += venta_mes
+            aporte[1] += ebitda_mes
+
+    banners: dict[str, dict[str, dict[str, object]]] = {}
+    for banner, por_anio in sorted(aportes.items()):
+        for anio, por_tienda in sorted(por_anio.items()):
+            tiendas = sorted(por_tienda)
+            ventas = [round(por_tienda[t][0], BASELINE_DECIMALS) for t in tiendas]
+            ebitdas = [round(por_tienda[t][1], BASELINE_DECIMALS) for t in tiendas]
+            total_venta, total_ebitda = sum(ventas), sum(ebitdas)
+            banners.setdefault(banner, {})[anio] = {
+                "stores": tiendas,
+                "sales": ventas,
+                "ebitda": ebitdas,
+                "totals": {
+                    "sales": total_venta,
+                    "ebitda": total_ebitda,
+                    "ebitda_margin": total_ebitda / total_venta * 100,
+                },
+            }
+    return series, banners
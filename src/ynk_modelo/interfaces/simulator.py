@@ -6,8 +6,32 @@ from pathlib import Path
 
 import pandas as pd
 
-from ynk_modelo.config import DEFAULT_CONTAINER_WIDTH, METRIC_CONFIG, SIMULATOR_TEMPLATE
-from ynk_modelo.io.excel import load_network_costs, load_payment_commission, load_sales
+from ynk_modelo.config import (
+    DEFAULT_CONTAINER_WIDTH,
+    LAZY_STORE_DATA,
+    METRIC_CONFIG,
+    SIMULATOR_TEMPLATE,
+)
+from ynk_modelo.domain.network import network_cost_by_store
+from ynk_modelo.interfaces.artifacts import ArtifactWriter
+from ynk_modelo.interfaces.heatmap import HEATMAP_ENDPOINT
+from ynk_modelo.interfaces.simulation import (
+    simulation_context,
+    simulator_baselines,
+    write_simulation_context,
+)
+from ynk_modelo.interfaces.store_payload import (
+    PAYLOAD_FORMAT,
+    SIMULATOR_CHANGES_ENDPOINT,
+    SIMULATOR_STORES_ENDPOINT,
+    available_years,
+    encode_simulator_store,
+    decode_simulator_store,
+    store_index,
+    write_store_payload,
+)
+from ynk_modelo.interfaces.template import write_template
+from ynk_modelo.io.excel import load_payment_commission, load_sales
 
 
 def build_simulator_interface(
@@ -20,18 +44,21 @@ def build_simulator_interface(
     uf_por_mes: dict[str, float],
     uf_vigente: float,
     output: Path,
+    politica_redes: str | None = None,
+    lazy: bool | None = None,
 ) -> None:
-    """Actualiza el Simulador de EERR inyectando los datos calculados."""
+    """Actualiza el Simulador de EERR inyectando los datos calculados.
 
-    # Calculate network costs and payment commission rates
-    network_params = load_network_costs()
+    La configuración por tienda se escribe en un artefacto JSON junto al HTML;
+    con ``lazy`` (por defecto ``LAZY_STORE_DATA``) la página la pide a
+    ``/api/simulator/stores/<tienda>`` en vez de incluirla completa.
+    """
+    if lazy is None:
+        lazy = LAZY_STORE_DATA
+
+    # Costo de redes por tienda y comisiones de medio de pago
     payment_data = load_payment_commission()
-    ventas = load_sales()
-    
-    # Use stores that actually had sales, not all stores in dictionary
-    stores_with_sales = set(ventas["Sucursal"].unique()) if not ventas.empty else set()
-    num_stores = len(stores_with_sales) if stores_with_sales else 1  # Avoid division by zero
-    network_cost_per_store = (network_params["gasto_mensual"] * network_params["pct_retail"]) / num_stores
+    network_costs = network_cost_by_store(load_sales(), store_data.keys(), politica_redes)
     
     # Create payment commission lookup by banner
     payment_commission_lookup = {}
@@ -119,11 +146,28 @@ def build_simulator_interface(
                 "factor": float(fila.get("Arriendo_factor", 1.0) or 1.0),
             },
             "others_rate": float(fila.get("Total otros costos", 0.0) or 0.0),
-            "network_systems_cost": float(network_cost_per_store),
+            "network_systems_cost": float(network_costs.get(store_key, 0.0)),
             "payment_commission_rate": float(payment_commission_rate),
         }
 
-    store_config_json = json.dumps(store_config, ensure_ascii=False)
+    fichas = {tienda: encode_simulator_store(config) for tienda, config in store_config.items()}
+    # La línea base se calcula sobre las fichas ya cuantizadas, igual que la
+    # recalcularía el navegador, y viaja con cada ficha.
+    contexto = simulation_context(
+        role_costs, total_sales_commissions, excluded_roles, float(uf_vigente or 0.0)
+    )
+    linea_base, banner_baselines = simulator_baselines(
+        {tienda: decode_simulator_store(ficha) for tienda, ficha in fichas.items()}, contexto
+    )
+    for tienda, serie in linea_base.items():
+        fichas[tienda]["baseline"] = serie
+    version = write_store_payload(output, fichas)
+    write_simulation_context(output, contexto)
+    store_config_value: object = "{}" if lazy else fichas
+    store_config_url_json = json.dumps(SIMULATOR_STORES_ENDPOINT if lazy else None)
+    store_changes_url_json = json.dumps(SIMULATOR_CHANGES_ENDPOINT if lazy else None)
+    store_index_json = json.dumps(store_index(store_config), ensure_ascii=False)
+    store_years_json = json.dumps(available_years(store_config)["all"])
     default_uf_json = json.dumps(float(uf_vigente or 0.0))
     default_width_json = json.dumps(str(int(DEFAULT_CONTAINER_WIDTH)))
 
@@ -132,10 +176,18 @@ def build_simulator_interface(
             f"No se encontró la plantilla del simulador en {SIMULATOR_TEMPLATE}."
         )
 
-    template = SIMULATOR_TEMPLATE.read_text(encoding="utf-8")
+    # Los str se insertan tal cual; el resto se serializa como JSON al escribir.
     replacements = {
         "__METRIC_CONFIG__": metric_config_json,
-        "__STORE_CONFIG__": store_config_json,
+        "__PAYLOAD_FORMAT__": str(PAYLOAD_FORMAT),
+        "__STORE_CONFIG_URL__": store_config_url_json,
+        "__STORE_CONFIG__": store_config_value,
+        "__STORE_CHANGES_URL__": store_changes_url_json,
+        "__HEATMAP_URL__": json.dumps(HEATMAP_ENDPOINT if lazy else None),
+        "__STORE_VERSION__": json.dumps(version),
+        "__STORE_INDEX__": store_index_json,
+        "__STORE_YEARS__": store_years_json,
+        "__BANNER_BASELINES__": json.dumps(banner_baselines, ensure_ascii=False),
         "__ROLE_COSTS__": role_costs_json,
         "__STAFF_ROLES__": staff_roles_json,
         "__COMMISSION_ROLES__": json.dumps(
@@ -156,8 +208,5 @@ def build_simulator_interface(
         "__DEFAULT_CONTAINER_WIDTH__": default_width_json,
     }
 
-    rendered = template
-    for marker, value in replacements.items():
-        rendered = rendered.replace(marker, str(value))
-
-    output.write_text(rendered, encoding="utf-8")
+    with ArtifactWriter(output) as destino:
+        write_template(SIMULATOR_TEMPLATE, replacements, destino)
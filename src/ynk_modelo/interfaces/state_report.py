@@ -3,30 +3,137 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
+from typing import TextIO
 
+import numpy as np
 import pandas as pd
 
 from ynk_modelo.config import (
     BUDGET_SCENARIO,
     EERR_TEMPLATE,
+    LAZY_STORE_DATA,
     METRIC_CONFIG,
     REAL_SCENARIO,
     ROLE_MAP,
 )
 from ynk_modelo.domain.eerr import (
     build_store_base,
+    componer_tabla,
+    etiquetas_mes,
     formatear_tabla,
+    formatear_valores,
     variable_rent_threshold,
+    variable_rent_thresholds,
 )
+from ynk_modelo.interfaces.artifacts import ArtifactWriter
+from ynk_modelo.interfaces.heatmap import write_heatmap_grids
+from ynk_modelo.interfaces.store_payload import (
+    EERR_CHANGES_ENDPOINT,
+    EERR_STORES_ENDPOINT,
+    PAYLOAD_FORMAT,
+    available_years,
+    encode_banner_summary,
+    encode_eerr_store,
+    store_index,
+    write_store_payload,
+)
+from ynk_modelo.interfaces.template import write_template
+
+def _orden_por_tienda(eerr: pd.DataFrame) -> tuple[list[tuple[object, object]], np.ndarray, np.ndarray]:
+    """Filas del EERR agrupadas por (Sucursal, Banner) y ordenadas por mes.
+
+    Devuelve las claves de cada grupo, las posiciones de las filas y los
+    límites de cada grupo dentro de esas posiciones.
+    """
+    grupos = eerr.groupby(["Sucursal", "Banner"], dropna=False, sort=True)
+    codigos = grupos.ngroup().to_numpy()
+    claves = list(grupos.size().index)
+    limites = np.concatenate([[0], np.cumsum(np.bincount(codigos, minlength=len(claves)))])
+
+    meses = eerr["Mes"].to_numpy()
+    filas = np.argsort(codigos, kind="stable")
+    for inicio, fin in zip(limites[:-1], limites[1:]):
+        segmento = filas[inicio:fin]
+        # Se replica el doble ``sort_values("Mes")`` (quicksort) del armado
+        # original: define qué fila prevalece cuando un mes viene duplicado.
+        for _ in range(2):
+            segmento = segmento[np.argsort(meses[segmento], kind="quicksort")]
+        filas[inicio:fin] = segmento
+    return claves, filas, limites
+
+
+def _ultima_de_cada_corrida(clave: np.ndarray) -> np.ndarray:
+    """Marca la última fila de cada tramo consecutivo con la misma clave."""
+    return np.append(clave[1:] != clave[:-1], True) if len(clave) else np.zeros(0, dtype=bool)
+
+
+def _con_nulos(valores: np.ndarray) -> np.ndarray:
+    """Convierte a floats de Python con ``None`` en lugar de NaN (listo para JSON)."""
+    objetos = valores.astype(object)
+    objetos[np.isnan(valores)] = None
+    return objetos
+
+
+def _rangos_heatmap(fila_base: dict[str, object]) -> dict[str, float]:
+    """Rangos de venta y margen por defecto para el heatmap de una sucursal."""
+    venta_min = float(fila_base.get("Venta_min", 0.0))
+    venta_max = float(fila_base.get("Venta_max", 0.0))
+    venta_prom = float(fila_base.get("Venta_promedio", 0.0))
+    if venta_max <= 0 and venta_prom > 0:
+        venta_min = max(0.0, venta_prom * 0.7)
+        venta_max = venta_prom * 1.3
+    if venta_max <= 0:
+        venta_min, venta_max = 5_000_000.0, 15_000_000.0
+    if abs(venta_max - venta_min) < 1e-6:
+        delta = max(venta_min * 0.25, 500_000.0)
+        venta_min = max(0.0, venta_min - delta)
+        venta_max = venta_max + delta
+
+    venta_min = max(0.0, venta_min * 0.80)
+    if venta_max < venta_min:
+        venta_max = venta_min + max(venta_min * 0.25, 500_000.0)
+
+    margen_min = fila_base.get("Margen_min", float("nan"))
+    margen_max = fila_base.get("Margen_max", float("nan"))
+    if pd.isna(margen_min) or pd.isna(margen_max):
+        margen_min = 0.25
+        margen_max = 0.45
+    margen_min = float(margen_min)
+    margen_max = float(margen_max)
+    if margen_max < margen_min:
+        margen_min, margen_max = margen_max, margen_min
+    padding = 0.05
+    margen_min = max(0.0, margen_min - padding)
+    margen_max = min(0.9, margen_max + padding)
+    if margen_max - margen_min <= 0.005:
+        margen_min = max(0.0, margen_min - 0.05)
+        margen_max = min(0.9, margen_min + 0.30)
+
+    rango_venta = max(venta_max - venta_min, 1_000_000.0)
+    return {
+        "sales_min": venta_min,
+        "sales_max": venta_max,
+        "margin_min": margen_min,
+        "margin_max": margen_max,
+        "default_sale_step": max(500_000.0, rango_venta / 12),
+        "default_margin_step": 0.01,
+    }
+
 
 def _prepare_store_data(
     eerr: pd.DataFrame,
 ) -> tuple[dict[str, dict[str, object]], dict[str, list[str]], dict[str, dict[str, object]]]:
-    """Agrupa la información del EERR por sucursal y banner para la interfaz web."""
+    """Agrupa la información del EERR por sucursal y banner para la interfaz web.
+
+    Las filas se ordenan una vez por (Sucursal, Banner, Mes) y los valores por
+    mes salen de la última fila de cada tramo (sucursal, mes), igual que al
+    recorrer fila a fila; los diccionarios se arman desde listas ya convertidas.
+    """
     metric_ids = [clave for clave, _, _ in METRIC_CONFIG]
     data: dict[str, dict[str, object]] = {}
     base, _, uf_por_mes, uf_vigente = build_store_base()
-    base_idx = base.set_index("Sucursal", drop=False)
+    base_unica = base.drop_duplicates("Sucursal").set_index("Sucursal", drop=False)
+    registros_base = base_unica.to_dict("index")
     banner_map: dict[str, list[str]] = {}
     banner_summary: dict[str, dict[str, object]] = {}
 
@@ -38,94 +145,120 @@ def _prepare_store_data(
             continue
         uf_por_mes_map[clave_ts] = float(valor)
 
-    def obtener_uf_mes(fecha: pd.Timestamp | None) -> float:
-        if fecha is None:
-            return uf_vigente
-        fecha_ts = pd.to_datetime(fecha)
-        return uf_por_mes_map.get(fecha_ts, uf_vigente)
-
     if eerr.empty:
         return data, banner_map, banner_summary
 
-    for (sucursal, banner), grupo in eerr.groupby(["Sucursal", "Banner"], dropna=False):
-        grupo = grupo.sort_values("Mes")
-        valores = {metric: {} for metric in metric_ids}
-        scenario_values: dict[str, dict[str, dict[str, float | None]]]
-        scenario_values = {
-            REAL_SCENARIO: {metric: {} for metric in metric_ids},
-            BUDGET_SCENARIO: {metric: {} for metric in metric_ids},
-        }
-        ebitda_por_mes: dict[str, float] = {}
-        meses: list[str] = []
-        vistos: set[str] = set()
-        month_types: dict[str, str] = {}
-
-        for _, fila in grupo.sort_values("Mes").iterrows():
-            mes_clave = fila["Mes"].strftime("%Y-%m")
-            es_presupuesto = bool(fila.get("Es_presupuesto"))
-            etiqueta_mes = BUDGET_SCENARIO if es_presupuesto else REAL_SCENARIO
-            if mes_clave not in vistos:
-                meses.append(mes_clave)
-                vistos.add(mes_clave)
-                month_types[mes_clave] = etiqueta_mes
-            elif month_types.get(mes_clave) != REAL_SCENARIO and not es_presupuesto:
-                month_types[mes_clave] = REAL_SCENARIO
-
-            scenario_key = BUDGET_SCENARIO if es_presupuesto else REAL_SCENARIO
-
-            for metric in metric_ids:
-                valor = fila.get(metric)
-                if pd.isna(valor):
-                    valores[metric][mes_clave] = None
-                    scenario_values[scenario_key][metric][mes_clave] = None
-                else:
-                    valores[metric][mes_clave] = float(valor)
-                    scenario_values[scenario_key][metric][mes_clave] = float(valor)
-            valor_ebitda = fila.get("EBITDA")
-            ebitda_por_mes[mes_clave] = 0.0 if pd.isna(valor_ebitda) else float(valor_ebitda)
+    claves, filas, limites = _orden_por_tienda(eerr)
+    grupo_fila = np.repeat(np.arange(len(claves)), np.diff(limites))
+
+    # Meses como períodos (año * 12 + mes), igual que la clave "YYYY-MM".
+    mes_dt = pd.DatetimeIndex(eerr["Mes"].to_numpy()[filas])
+    periodos_unicos, mes_cod = np.unique(mes_dt.year * 12 + (mes_dt.month - 1), return_inverse=True)
+    anios, numeros = np.divmod(periodos_unicos, 12)
+    meses_inicio = pd.to_datetime({"year": anios, "month": numeros + 1, "day": 1})
+    etiquetas = np.asarray(etiquetas_mes(pd.DatetimeIndex(meses_inicio)), dtype=object)
+    uf_meses = np.array([uf_por_mes_map.get(ts, uf_vigente) for ts in meses_inicio], dtype=float)
+    es_diciembre = numeros + 1 == 12
+
+    presupuesto = eerr["Es_presupuesto"].to_numpy()[filas].astype(bool)
+    matriz = eerr[metric_ids].to_numpy(dtype=float, na_value=np.nan)[filas]
+    clave = grupo_fila * len(periodos_unicos) + mes_cod
+
+    # Tramos (sucursal, mes) con todas las filas: valores, EBITDA y tipo de mes.
+    ultima = _ultima_de_cada_corrida(clave)
+    tramo = np.cumsum(np.append(True, clave[1:] != clave[:-1])) - 1
+    tramo_grupo = grupo_fila[ultima]
+    tramo_mes = mes_cod[ultima]
+    tramo_valores = _con_nulos(matriz[ultima]).tolist()
+    ebitda = matriz[ultima, metric_ids.index("EBITDA")]
+    tramo_ebitda = np.where(np.isnan(ebitda), 0.0, ebitda)
+    tramo_real = np.bincount(tramo, weights=(~presupuesto).astype(float)) > 0
+    cortes = np.searchsorted(tramo_grupo, np.arange(len(claves) + 1))
+
+    # Los mismos tramos, pero solo con las filas de cada escenario.
+    por_escenario = {}
+    for escenario, es_pres in ((REAL_SCENARIO, False), (BUDGET_SCENARIO, True)):
+        seleccion = presupuesto == es_pres
+        ultima_esc = _ultima_de_cada_corrida(clave[seleccion])
+        grupo_esc = grupo_fila[seleccion][ultima_esc]
+        por_escenario[escenario] = (
+            etiquetas[mes_cod[seleccion][ultima_esc]].tolist(),
+            _con_nulos(matriz[seleccion][ultima_esc]).tolist(),
+            np.searchsorted(grupo_esc, np.arange(len(claves) + 1)),
+        )
+
+    # Umbral de arriendo variable por (sucursal, mes), todo de una vez.
+    sucursales = [str(sucursal) for sucursal, _ in claves]
+    en_base = np.array([sucursal in registros_base for sucursal in sucursales], dtype=bool)
+    atributos = base_unica.reindex(sucursales)
+    factor_base = atributos["Arriendo_factor"].replace(0.0, 1.0).to_numpy(dtype=float)
+    vmm_uf = atributos["Arriendo_vmm_uf"].to_numpy(dtype=float)
+    porcentual = atributos["Arriendo_porcentual"].to_numpy(dtype=float)
+    factor_mes = np.where(es_diciembre[tramo_mes], factor_base[tramo_grupo], 1.0)
+    umbral_mes = variable_rent_thresholds(vmm_uf[tramo_grupo] * uf_meses[tramo_mes] * factor_mes, porcentual[tramo_grupo])
+    umbral_mes_json = _con_nulos(umbral_mes).tolist()
+    uf_tramo = uf_meses[tramo_mes].tolist()
+    con_factor = (factor_mes > 1) & ~np.isnan(umbral_mes)
+
+    for indice, (sucursal, banner) in enumerate(claves):
+        inicio, fin = cortes[indice], cortes[indice + 1]
+        meses = etiquetas[tramo_mes[inicio:fin]].tolist()
+        columnas = list(zip(*tramo_valores[inicio:fin])) if fin > inicio else [()] * len(metric_ids)
+        valores = {metric: dict(zip(meses, columna)) for metric, columna in zip(metric_ids, columnas)}
+
+        scenario_values: dict[str, dict[str, dict[str, float | None]]] = {}
+        for escenario, (meses_esc, valores_esc, cortes_esc) in por_escenario.items():
+            desde, hasta = cortes_esc[indice], cortes_esc[indice + 1]
+            meses_sel = meses_esc[desde:hasta]
+            columnas_esc = list(zip(*valores_esc[desde:hasta])) if hasta > desde else [()] * len(metric_ids)
+            scenario_values[escenario] = {
+                metric: dict(zip(meses_sel, columna)) for metric, columna in zip(metric_ids, columnas_esc)
+            }
+
+        month_types = dict(
+            zip(meses, np.where(tramo_real[inicio:fin], REAL_SCENARIO, BUDGET_SCENARIO).tolist())
+        )
+        ebitda_por_mes = dict(zip(meses, tramo_ebitda[inicio:fin].tolist()))
 
         estructura: dict[str, float] | None = None
         rangos: dict[str, float] | None = None
-        umbral_variable: float | None = None
-        arriendo_vmm_uf = float('nan')
-        arriendo_porcentual = float('nan')
-        factor_base = 1.0
+        arriendo_vmm_uf = float("nan")
+        arriendo_porcentual = float("nan")
+        factor = 1.0
         threshold_normal: float | None = None
         threshold_referencia: float | None = None
         thresholds_por_mes: dict[str, float | None] = {}
         uf_por_mes_detalle: dict[str, float] = {}
-        referencia_dt: pd.Timestamp | None = None
+        referencia: str | None = None
         threshold_con_factor: float | None = None
-        if str(sucursal) in base_idx.index:
-            fila_base = base_idx.loc[str(sucursal)]
-            if isinstance(fila_base, pd.DataFrame):
-                fila_base = fila_base.iloc[0]
-
-            meses_dt = [pd.to_datetime(mes) for mes in meses]
-            referencia_dt = max(meses_dt) if meses_dt else None
-            uf_referencia = obtener_uf_mes(referencia_dt)
-            factor_base = float(fila_base.get("Arriendo_factor", 1.0) or 1.0)
-            factor_aplicado_ref = factor_base if (referencia_dt is not None and referencia_dt.month == 12) else 1.0
-            arriendo_minimo_base = float(fila_base.get("Arriendo_vmm_uf", 0.0)) * uf_referencia
-            arriendo_minimo = arriendo_minimo_base * factor_aplicado_ref
+        fondo_promocion = 0.0
+        dotacion_total = 0.0
+        dotacion_detalle: dict[str, object] = {}
+        if en_base[indice]:
+            fila_base = registros_base[sucursales[indice]]
+            referencia = meses[-1] if meses else None
+            uf_referencia = uf_tramo[fin - 1] if fin > inicio else uf_vigente
+            factor = float(fila_base.get("Arriendo_factor", 1.0) or 1.0)
+            factor_aplicado_ref = factor if (referencia is not None and referencia.endswith("-12")) else 1.0
             arriendo_vmm_uf = float(fila_base.get("Arriendo_vmm_uf", 0.0))
             arriendo_porcentual = float(fila_base.get("Arriendo_porcentual", 0.0))
+            arriendo_minimo_base = arriendo_vmm_uf * uf_referencia
+            fondo_promocion = float(fila_base.get("Arriendo_fondo_promocion_pct", 0.0))
             dotacion_total = float(fila_base.get("Dotacion_total", 0.0))
             dotacion_detalle = fila_base.get("Dotacion_detalle", {})
             if not isinstance(dotacion_detalle, dict):
                 dotacion_detalle = {}
             vendedores = float(fila_base.get("Vendedores_comision", 0.0))
             tasa_sumada = float(fila_base.get("Tasa_comision_sumada", 0.0))
-            tasa_por_vendedor = tasa_sumada / vendedores if vendedores > 0 else 0.0
 
             estructura = {
                 "dotacion_fijo": float(fila_base.get("Costo_dotacion_fijo", 0.0)),
-                "tasa_por_vendedor": tasa_por_vendedor,
+                "tasa_por_vendedor": tasa_sumada / vendedores if vendedores > 0 else 0.0,
                 "tasa_total_ventas": float(fila_base.get("Tasa_total_ventas", 0.0)),
                 "otros_costos_rate": float(fila_base.get("Total otros costos", 0.0)),
-                "arriendo_minimo": arriendo_minimo,
+                "arriendo_minimo": arriendo_minimo_base * factor_aplicado_ref,
                 "arriendo_porcentual": arriendo_porcentual,
-                "fondo_promocion_pct": float(fila_base.get("Arriendo_fondo_promocion_pct", 0.0)),
+                "fondo_promocion_pct": fondo_promocion,
                 "arriendo_ggcc": float(fila_base.get("Arriendo_GGCC", 0.0)),
             }
             threshold_normal = variable_rent_threshold(arriendo_minimo_base, arriendo_porcentual)
@@ -133,68 +266,14 @@ def _prepare_store_data(
                 estructura["arriendo_minimo"],
                 estructura["arriendo_porcentual"],
             )
-            umbral_variable = threshold_referencia if threshold_referencia is not None else threshold_normal
-
-            thresholds_por_mes = {}
-            uf_por_mes_detalle = {}
-            threshold_con_factor = None
-            for mes_dt in meses_dt:
-                uf_mes = obtener_uf_mes(mes_dt)
-                clave_mes = mes_dt.strftime("%Y-%m")
-                uf_por_mes_detalle[clave_mes] = uf_mes
-                factor_mes = factor_base if mes_dt.month == 12 else 1.0
-                arriendo_minimo_mes = arriendo_vmm_uf * uf_mes * factor_mes
-                threshold_mes = variable_rent_threshold(arriendo_minimo_mes, arriendo_porcentual)
-                thresholds_por_mes[clave_mes] = threshold_mes
-                if factor_mes > 1 and threshold_mes is not None:
-                    threshold_con_factor = threshold_mes
-
-            venta_min = float(fila_base.get("Venta_min", 0.0))
-            venta_max = float(fila_base.get("Venta_max", 0.0))
-            venta_prom = float(fila_base.get("Venta_promedio", 0.0))
-            if venta_max <= 0 and venta_prom > 0:
-                venta_min = max(0.0, venta_prom * 0.7)
-                venta_max = venta_prom * 1.3
-            if venta_max <= 0:
-                venta_min, venta_max = 5_000_000.0, 15_000_000.0
-            if abs(venta_max - venta_min) < 1e-6:
-                delta = max(venta_min * 0.25, 500_000.0)
-                venta_min = max(0.0, venta_min - delta)
-                venta_max = venta_max + delta
-
-            venta_min = max(0.0, venta_min * 0.80)
-            if venta_max < venta_min:
-                venta_max = venta_min + max(venta_min * 0.25, 500_000.0)
-
-            margen_min = fila_base.get("Margen_min", float("nan"))
-            margen_max = fila_base.get("Margen_max", float("nan"))
-            if pd.isna(margen_min) or pd.isna(margen_max):
-                margen_min = 0.25
-                margen_max = 0.45
-            margen_min = float(margen_min)
-            margen_max = float(margen_max)
-            if margen_max < margen_min:
-                margen_min, margen_max = margen_max, margen_min
-            padding = 0.05
-            margen_min = max(0.0, margen_min - padding)
-            margen_max = min(0.9, margen_max + padding)
-            if margen_max - margen_min <= 0.005:
-                margen_min = max(0.0, margen_min - 0.05)
-                margen_max = min(0.9, margen_min + 0.30)
-
-            rango_venta = max(venta_max - venta_min, 1_000_000.0)
-            default_delta_venta = max(500_000.0, rango_venta / 12)
-            default_delta_margen = 0.01
-
-            rangos = {
-                "sales_min": venta_min,
-                "sales_max": venta_max,
-                "margin_min": margen_min,
-                "margin_max": margen_max,
-                "default_sale_step": default_delta_venta,
-                "default_margin_step": default_delta_margen,
-            }
-
+            thresholds_por_mes = dict(zip(meses, umbral_mes_json[inicio:fin]))
+            uf_por_mes_detalle = dict(zip(meses, uf_tramo[inicio:fin]))
+            marcados = np.flatnonzero(con_factor[inicio:fin])
+            if len(marcados):
+                threshold_con_factor = float(umbral_mes[inicio + marcados[-1]])
+            rangos = _rangos_heatmap(fila_base)
+
+        umbral = threshold_referencia if threshold_referencia is not None else threshold_normal
         sucursal_key = str(sucursal)
         banner_key = str(banner) if pd.notna(banner) else "Sin banner"
 
@@ -207,31 +286,23 @@ def _prepare_store_data(
             "heatmap": {
                 "structure": estructura,
                 "range": rangos,
-                "rent_threshold": (
-                    threshold_referencia
-                    if threshold_referencia is not None
-                    else threshold_normal if threshold_normal is not None else umbral_variable
-                ),
+                "rent_threshold": umbral,
             },
             "ebitda": ebitda_por_mes,
             "rent_details": {
-                "threshold_clp": (
-                    threshold_referencia
-                    if threshold_referencia is not None
-                    else threshold_normal
-                ),
+                "threshold_clp": umbral,
                 "threshold_peak_clp": (
                     threshold_con_factor
-                    if threshold_con_factor is not None and factor_base > 1.0
+                    if threshold_con_factor is not None and factor > 1.0
                     else None
                 ),
-                "peak_factor": factor_base if factor_base > 1.0 and threshold_con_factor is not None else None,
+                "peak_factor": factor if factor > 1.0 and threshold_con_factor is not None else None,
                 "vmm_uf": arriendo_vmm_uf,
                 "percent": arriendo_porcentual,
-                "fondo_promocion": float(fila_base.get("Arriendo_fondo_promocion_pct", 0.0)),
+                "fondo_promocion": fondo_promocion,
                 "dotacion_total": dotacion_total,
                 "dotacion_detalle": dotacion_detalle,
-                "default_month": referencia_dt.strftime("%Y-%m") if referencia_dt is not None else None,
+                "default_month": referencia,
                 "thresholds_by_month": thresholds_por_mes,
                 "uf_by_month": uf_por_mes_detalle,
             },
@@ -243,7 +314,7 @@ def _prepare_store_data(
             {"months": set(), "stores": {}, "types": {}},
         )
         resumen_banner["stores"][sucursal_key] = ebitda_por_mes
-        resumen_banner["months"].update(ebitda_por_mes.keys())
+        resumen_banner["months"].update(meses)
         tipos_banner = resumen_banner["types"]
         for mes_clave, escenario_mes in month_types.items():
             if escenario_mes == REAL_SCENARIO:
@@ -273,32 +344,58 @@ def _prepare_store_data(
 
     return data, banner_map, banner_summary_final
 
+def _resumen_con_margenes(
+    banner_summary: dict[str, dict[str, object]],
+    store_data: dict[str, dict[str, object]],
+) -> dict[str, dict[str, object]]:
+    """Agrega al resumen por banner el Margen_EBITDA mensual de cada tienda.
+
+    Así el modo porcentual del resumen no necesita la ficha completa de cada tienda.
+    """
+    resumen: dict[str, dict[str, object]] = {}
+    for banner, info in banner_summary.items():
+        margenes = {}
+        for tienda in info.get("stores", {}):
+            valores = store_data.get(tienda, {}).get("values", {})
+            margenes[tienda] = valores.get("Margen_EBITDA", {})
+        resumen[banner] = {**info, "margins": margenes}
+    return resumen
+
+
 def build_html_interface(
     eerr: pd.DataFrame,
     output: Path,
     store_data: dict[str, dict[str, object]] | None = None,
     banner_map: dict[str, list[str]] | None = None,
     banner_summary: dict[str, dict[str, object]] | None = None,
+    lazy: bool | None = None,
 ) -> tuple[
     dict[str, dict[str, object]],
     dict[str, list[str]],
     dict[str, dict[str, object]],
 ]:
-    """Genera un archivo HTML con la interfaz para explorar los resultados."""
-    metric_config_json = json.dumps(
-        [
-            {"id": clave, "label": etiqueta, "format": formato}
-            for clave, etiqueta, formato in METRIC_CONFIG
-        ],
-        ensure_ascii=False,
-    )
+    """Genera un archivo HTML con la interfaz para explorar los resultados.
+
+    Las fichas por tienda se escriben además en un artefacto JSON junto al HTML.
+    Con ``lazy`` (por defecto ``LAZY_STORE_DATA``) la página solo incluye el
+    índice de tiendas y pide cada ficha a ``/api/eerr/stores/<tienda>``.
+    """
+    if lazy is None:
+        lazy = LAZY_STORE_DATA
+    metric_config = [
+        {"id": clave, "label": etiqueta, "format": formato}
+        for clave, etiqueta, formato in METRIC_CONFIG
+    ]
     if store_data is None or banner_map is None or banner_summary is None:
         store_data, banner_map, banner_summary = _prepare_store_data(eerr)
-    store_data_json = json.dumps(store_data, ensure_ascii=False)
-    banner_map_json = json.dumps(banner_map, ensure_ascii=False)
-    banner_summary_json = json.dumps(banner_summary, ensure_ascii=False)
+    fichas = {tienda: encode_eerr_store(datos) for tienda, datos in store_data.items()}
+    version = write_store_payload(output, fichas)
+    write_heatmap_grids(output, store_data)
+    resumen = {
+        banner: encode_banner_summary(info)
+        for banner, info in _resumen_con_margenes(banner_summary, store_data).items()
+    }
     staff_roles = sorted(set(ROLE_MAP.values()))
-    staff_roles_json = json.dumps(staff_roles, ensure_ascii=False)
 
     template_path = EERR_TEMPLATE
     if not template_path.exists():
@@ -306,20 +403,24 @@ def build_html_interface(
             f"No se encontró la plantilla de EERR en {template_path}."
         )
 
-    template = template_path.read_text(encoding="utf-8")
+    # Los str se insertan tal cual; el resto se serializa como JSON al escribir.
     replacements = {
-        "__METRIC_CONFIG__": metric_config_json,
-        "__STORE_DATA__": store_data_json,
-        "__BANNER_MAP__": banner_map_json,
-        "__BANNER_SUMMARY__": banner_summary_json,
-        "__STAFF_ROLES__": staff_roles_json,
+        "__METRIC_CONFIG__": metric_config,
+        "__PAYLOAD_FORMAT__": PAYLOAD_FORMAT,
+        "__STORE_DATA_URL__": json.dumps(EERR_STORES_ENDPOINT if lazy else None),
+        "__STORE_DATA__": "{}" if lazy else fichas,
+        "__STORE_CHANGES_URL__": json.dumps(EERR_CHANGES_ENDPOINT if lazy else None),
+        "__STORE_VERSION__": json.dumps(version),
+        "__STORE_INDEX__": store_index(store_data),
+        "__STORE_YEARS__": available_years(store_data),
+        "__BANNER_MAP__": banner_map,
+        "__BANNER_SUMMARY__": resumen,
+        "__STAFF_ROLES__": staff_roles,
         "__SCENARIO_REAL__": REAL_SCENARIO,
         "__SCENARIO_BUDGET__": BUDGET_SCENARIO,
     }
-    for marker, value in replacements.items():
-        template = template.replace(marker, str(value))
-
-    output.write_text(template, encoding="utf-8")
+    with ArtifactWriter(output) as destino:
+        write_template(template_path, replacements, destino)
     return store_data, banner_map, banner_summary
 
 def mostrar_selector(eerr: pd.DataFrame) -> None:
@@ -349,11 +450,44 @@ def mostrar_selector(eerr: pd.DataFrame) -> None:
 
     mostrar_eerr_sucursal(eerr, seleccion)
 
+CONSOLE_METRICS = {
+    "Venta": "Venta",
+    "Costo_de_venta": "Costo de venta",
+    "Contribucion": "Contribución",
+    "Margen_contribucion": "Margen contribución (%)",
+    "Arriendo_fijo": "Arriendo fijo",
+    "Arriendo_variable": "Arriendo variable",
+    "Arriendo_fondo_promocion": "Arriendo fondo promoción",
+    "Arriendo_GGCC": "Arriendo GGCC",
+    "Arriendo_total": "Arriendo total",
+    "Remuneraciones_fijo": "Remuneraciones fijo",
+    "Remuneraciones_comisiones": "Remuneraciones comisiones",
+    "Remuneraciones_total": "Remuneraciones total",
+    "Otros_costos": "Otros costos",
+    "Gastos_operacionales": "Gastos operacionales",
+    "EBITDA": "EBITDA",
+    "Margen_EBITDA": "Margen EBITDA (%)",
+}
+
+
+def _vista_consola(valores: np.ndarray, meses: pd.Series) -> pd.DataFrame:
+    """Arma la tabla Cuenta x Mes que se imprime en consola."""
+    return pd.DataFrame(
+        valores.T,
+        index=pd.Index(list(CONSOLE_METRICS.values()), name="Cuenta"),
+        columns=etiquetas_mes(pd.DatetimeIndex(meses)).tolist(),
+    )
+
+
+def _bloque_sucursal(sucursal: str, tabla: str) -> str:
+    return f"\nEERR mensual para: {sucursal}\n\n{tabla}\n"
+
+
 def mostrar_eerr_sucursal(eerr: pd.DataFrame, sucursal: str) -> None:
     """Imprime el EERR mensual de la sucursal indicada."""
     detalle = (
         eerr[eerr["Sucursal"] == sucursal]
-        .sort_values("Mes")
+        .sort_values("Mes", kind="stable")
         .reset_index(drop=True)
     )
 
@@ -361,53 +495,37 @@ def mostrar_eerr_sucursal(eerr: pd.DataFrame, sucursal: str) -> None:
         print(f"No se encontró información para '{sucursal}'.")
         return
 
-    columnas_metricas = [
-        "Venta",
-        "Costo_de_venta",
-        "Contribucion",
-        "Margen_contribucion",
-        "Arriendo_fijo",
-        "Arriendo_variable",
-        "Arriendo_fondo_promocion",
-        "Arriendo_GGCC",
-        "Arriendo_total",
-        "Remuneraciones_fijo",
-        "Remuneraciones_comisiones",
-        "Remuneraciones_total",
-        "Otros_costos",
-        "Gastos_operacionales",
-        "EBITDA",
-        "Margen_EBITDA",
-    ]
-
-    vista = (
-        detalle.set_index("Mes")[columnas_metricas]
-        .sort_index()
-        .T
-    )
-    vista.columns = [col.strftime("%Y-%m") for col in vista.columns]
-    vista.index.name = "Cuenta"
-    vista = vista.rename(
-        index={
-            "Venta": "Venta",
-            "Costo_de_venta": "Costo de venta",
-            "Contribucion": "Contribución",
-            "Margen_contribucion": "Margen contribución (%)",
-            "Arriendo_fijo": "Arriendo fijo",
-            "Arriendo_variable": "Arriendo variable",
-            "Arriendo_fondo_promocion": "Arriendo fondo promoción",
-            "Arriendo_GGCC": "Arriendo GGCC",
-            "Arriendo_total": "Arriendo total",
-            "Remuneraciones_fijo": "Remuneraciones fijo",
-            "Remuneraciones_comisiones": "Remuneraciones comisiones",
-            "Remuneraciones_total": "Remuneraciones total",
-            "Otros_costos": "Otros costos",
-            "Gastos_operacionales": "Gastos operacionales",
-            "EBITDA": "EBITDA",
-            "Margen_EBITDA": "Margen EBITDA (%)",
-        }
-    )
-
-    print(f"\nEERR mensual para: {sucursal}")
-    print("")
-    print(formatear_tabla(vista))
+    valores = detalle[list(CONSOLE_METRICS)].to_numpy(dtype=float, na_value=np.nan)
+    tabla = formatear_tabla(_vista_consola(valores, detalle["Mes"]))
+    print(_bloque_sucursal(sucursal, tabla), end="")
+
+
+def volcar_eerr_todas(eerr: pd.DataFrame, destino: TextIO) -> int:
+    """Escribe el EERR de todas las sucursales en ``destino``, una tras otra.
+
+    El EERR se ordena una sola vez por (Sucursal, Mes) y los cortes por
+    sucursal se obtienen con ``searchsorted``; cada bloque se escribe apenas se
+    formatea, sin acumular el volcado completo en memoria. Devuelve la cantidad
+    de sucursales escritas.
+    """
+    ordenado = eerr.dropna(subset=["Sucursal"]).sort_values(["Sucursal", "Mes"], kind="stable")
+    if ordenado.empty:
+        return 0
+
+    sucursales = ordenado["Sucursal"].to_numpy()
+    nombres = pd.unique(sucursales)
+    inicios = np.searchsorted(sucursales, nombres, side="left")
+    fines = np.searchsorted(sucursales, nombres, side="right")
+
+    # Todas las celdas y etiquetas de mes se formatean de una vez; por sucursal
+    # solo se corta el bloque y se alinea.
+    cuentas = list(CONSOLE_METRICS.values())
+    porcentaje = np.char.startswith(np.char.lower(np.array(cuentas)), "margen")
+    valores = ordenado[list(CONSOLE_METRICS)].to_numpy(dtype=float, na_value=np.nan)
+    celdas = formatear_valores(valores, porcentaje)
+    meses = etiquetas_mes(pd.DatetimeIndex(ordenado["Mes"]))
+
+    for nombre, inicio, fin in zip(nombres, inicios, fines):
+        tabla = componer_tabla(["Cuenta", *meses[inicio:fin]], cuentas, celdas[inicio:fin].T)
+        destino.write(_bloque_sucursal(str(nombre), tabla))
+    return len(nombres)
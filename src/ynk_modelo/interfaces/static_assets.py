@@ -0,0 +1,109 @@
+"""Archivos estáticos con huella de contenido para cachearlos por un año.
+
+Al iniciar se calcula el hash de cada archivo de ``static/``; las plantillas
+piden ``css/simulador.css`` y obtienen ``css/simulador.<huella>.css``. Como la
+URL cambia con el contenido, el navegador puede guardarla como inmutable y las
+visitas siguientes no vuelven a pedir los estáticos.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from pathlib import Path
+
+from ynk_modelo.interfaces.artifacts import content_hash
+
+FINGERPRINT_LENGTH = 12
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+_CON_HUELLA = re.compile(rf"^(?P<base>.+)\.(?P<huella>[0-9a-f]{{{FINGERPRINT_LENGTH}}})(?P<ext>\.[^./]+)$")
+
+
+def fingerprint_name(filename: str, huella: str) -> str:
+    """Inserta la huella antes de la extensión: ``css/a.css`` -> ``css/a.<huella>.css``."""
+    ruta = Path(filename)
+    nombre = f"{ruta.stem}.{huella}{ruta.suffix}"
+    return nombre if ruta.parent == Path(".") else f"{ruta.parent.as_posix()}/{nombre}"
+
+
+class StaticAssets:
+    """Manifiesto ``archivo -> huella`` de un directorio de estáticos.
+
+    Con ``verificar_cambios`` (ambiente local) cada consulta revisa la fecha de
+    los archivos conocidos y recalcula la huella de los que cambiaron. Si nadie
+    llamó a ``build``, la primera consulta arma el manifiesto.
+    """
+
+    def __init__(self, directorio: Path, verificar_cambios: bool = False):
+        self.directorio = directorio
+        self.verificar_cambios = verificar_cambios
+        self._lock = threading.Lock()
+        # archivo relativo -> ((mtime_ns, tamaño), huella)
+        self._entradas: dict[str, tuple[tuple[int, int], str]] = {}
+        self._version = ""
+        self._construido = False
+
+    def build(self) -> int:
+        """Calcula la huella de todos los archivos; devuelve cuántos hay."""
+        entradas = {}
+        if self.directorio.is_dir():
+            for ruta in sorted(self.directorio.rglob("*")):
+                if ruta.is_file():
+                    entradas[ruta.relative_to(self.directorio).as_posix()] = self._huella(ruta)
+        with self._lock:
+            self._entradas = entradas
+            self._version = self._calcular_version()
+            self._construido = True
+        return len(entradas)
+
+    def _asegurar(self) -> None:
+        if not self._construido:
+            self.build()
+
+    def _huella(self, ruta: Path) -> tuple[tuple[int, int], str]:
+        estado = ruta.stat()
+        return (estado.st_mtime_ns, estado.st_size), content_hash(ruta.read_bytes())[:FINGERPRINT_LENGTH]
+
+    def _calcular_version(self) -> str:
+        return content_hash("|".join(f"{k}:{v[1]}" for k, v in sorted(self._entradas.items())).encode())
+
+    def _refrescar(self) -> None:
+        cambios = {}
+        for archivo, (firma, _) in list(self._entradas.items()):
+            try:
+                estado = (self.directorio / archivo).stat()
+            except FileNotFoundError:
+                continue
+            if (estado.st_mtime_ns, estado.st_size) != firma:
+                cambios[archivo] = self._huella(self.directorio / archivo)
+        if cambios:
+            with self._lock:
+                self._entradas.update(cambios)
+                self._version = self._calcular_version()
+
+    @property
+    def version(self) -> str:
+        """Hash del manifiesto; cambia cuando cambia cualquier archivo."""
+        self._asegurar()
+        if self.verificar_cambios:
+            self._refrescar()
+        return self._version
+
+    def fingerprinted(self, filename: str) -> str:
+        """Nombre con huella de ``filename``, o el mismo si no está en el manifiesto."""
+        self._asegurar()
+        if self.verificar_cambios:
+            self._refrescar()
+        entrada = self._entradas.get(filename)
+        return fingerprint_name(filename, entrada[1]) if entrada else filename
+
+    def resolve(self, filename: str) -> tuple[str, bool]:
+        """Archivo real de una URL y si su huella es la vigente (cacheable como inmutable)."""
+        self._asegurar()
+        if filename in self._entradas:
+            return filename, False
+        coincidencia = _CON_HUELLA.match(filename)
+        if coincidencia is None:
+            return filename, False
+        original = coincidencia["base"] + coincidencia["ext"]
+        entrada = self._entradas.get(original)
+        return original, entrada is not None and entrada[1] == coincidencia["huella"]
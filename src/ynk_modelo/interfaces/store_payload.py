@@ -0,0 +1,377 @@
+"""Artefactos de datos por tienda servidos bajo demanda a las interfaces HTML."""
+from __future__ import annotations
+
+import json
+import math
+from pathlib import Path
+from typing import Iterable, Mapping
+
+from ynk_modelo.config import BUDGET_SCENARIO, METRIC_CONFIG, REAL_SCENARIO
+from ynk_modelo.interfaces.artifacts import (
+    Artifact,
+    ArtifactWriter,
+    content_hash,
+    json_artifact,
+    write_json,
+)
+from ynk_modelo.utils.logger import get_logger
+
+logger = get_logger()
+
+EERR_STORES_ENDPOINT = "/api/eerr/stores"
+SIMULATOR_STORES_ENDPOINT = "/api/simulator/stores"
+EERR_CHANGES_ENDPOINT = "/api/eerr/changes"
+SIMULATOR_CHANGES_ENDPOINT = "/api/simulator/changes"
+
+# Versiones anteriores que recuerda el manifiesto para responder deltas.
+MANIFEST_HISTORY = 20
+
+# Formato columnar de las fichas: eje de meses por tienda, una serie por
+# métrica alineada a ese eje, null como centinela y montos en pesos enteros.
+PAYLOAD_FORMAT = 2
+SCENARIO_CODES = (REAL_SCENARIO, BUDGET_SCENARIO)
+PERCENT_DECIMALS = 4
+UF_DECIMALS = 2
+COMPACT_SEPARATORS = (",", ":")
+
+# Caché en memoria de los artefactos leídos: ruta -> ((mtime_ns, tamaño), datos).
+_CACHE: dict[Path, tuple[tuple[int, int], dict[str, object]]] = {}
+# Fichas ya serializadas por artefacto: ruta -> (firma, {tienda: artefacto}).
+_FICHAS: dict[Path, tuple[tuple[int, int], dict[str, Artifact]]] = {}
+
+
+def store_payload_path(output: Path) -> Path:
+    """Ruta del artefacto con los datos por tienda asociado a un HTML generado."""
+    return output.with_suffix(".stores.json")
+
+
+def store_manifest_path(output: Path) -> Path:
+    """Ruta del manifiesto de versiones asociado a un HTML generado."""
+    return output.with_suffix(".manifest.json")
+
+
+def _texto(datos: object) -> str:
+    return json.dumps(datos, ensure_ascii=False, separators=COMPACT_SEPARATORS)
+
+
+def chunk_hash(ficha: object) -> str:
+    """Hash de contenido de una ficha; coincide con el ETag con que se sirve."""
+    return content_hash(_texto(ficha).encode("utf-8"))
+
+
+def write_store_payload(output: Path, payload: dict[str, dict[str, object]]) -> str:
+    """Escribe junto al HTML el artefacto ``{tienda: datos}`` y devuelve su versión.
+
+    Se escribe tienda por tienda y se publica de forma atómica con su variante
+    gzip y su ETag; el ETag del artefacto es la versión que se registra en el
+    manifiesto junto al hash de cada ficha.
+    """
+    ruta = store_payload_path(output)
+    escritor = ArtifactWriter(ruta)
+    with escritor as destino:
+        write_json(payload, destino, COMPACT_SEPARATORS)
+    hashes = {tienda: chunk_hash(ficha) for tienda, ficha in payload.items()}
+    _write_manifest(output, escritor.etag, hashes)
+    return escritor.etag
+
+
+def _write_manifest(output: Path, version: str, hashes: dict[str, str]) -> None:
+    """Publica el manifiesto con la versión vigente y las anteriores recientes."""
+    ruta = store_manifest_path(output)
+    historial: list[dict[str, object]] = []
+    try:
+        anterior = load_json_artifact(ruta)
+    except (FileNotFoundError, ValueError) as exc:
+        if ruta.exists():
+            logger.warning(f"Manifiesto ilegible en {ruta}, se reinicia el historial: {exc}")
+    else:
+        historial = list(anterior.get("history") or [])
+        if anterior.get("version") != version:
+            historial.insert(0, {"version": anterior.get("version"), "stores": anterior.get("stores")})
+    manifiesto = {
+        "version": version,
+        "stores": hashes,
+        "history": historial[:MANIFEST_HISTORY],
+    }
+    with ArtifactWriter(ruta) as destino:
+        write_json(manifiesto, destino, COMPACT_SEPARATORS)
+
+
+def load_json_artifact(ruta: Path) -> dict[str, object]:
+    """Lee un artefacto JSON, reutilizando la copia en memoria si no cambió.
+
+    La vigencia se valida con el ``mtime`` y el tamaño del archivo, de modo que
+    una regeneración de reportes invalida la caché sin coordinación adicional.
+    """
+    estado = ruta.stat()
+    firma = (estado.st_mtime_ns, estado.st_size)
+    guardado = _CACHE.get(ruta)
+    if guardado is not None and guardado[0] == firma:
+        return guardado[1]
+    datos = json.loads(ruta.read_text(encoding="utf-8"))
+    _CACHE[ruta] = (firma, datos)
+    return datos
+
+
+def load_store_payload(ruta: Path) -> dict[str, dict[str, object]]:
+    """Lee el artefacto por tienda, reutilizando la copia en memoria si no cambió."""
+    if not ruta.exists():
+        raise FileNotFoundError(f"No se encontró el artefacto de datos por tienda en {ruta}.")
+    return load_json_artifact(ruta)
+
+
+def payload_signature(ruta: Path) -> tuple[int, int]:
+    """Firma ``(mtime_ns, tamaño)`` de la versión vigente del artefacto por tienda."""
+    load_store_payload(ruta)
+    return _CACHE[ruta][0]
+
+
+def load_store_manifest(output: Path) -> dict[str, object]:
+    """Lee el manifiesto de versiones de las fichas de un HTML generado."""
+    ruta = store_manifest_path(output)
+    if not ruta.exists():
+        raise FileNotFoundError(f"No se encontró el manifiesto de datos por tienda en {ruta}.")
+    return load_json_artifact(ruta)
+
+
+def store_changes(
+    output: Path,
+    desde: str | None,
+    tiendas: Iterable[str] | None = None,
+) -> dict[str, object]:
+    """Fichas que cambiaron desde la versión ``desde`` que tiene el cliente.
+
+    Compara los hashes de la versión vigente con los de ``desde`` según el
+    manifiesto. Si la versión no se conoce (o ya salió del historial) responde
+    ``full`` con todas las fichas pedidas. ``tiendas`` limita la respuesta a
+    las fichas que el cliente ya cargó.
+    """
+    manifiesto = load_store_manifest(output)
+    payload = load_store_payload(store_payload_path(output))
+    actuales: dict[str, str] = manifiesto["stores"]
+    anteriores: dict[str, str] | None = None
+    if desde == manifiesto["version"]:
+        anteriores = actuales
+    else:
+        for entrada in manifiesto.get("history") or []:
+            if entrada.get("version") == desde:
+                anteriores = entrada.get("stores") or {}
+                break
+
+    pedidas = list(dict.fromkeys(tiendas)) if tiendas is not None else None
+    candidatas = pedidas if pedidas is not None else list(actuales)
+    cambiadas = {
+        tienda: payload[tienda]
+        for tienda in candidatas
+        if tienda in actuales
+        and tienda in payload
+        and (anteriores is None or anteriores.get(tienda) != actuales[tienda])
+    }
+    if anteriores is None:
+        eliminadas = [tienda for tienda in (pedidas or []) if tienda not in actuales]
+    else:
+        eliminadas = [
+            tienda
+            for tienda in (pedidas if pedidas is not None else anteriores)
+            if tienda in anteriores and tienda not in actuales
+        ]
+    return {
+        "version": manifiesto["version"],
+        "full": anteriores is None,
+        "changed": cambiadas,
+        "removed": eliminadas,
+    }
+
+
+def store_artifact(ruta: Path, tienda: str) -> Artifact | None:
+    """Ficha de una tienda serializada una sola vez por versión del artefacto."""
+    payload = load_store_payload(ruta)
+    firma = payload_signature(ruta)
+    guardado = _FICHAS.get(ruta)
+    if guardado is None or guardado[0] != firma:
+        guardado = (firma, {})
+        _FICHAS[ruta] = guardado
+    fichas = guardado[1]
+    if tienda not in payload:
+        return None
+    if tienda not in fichas:
+        fichas[tienda] = json_artifact(payload[tienda])
+    return fichas[tienda]
+
+
+def stores_artifact(ruta: Path, tiendas: Iterable[str]) -> Artifact:
+    """Lote de fichas ``{tienda: datos}`` serializado para una respuesta."""
+    return json_artifact(select_stores(load_store_payload(ruta), tiendas))
+
+
+def changes_artifact(
+    output: Path,
+    desde: str | None,
+    tiendas: Iterable[str] | None = None,
+) -> Artifact:
+    """Delta de fichas desde una versión, serializado para una respuesta."""
+    return json_artifact(store_changes(output, desde, tiendas))
+
+
+def select_stores(
+    payload: dict[str, dict[str, object]],
+    tiendas: Iterable[str],
+) -> dict[str, dict[str, object]]:
+    """Subconjunto del artefacto con las tiendas pedidas que existen."""
+    return {tienda: payload[tienda] for tienda in dict.fromkeys(tiendas) if tienda in payload}
+
+
+def store_index(payload: dict[str, dict[str, object]]) -> dict[str, object]:
+    """Índice liviano ``{tienda: banner}`` que viaja en la página inicial."""
+    return {tienda: datos.get("banner") for tienda, datos in payload.items()}
+
+
+def available_years(payload: dict[str, dict[str, object]]) -> dict[str, list[str]]:
+    """Años presentes en los meses de todas las tiendas y los que tienen datos reales."""
+    todos: set[str] = set()
+    reales: set[str] = set()
+    for datos in payload.values():
+        tipos = datos.get("month_types") or {}
+        for mes in datos.get("months") or []:
+            anio = str(mes).split("-")[0]
+            todos.add(anio)
+            if tipos.get(mes) == REAL_SCENARIO:
+                reales.add(anio)
+    return {"all": sorted(todos, key=int), "real": sorted(reales, key=int)}
+
+
+def _cuantizar(valor: object, decimales: int) -> int | float | None:
+    """Redondea un valor del payload; los no finitos pasan a ser el centinela null."""
+    if valor is None:
+        return None
+    numero = float(valor)
+    if not math.isfinite(numero):
+        return None
+    return int(round(numero)) if decimales == 0 else round(numero, decimales)
+
+
+def _serie(por_mes: Mapping[str, object], meses: list[str], decimales: int) -> list:
+    """Serie alineada al eje de meses; un mapa vacío se codifica como lista vacía."""
+    if not por_mes:
+        return []
+    return [_cuantizar(por_mes.get(mes), decimales) for mes in meses]
+
+
+def _sin_no_finitos(mapa: Mapping[str, object]) -> dict[str, object]:
+    """Copia del mapa con los flotantes no finitos reemplazados por null.
+
+    ``NaN`` es válido en un literal JS pero no en JSON, así que una ficha servida
+    por los endpoints no podría leerse con ``JSON.parse`` si lo conservara.
+    """
+    return {
+        clave: None if isinstance(valor, float) and not math.isfinite(valor) else valor
+        for clave, valor in mapa.items()
+    }
+
+
+def _decimales_metricas() -> list[tuple[str, int]]:
+    return [
+        (clave, 0 if formato == "currency" else PERCENT_DECIMALS)
+        for clave, _, formato in METRIC_CONFIG
+    ]
+
+
+def encode_eerr_store(datos: dict[str, object]) -> dict[str, object]:
+    """Codifica la ficha EERR de una tienda en el formato columnar.
+
+    ``values`` trae una serie por métrica en el orden de ``METRIC_CONFIG``;
+    cada escenario se reduce a los índices de sus meses cuando coincide con
+    ``values`` (y si no, trae sus propias series). ``ebitda`` no viaja: el
+    decodificador lo reconstruye desde la serie de EBITDA.
+    """
+    meses = list(datos.get("months") or [])
+    metricas = _decimales_metricas()
+    valores = datos.get("values") or {}
+    series = [_serie(valores.get(clave, {}), meses, decimales) for clave, decimales in metricas]
+    posicion = {mes: indice for indice, mes in enumerate(meses)}
+
+    escenarios: dict[str, object] = {}
+    for escenario, por_metrica in (datos.get("scenarios") or {}).items():
+        meses_esc = list(next(iter(por_metrica.values()), {}))
+        indices = [posicion[mes] for mes in meses_esc]
+        propias = [
+            [_cuantizar(por_metrica.get(clave, {}).get(mes), decimales) for mes in meses_esc]
+            for clave, decimales in metricas
+        ]
+        coinciden = all(
+            propia == [serie[indice] for indice in indices] if serie else not propia or not indices
+            for propia, serie in zip(propias, series)
+        )
+        escenarios[escenario] = indices if coinciden else {"months": indices, "values": propias}
+
+    tipos = datos.get("month_types") or {}
+    detalles = _sin_no_finitos(datos.get("rent_details") or {})
+    detalles["thresholds_by_month"] = _serie(detalles.get("thresholds_by_month") or {}, meses, 0)
+    detalles["uf_by_month"] = _serie(detalles.get("uf_by_month") or {}, meses, UF_DECIMALS)
+    return {
+        "format": PAYLOAD_FORMAT,
+        "banner": datos.get("banner"),
+        "months": meses,
+        "types": [SCENARIO_CODES.index(tipos.get(mes, REAL_SCENARIO)) for mes in meses],
+        "values": series,
+        "scenarios": escenarios,
+        "heatmap": datos.get("heatmap"),
+        "rent_details": detalles,
+    }
+
+
+def encode_simulator_store(config: dict[str, object]) -> dict[str, object]:
+    """Codifica la configuración del simulador de una tienda en el formato columnar."""
+    meses = list(config.get("months") or [])
+    arriendo = dict(config.get("rent") or {})
+    arriendo["uf_values"] = _serie(arriendo.get("uf_values") or {}, meses, UF_DECIMALS)
+    return {
+        "format": PAYLOAD_FORMAT,
+        **config,
+        "sales": _serie(config.get("sales") or {}, meses, 0),
+        "margins": _serie(config.get("margins") or {}, meses, PERCENT_DECIMALS),
+        "rent": arriendo,
+    }
+
+
+def _mapa(meses: list[str], serie: object) -> dict[str, object]:
+    if isinstance(serie, Mapping):
+        return dict(serie)
+    return dict(zip(meses, serie or []))
+
+
+def decode_simulator_store(ficha: Mapping[str, object]) -> dict[str, object]:
+    """Devuelve la configuración del simulador con sus series como mapas por mes.
+
+    Acepta tanto el formato columnar como el de mapas, igual que
+    ``decodeStoreConfig`` en la plantilla.
+    """
+    config = {clave: valor for clave, valor in ficha.items() if clave != "format"}
+    meses = list(config.get("months") or [])
+    arriendo = dict(config.get("rent") or {})
+    arriendo["uf_values"] = _mapa(meses, arriendo.get("uf_values"))
+    config["sales"] = _mapa(meses, config.get("sales"))
+    config["margins"] = _mapa(meses, config.get("margins"))
+    config["rent"] = arriendo
+    return config
+
+
+def encode_banner_summary(info: dict[str, object]) -> dict[str, object]:
+    """Codifica el resumen de un banner: eje de meses y una serie por tienda."""
+    meses = list(info.get("months") or [])
+    tipos = info.get("month_types") or {}
+    codificado: dict[str, object] = {
+        "format": PAYLOAD_FORMAT,
+        "months": meses,
+        "types": [SCENARIO_CODES.index(tipos.get(mes, REAL_SCENARIO)) for mes in meses],
+        "stores": {
+            tienda: [_cuantizar(valor, 0) for valor in (por_mes.get(mes) for mes in meses)]
+            for tienda, por_mes in (info.get("stores") or {}).items()
+        },
+    }
+    if "margins" in info:
+        codificado["margins"] = {
+            tienda: [_cuantizar(por_mes.get(mes), PERCENT_DECIMALS) for mes in meses]
+            for tienda, por_mes in info["margins"].items()
+        }
+    return codificado
@@ -0,0 +1,53 @@
+"""Plantillas HTML compiladas: sustitución de marcadores ``__MARCADOR__`` en una pasada."""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Mapping, TextIO
+
+from ynk_modelo.interfaces.artifacts import write_json
+
+MARKER_PATTERN = re.compile(r"(__[A-Z][A-Z0-9_]*__)")
+
+# Plantillas ya compiladas: ruta -> (mtime_ns, piezas).
+_COMPILED: dict[Path, tuple[int, tuple[str, ...]]] = {}
+
+
+def compile_template(ruta: Path) -> tuple[str, ...]:
+    """Divide la plantilla en texto literal y marcadores, una vez por versión.
+
+    Las posiciones pares son texto literal y las impares nombres de marcador.
+    El resultado se reutiliza mientras no cambie el ``mtime`` de la plantilla.
+    """
+    if not ruta.exists():
+        raise FileNotFoundError(f"No se encontró la plantilla en {ruta}.")
+    mtime = ruta.stat().st_mtime_ns
+    guardada = _COMPILED.get(ruta)
+    if guardada is not None and guardada[0] == mtime:
+        return guardada[1]
+    piezas = tuple(MARKER_PATTERN.split(ruta.read_text(encoding="utf-8")))
+    _COMPILED[ruta] = (mtime, piezas)
+    return piezas
+
+
+def write_template(
+    ruta: Path,
+    valores: Mapping[str, object],
+    destino: TextIO,
+) -> None:
+    """Escribe la plantilla con sus marcadores sustituidos directamente en ``destino``.
+
+    Los valores ``str`` se insertan tal cual; el resto se serializa como JSON
+    de forma incremental, de modo que nunca se arma el documento completo en
+    memoria. Los marcadores sin valor se dejan intactos.
+    """
+    piezas = compile_template(ruta)
+    for posicion, pieza in enumerate(piezas):
+        if posicion % 2 == 0 or pieza not in valores:
+            destino.write(pieza)
+            continue
+        valor = valores[pieza]
+        if isinstance(valor, str):
+            destino.write(valor)
+        else:
+            write_json(valor, destino)
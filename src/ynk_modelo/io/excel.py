@@ -179,6 +179,16 @@ def load_rent() -> pd.DataFrame:
     return arriendo[keep]
 
 
+def load_store_surfaces() -> pd.Series:
+    """Devuelve la superficie (m²) de cada tienda según la planilla de arriendos."""
+    arriendo = _read_excel(RENT_FILE, sheet_name="Arriendos")
+    if "Superficie" not in arriendo.columns:
+        return pd.Series(dtype=float, name="Superficie_m2")
+    superficies = pd.to_numeric(arriendo["Superficie"], errors="coerce").fillna(0.0)
+    superficies.index = arriendo["Sucursal"]
+    return superficies.groupby(level=0).first().rename("Superficie_m2")
+
+
 def load_other_costs() -> pd.DataFrame:
     """Carga coeficientes para otros costos por banner."""
     otros = _read_excel(OTHER_COSTS_FILE, sheet_name=0)
@@ -0,0 +1,33 @@
+"""Versión del código en ejecución, para invalidar resultados generados por otro código."""
+from __future__ import annotations
+
+import hashlib
+from functools import lru_cache
+from importlib import metadata
+from pathlib import Path
+
+PACKAGE_NAME = "ynk-modelo"
+PACKAGE_DIR = Path(__file__).resolve().parents[1]
+
+
+def package_version() -> str:
+    """Versión instalada del paquete, o ``"dev"`` si corre desde el código fuente."""
+    try:
+        return metadata.version(PACKAGE_NAME)
+    except metadata.PackageNotFoundError:
+        return "dev"
+
+
+@lru_cache(maxsize=1)
+def code_version() -> str:
+    """Hash de la versión del paquete y del contenido de sus módulos.
+
+    Se calcula una vez por proceso: cambia con cada despliegue que toque el
+    código aunque no se haya subido la versión del paquete.
+    """
+    firma = hashlib.sha256(f"{package_version()}\n".encode("utf-8"))
+    for ruta in sorted(PACKAGE_DIR.rglob("*.py")):
+        firma.update(ruta.relative_to(PACKAGE_DIR).as_posix().encode("utf-8"))
+        firma.update(b"\0")
+        firma.update(ruta.read_bytes())
+    return firma.hexdigest()[:32]
@@ -1,9 +1,12 @@
 """Detección de cambios en archivos de data."""
 from __future__ import annotations
 
+import hashlib
 import json
+import threading
 from datetime import datetime
 from pathlib import Path
+from typing import Iterable
 
 from ynk_modelo.config import DATA_DIR, PROJECT_ROOT
 from ynk_modelo.utils.logger import get_logger
@@ -17,6 +20,8 @@ class FileWatcher:
     def __init__(self, cache_file: Path | None = None):
         """Inicializa el watcher con archivo de caché de timestamps."""
         self.cache_file = cache_file or PROJECT_ROOT / ".data_cache.json"
+        # Protege ``timestamps``: varias peticiones pueden verificar a la vez.
+        self._lock = threading.RLock()
         self.timestamps: dict[str, float] = self._load_cache()
     
     def _load_cache(self) -> dict[str, float]:
@@ -34,8 +39,10 @@ class FileWatcher:
     def _save_cache(self) -> None:
         """Guarda timestamps actuales en caché."""
         try:
+            with self._lock:
+                contenido = json.dumps(self.timestamps, indent=2)
             with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.timestamps, f, indent=2)
+                f.write(contenido)
         except IOError as e:
             logger.error(f"No se pudo guardar caché de timestamps: {e}")
     
@@ -67,23 +74,24 @@ class FileWatcher:
         files = self.get_data_files()
         changed_files = []
         
-        for file_path in files:
-            file_key = str(file_path.relative_to(PROJECT_ROOT))
-            current_mtime = file_path.stat().st_mtime
-            cached_mtime = self.timestamps.get(file_key)
+        with self._lock:
+            for file_path in files:
+                file_key = str(file_path.relative_to(PROJECT_ROOT))
+                current_mtime = file_path.stat().st_mtime
+                cached_mtime = self.timestamps.get(file_key)
             
-            if cached_mtime is None:
-                # Archivo nuevo
-                changed_files.append(f"{file_path.name} (nuevo)")
-                logger.info(f"Archivo nuevo detectado: {file_path.name}")
-            elif current_mtime > cached_mtime:
-                # Archivo modificado
-                mod_time = datetime.fromtimestamp(current_mtime)
-                changed_files.append(f"{file_path.name} (modificado {mod_time.strftime('%Y-%m-%d %H:%M:%S')})")
-                logger.info(f"Cambio detectado en: {file_path.name}")
+                if cached_mtime is None:
+                    # Archivo nuevo
+                    changed_files.append(f"{file_path.name} (nuevo)")
+                    logger.info(f"Archivo nuevo detectado: {file_path.name}")
+                elif current_mtime > cached_mtime:
+                    # Archivo modificado
+                    mod_time = datetime.fromtimestamp(current_mtime)
+                    changed_files.append(f"{file_path.name} (modificado {mod_time.strftime('%Y-%m-%d %H:%M:%S')})")
+                    logger.info(f"Cambio detectado en: {file_path.name}")
             
-            # Actualizar timestamp
-            self.timestamps[file_key] = current_mtime
+                # Actualizar timestamp
+                self.timestamps[file_key] = current_mtime
         
         has_changes = len(changed_files) > 0
         return has_changes, changed_files
@@ -93,6 +101,24 @@ class FileWatcher:
         self._save_cache()
         logger.debug("Caché de timestamps actualizado")
     
+    def data_version(self, extra: Iterable[Path] = (), settings: Iterable[str] = ()) -> str:
+        """Hash de nombre, fecha y tamaño de los archivos de data (y de ``extra``).
+
+        Identifica la versión de entrada de una generación: dos procesos que
+        ven los mismos archivos obtienen la misma versión. ``settings`` agrega
+        al hash valores que no son archivos (configuración, versión del código).
+        """
+        firma = hashlib.sha256()
+        for valor in settings:
+            firma.update(f"{valor}\n".encode("utf-8"))
+        for file_path in [*self.get_data_files(), *extra]:
+            try:
+                estado = file_path.stat()
+            except FileNotFoundError:
+                continue
+            firma.update(f"{file_path.name}|{estado.st_mtime_ns}|{estado.st_size}\n".encode("utf-8"))
+        return firma.hexdigest()[:32]
+
     def get_summary(self) -> dict[str, object]:
         """Retorna resumen del estado actual de archivos."""
         files = self.get_data_files()
@@ -0,0 +1,306 @@
+"""Métricas del proceso expuestas en el formato de texto de Prometheus.
+
+Cada hilo acumula en su propio shard, sin candados en el camino caliente; al
+exponer se suman los shards. Los shards de hilos terminados se consolidan al
+registrar uno nuevo, de modo que la memoria queda acotada por los hilos vivos
+y por la cardinalidad de las etiquetas (endpoints de Flask, no URLs).
+
+Con varios procesos cada worker publica una instantánea ``worker-<pid>.json``
+en un directorio compartido y quien atiende ``/api/metrics`` la suma a la
+propia. Las instantáneas de workers muertos se acumulan en ``retired.json``
+para que los totales no retrocedan cuando se reemplaza un worker; se pierde
+solo lo contado desde su última publicación.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from ynk_modelo.utils.locks import file_lock
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+RETIRED_SNAPSHOT = "retired.json"
+
+Etiquetas = tuple[tuple[str, str], ...]
+_Clave = tuple[str, Etiquetas]
+
+
+class _Shard:
+    """Acumuladores de un hilo: contadores y histogramas (buckets, suma, cantidad)."""
+
+    __slots__ = ("contadores", "histogramas")
+
+    def __init__(self) -> None:
+        self.contadores: dict[_Clave, float] = {}
+        self.histogramas: dict[_Clave, list[float]] = {}
+
+    def sumar(self, otro: _Shard) -> None:
+        for clave, valor in list(otro.contadores.items()):
+            self.contadores[clave] = self.contadores.get(clave, 0.0) + valor
+        for clave, valores in list(otro.histogramas.items()):
+            propio = self.histogramas.get(clave)
+            if propio is None:
+                self.histogramas[clave] = list(valores)
+            else:
+                for i, valor in enumerate(valores):
+                    propio[i] += valor
+
+    @classmethod
+    def desde(cls, instantanea: dict[str, list]) -> _Shard:
+        """Shard a partir de una instantánea serializada."""
+        shard = cls()
+        for nombre, etiquetas, valor in instantanea.get("counters", []):
+            shard.contadores[(nombre, tuple(tuple(e) for e in etiquetas))] = valor
+        for nombre, etiquetas, valores in instantanea.get("histograms", []):
+            shard.histogramas[(nombre, tuple(tuple(e) for e in etiquetas))] = list(valores)
+        return shard
+
+    def instantanea(self) -> dict[str, list]:
+        """Forma serializable en JSON."""
+        return {
+            "counters": [[n, [list(e) for e in et], v] for (n, et), v in self.contadores.items()],
+            "histograms": [[n, [list(e) for e in et], v] for (n, et), v in self.histogramas.items()],
+        }
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(etiquetas: Etiquetas, extra: str = "") -> str:
+    partes = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in etiquetas]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _numero(valor: float) -> str:
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+class MetricsRegistry:
+    """Registro de contadores e histogramas con shards por hilo."""
+
+    def __init__(self) -> None:
+        # nombre -> (tipo, ayuda, buckets)
+        self._familias: dict[str, tuple[str, str, tuple[float, ...]]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: list[tuple[threading.Thread, _Shard]] = []
+        self._retirados = _Shard()
+
+    def counter(self, nombre: str, ayuda: str) -> None:
+        """Declara un contador."""
+        self._familias[nombre] = ("counter", ayuda, ())
+
+    def histogram(self, nombre: str, ayuda: str, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        """Declara un histograma con límites ``buckets`` (en orden creciente)."""
+        self._familias[nombre] = ("histogram", ayuda, tuple(buckets))
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard()
+            with self._lock:
+                vivos = []
+                for hilo, otro in self._shards:
+                    if hilo.is_alive():
+                        vivos.append((hilo, otro))
+                    else:
+                        self._retirados.sumar(otro)
+                vivos.append((threading.current_thread(), shard))
+                self._shards = vivos
+            self._local.shard = shard
+        return shard
+
+    def inc(self, nombre: str, etiquetas: Etiquetas = (), valor: float = 1.0) -> None:
+        """Suma ``valor`` a un contador."""
+        contadores = self._shard().contadores
+        clave = (nombre, etiquetas)
+        contadores[clave] = contadores.get(clave, 0.0) + valor
+
+    def observe(self, nombre: str, etiquetas: Etiquetas, valor: float) -> None:
+        """Registra una observación en un histograma."""
+        buckets = self._familias[nombre][2]
+        histogramas = self._shard().histogramas
+        clave = (nombre, etiquetas)
+        valores = histogramas.get(clave)
+        if valores is None:
+            valores = histogramas[clave] = [0.0] * (len(buckets) + 3)
+        valores[bisect_left(buckets, valor)] += 1
+        valores[-2] += valor
+        valores[-1] += 1
+
+    def collect(self) -> _Shard:
+        """Suma de todos los shards (vivos y retirados)."""
+        total = _Shard()
+        with self._lock:
+            # Bajo el candado: un shard que se retira no se cuenta dos veces.
+            total.sumar(self._retirados)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            total.sumar(shard)
+        return total
+
+    def snapshot(self) -> dict[str, list]:
+        """Instantánea serializable en JSON para sumarla desde otro proceso."""
+        return self.collect().instantanea()
+
+    def render(self, instantaneas: list[dict[str, list]] = ()) -> str:
+        """Exposición en formato de texto de Prometheus, sumando ``instantaneas``."""
+        total = self.collect()
+        for instantanea in instantaneas:
+            total.sumar(_Shard.desde(instantanea))
+
+        lineas: list[str] = []
+        for nombre, (tipo, ayuda, buckets) in sorted(self._familias.items()):
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            if tipo == "counter":
+                for (familia, etiquetas), valor in sorted(total.contadores.items()):
+                    if familia == nombre:
+                        lineas.append(f"{nombre}{_etiquetas(etiquetas)} {_numero(valor)}")
+                continue
+            for (familia, etiquetas), valores in sorted(total.histogramas.items()):
+                if familia != nombre or len(valores) != len(buckets) + 3:
+                    continue
+                acumulado = 0.0
+                for limite, cantidad in zip((*buckets, "+Inf"), valores):
+                    acumulado += cantidad
+                    le = 'le="{}"'.format(limite if limite == "+Inf" else _numero(limite))
+                    lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas, le)} {_numero(acumulado)}")
+                lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {_numero(valores[-2])}")
+                lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {_numero(valores[-1])}")
+        return "\n".join(lineas) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+REGISTRY.counter("ynk_http_requests_total", "Requests atendidas por endpoint, método y estado.")
+REGISTRY.histogram("ynk_http_request_duration_seconds", "Latencia de las requests por endpoint.")
+REGISTRY.counter("ynk_http_response_bytes_total", "Bytes de respuesta enviados por endpoint.")
+REGISTRY.counter("ynk_db_queries_total", "Consultas SQLite ejecutadas durante requests, por endpoint.")
+REGISTRY.counter("ynk_db_query_seconds_total", "Tiempo en consultas SQLite durante requests, por endpoint.")
+REGISTRY.histogram(
+    "ynk_regeneration_stage_duration_seconds",
+    "Duración de cada etapa de la regeneración de reportes.",
+    STAGE_BUCKETS,
+)
+
+# Request en curso del hilo: [inicio, consultas, segundos en consultas].
+_request = threading.local()
+
+
+def start_request() -> None:
+    """Marca el inicio de una request en el hilo actual."""
+    _request.actual = [time.perf_counter(), 0, 0.0]
+
+
+def observe_query(segundos: float) -> None:
+    """Suma una consulta a la request en curso del hilo, si la hay."""
+    actual = getattr(_request, "actual", None)
+    if actual is not None:
+        actual[1] += 1
+        actual[2] += segundos
+
+
+def finish_request(endpoint: str, metodo: str, estado: int, bytes_enviados: int) -> None:
+    """Registra latencia, estado, bytes y consultas de la request en curso."""
+    actual = getattr(_request, "actual", None)
+    if actual is None:
+        return
+    _request.actual = None
+    etiquetas = (("endpoint", endpoint),)
+    REGISTRY.inc("ynk_http_requests_total", (("endpoint", endpoint), ("method", metodo), ("status", str(estado))))
+    REGISTRY.observe("ynk_http_request_duration_seconds", etiquetas, time.perf_counter() - actual[0])
+    if bytes_enviados:
+        REGISTRY.inc("ynk_http_response_bytes_total", etiquetas, bytes_enviados)
+    if actual[1]:
+        REGISTRY.inc("ynk_db_queries_total", etiquetas, actual[1])
+        REGISTRY.inc("ynk_db_query_seconds_total", etiquetas, actual[2])
+
+
+@contextmanager
+def timed_stage(etapa: str) -> Iterator[None]:
+    """Mide la duración de una etapa de la regeneración de reportes."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe("ynk_regeneration_stage_duration_seconds", (("stage", etapa),), time.perf_counter() - inicio)
+
+
+def snapshot_path(directorio: Path, pid: int | None = None) -> Path:
+    """Archivo de la instantánea de un proceso (el actual si no se indica)."""
+    return directorio / f"worker-{pid or os.getpid()}.json"
+
+
+def _escribir_json(destino: Path, datos: dict[str, list]) -> None:
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporal = destino.with_name(f"{destino.name}.{os.getpid()}.tmp")
+    temporal.write_text(json.dumps(datos, separators=(",", ":")), encoding="utf-8")
+    os.replace(temporal, destino)
+
+
+def write_snapshot(destino: Path) -> None:
+    """Publica la instantánea del proceso de forma atómica."""
+    _escribir_json(destino, REGISTRY.snapshot())
+
+
+def _proceso_vivo(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def retire_dead_snapshots(directorio: Path) -> int:
+    """Suma a ``retired.json`` las instantáneas de procesos que ya no existen.
+
+    Devuelve cuántas se retiraron. Un candado de archivo evita que dos workers
+    reemplazados a la vez sumen la misma instantánea.
+    """
+    if not directorio.is_dir():
+        return 0
+    retirado = directorio / RETIRED_SNAPSHOT
+    with file_lock(directorio / ".retired.lock"):
+        muertas = []
+        for ruta in directorio.glob("worker-*.json"):
+            pid = ruta.stem.removeprefix("worker-")
+            if pid.isdigit() and not _proceso_vivo(int(pid)):
+                muertas.append(ruta)
+        if not muertas:
+            return 0
+        total = _Shard()
+        for ruta in (retirado, *muertas):
+            try:
+                total.sumar(_Shard.desde(json.loads(ruta.read_text(encoding="utf-8"))))
+            except (OSError, ValueError):
+                continue
+        _escribir_json(retirado, total.instantanea())
+        for ruta in muertas:
+            ruta.unlink(missing_ok=True)
+    return len(muertas)
+
+
+def read_snapshots(directorio: Path, excluir: Path | None = None) -> list[dict[str, list]]:
+    """Instantáneas publicadas por otros procesos en ``directorio``."""
+    instantaneas = []
+    for ruta in sorted(directorio.glob("*.json")) if directorio.is_dir() else ():
+        if ruta == excluir:
+            continue
+        try:
+            instantaneas.append(json.loads(ruta.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return instantaneas
@@ -0,0 +1,195 @@
+"""Servidor WSGI multi-proceso sin gestor externo.
+
+El proceso maestro abre el socket, precarga lo que conviene compartir por
+copy-on-write y crea ``workers`` procesos con ``os.fork``; cada uno atiende
+con un pool de ``threads`` hilos sobre el mismo socket. El maestro reemplaza
+a los workers que mueren y, ante SIGTERM/SIGINT, los detiene de forma
+ordenada: dejan de aceptar conexiones y terminan las requests en curso.
+Sin ``os.fork`` (Windows) se atiende en un solo proceso.
+"""
+from __future__ import annotations
+
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from werkzeug.serving import BaseWSGIServer
+
+from ynk_modelo.utils.logger import get_logger
+
+logger = get_logger()
+
+LISTEN_BACKLOG = 128
+SHUTDOWN_TIMEOUT_SECONDS = 30.0
+RESPAWN_DELAY_SECONDS = 1.0
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Servidor WSGI de Werkzeug que atiende las conexiones en un pool acotado de hilos."""
+
+    multithread = True
+
+    def __init__(self, host: str, port: int, app, threads: int, fd: int | None = None):
+        # Werkzeug llama ``server_close`` al adoptar ``fd``: el pool se crea después.
+        self._pool: ThreadPoolExecutor | None = None
+        super().__init__(host, port, app, fd=fd)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="wsgi")
+
+    def process_request(self, request, client_address) -> None:
+        self._pool.submit(self._atender, request, client_address)
+
+    def _atender(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        """Cierra el socket y espera las requests que quedaban en curso."""
+        super().server_close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+
+def _atender_hasta_senal(servidor: PooledWSGIServer) -> None:
+    """Atiende hasta recibir SIGTERM/SIGINT y luego cierra de forma ordenada."""
+
+    def detener(signum, frame) -> None:
+        # ``shutdown`` espera a que termine ``serve_forever``: se llama desde otro hilo.
+        threading.Thread(target=servidor.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, detener)
+    signal.signal(signal.SIGINT, detener)
+    servidor.serve_forever()
+
+
+def _worker(
+    app,
+    listener: socket.socket,
+    threads: int,
+    indice: int,
+    on_start: Callable[[int], object] | None,
+    on_stop: Callable[[int], object] | None,
+) -> None:
+    host, port = listener.getsockname()[:2]
+    servidor = PooledWSGIServer(host, port, app, threads, fd=listener.fileno())
+    if on_start is not None:
+        on_start(indice)
+    logger.info(f"Worker {indice} (pid {os.getpid()}) atendiendo con {threads} hilos")
+    try:
+        _atender_hasta_senal(servidor)
+    finally:
+        if on_stop is not None:
+            on_stop(indice)
+        logger.info(f"Worker {indice} (pid {os.getpid()}) detenido")
+
+
+def serve(
+    app,
+    host: str,
+    port: int,
+    workers: int,
+    threads: int,
+    preload: Callable[[], object] | None = None,
+    on_worker_start: Callable[[int], object] | None = None,
+    on_worker_stop: Callable[[int], object] | None = None,
+) -> None:
+    """Atiende ``app`` con ``workers`` procesos de ``threads`` hilos cada uno.
+
+    ``preload`` corre una vez en el maestro antes de crear los workers y no debe
+    dejar hilos ni pools de procesos vivos: el maestro hace fork después.
+    ``on_worker_start``/``on_worker_stop`` reciben el índice del
+    worker (0 a ``workers - 1``); el índice se conserva al reemplazar un worker.
+    """
+    listener = socket.create_server((host, port), backlog=LISTEN_BACKLOG)
+    listener.set_inheritable(True)
+    if preload is not None:
+        preload()
+
+    if workers <= 1 or not hasattr(os, "fork"):
+        try:
+            _worker(app, listener, threads, 0, on_worker_start, on_worker_stop)
+        finally:
+            listener.close()
+        return
+
+    detener = threading.Event()
+    hijos: dict[int, int] = {}
+
+    def lanzar(indice: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            codigo = 0
+            try:
+                _worker(app, listener, threads, indice, on_worker_start, on_worker_stop)
+            except BaseException:
+                logger.error(f"✗ Worker {indice} terminó con error", exc_info=True)
+                codigo = 1
+            finally:
+                # Sin limpiar el estado heredado del maestro (atexit, handlers).
+                os._exit(codigo)
+        hijos[pid] = indice
+
+    def al_recibir_senal(signum, frame) -> None:
+        detener.set()
+
+    signal.signal(signal.SIGTERM, al_recibir_senal)
+    signal.signal(signal.SIGINT, al_recibir_senal)
+
+    logger.info(f"Maestro (pid {os.getpid()}): {workers} workers × {threads} hilos en {host}:{port}")
+    for indice in range(workers):
+        lanzar(indice)
+
+    try:
+        while not detener.is_set():
+            try:
+                pid, estado = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if pid == 0:
+                detener.wait(0.5)
+                continue
+            indice = hijos.pop(pid, None)
+            if indice is None:
+                continue
+            logger.warning(f"Worker {indice} (pid {pid}) terminó inesperadamente ({estado}); reemplazándolo")
+            time.sleep(RESPAWN_DELAY_SECONDS)
+            if not detener.is_set():
+                lanzar(indice)
+    finally:
+        _detener_hijos(hijos)
+        listener.close()
+
+
+def _detener_hijos(hijos: dict[int, int]) -> None:
+    """Envía SIGTERM a los workers y espera su cierre; fuerza los que no terminan."""
+    logger.info("Deteniendo workers...")
+    for pid in hijos:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    limite = time.monotonic() + SHUTDOWN_TIMEOUT_SECONDS
+    while hijos and time.monotonic() < limite:
+        for pid in list(hijos):
+            try:
+                terminado, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                terminado = pid
+            if terminado:
+                hijos.pop(pid)
+        if hijos:
+            time.sleep(0.1)
+    for pid in hijos:
+        logger.warning(f"Worker pid {pid} no terminó a tiempo; forzando cierre")
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass
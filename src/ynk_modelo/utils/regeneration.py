@@ -0,0 +1,142 @@
+"""Coordinación single-flight de la regeneración de reportes.
+
+Una sola generación por versión de data: dentro de un proceso los llamadores
+concurrentes esperan la que ya está en curso, y entre procesos (servidor
+Flask, ``ynk-auto`` y ``ynk-server``) un candado de archivo serializa las
+generaciones; quien obtiene el candado después de otro proceso ve en el sello
+que esa versión ya está publicada y no la repite. Los procesos que no
+regeneran piden la generación al encargado con un archivo de pedido.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Sequence
+
+from ynk_modelo.config import (
+    EERR_TEMPLATE,
+    HTML_SIMULATOR_OUTPUT,
+    HTML_STATE_OUTPUT,
+    OUTPUT_DIR,
+    SIMULATOR_TEMPLATE,
+)
+from ynk_modelo.utils.locks import LOCK_POLL_SECONDS, file_lock
+from ynk_modelo.utils.logger import get_logger
+
+logger = get_logger()
+
+LOCK_NAME = ".regeneration.lock"
+STAMP_NAME = ".regeneration.version"
+REQUEST_NAME = ".regeneration.request"
+# Entradas, además de la data, que cambian el resultado de una generación.
+REPORT_INPUTS = (EERR_TEMPLATE, SIMULATOR_TEMPLATE)
+
+
+class _Vuelo:
+    """Generación en curso de una versión, con su resultado para los que esperan."""
+
+    __slots__ = ("listo", "error", "generado")
+
+    def __init__(self) -> None:
+        self.listo = threading.Event()
+        self.error: BaseException | None = None
+        self.generado = False
+
+
+class RegenerationCoordinator:
+    """Ejecuta a lo más una generación por versión de data.
+
+    ``salidas`` son los reportes que deben existir para dar una versión por
+    publicada; si falta alguno se regenera aunque el sello coincida.
+    """
+
+    def __init__(self, directorio: Path, salidas: Sequence[Path]):
+        self.lock_path = directorio / LOCK_NAME
+        self.stamp_path = directorio / STAMP_NAME
+        self.request_path = directorio / REQUEST_NAME
+        self._salidas = tuple(salidas)
+        self._candado = threading.Lock()
+        self._vuelos: dict[str, _Vuelo] = {}
+
+    def published_version(self) -> str | None:
+        """Versión de data con la que se generaron los reportes publicados."""
+        try:
+            return self.stamp_path.read_text(encoding="ascii").strip() or None
+        except FileNotFoundError:
+            return None
+
+    def is_current(self, version: str) -> bool:
+        """Indica si ``version`` ya está publicada y sus reportes existen."""
+        return self.published_version() == version and all(s.exists() for s in self._salidas)
+
+    def run(self, version: str, generar: Callable[[], object]) -> bool:
+        """Genera ``version`` o espera a quien ya la está generando.
+
+        Devuelve ``True`` si este llamador ejecutó ``generar``. Los que esperan
+        una generación fallida reciben la misma excepción.
+        """
+        with self._candado:
+            vuelo = self._vuelos.get(version)
+            lider = vuelo is None
+            if lider:
+                vuelo = self._vuelos[version] = _Vuelo()
+        if not lider:
+            logger.info(f"Esperando la regeneración en curso de la versión {version[:12]}")
+            vuelo.listo.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return False
+
+        try:
+            with file_lock(self.lock_path):
+                if self.is_current(version):
+                    logger.info(f"Versión {version[:12]} ya generada por otro proceso")
+                else:
+                    generar()
+                    self._sellar(version)
+                    vuelo.generado = True
+        except BaseException as exc:
+            vuelo.error = exc
+            raise
+        finally:
+            with self._candado:
+                del self._vuelos[version]
+            vuelo.listo.set()
+        return vuelo.generado
+
+    def request_remote(self, motivo: str) -> None:
+        """Pide la regeneración al proceso encargado, que la toma con ``take_request``."""
+        self.request_path.parent.mkdir(parents=True, exist_ok=True)
+        temporal = self.request_path.with_name(f"{self.request_path.name}.{os.getpid()}.tmp")
+        temporal.write_text(motivo, encoding="utf-8")
+        os.replace(temporal, self.request_path)
+
+    def take_request(self) -> str | None:
+        """Motivo del último pedido de otro proceso, o ``None`` si no hay pedidos."""
+        try:
+            motivo = self.request_path.read_text(encoding="utf-8")
+            self.request_path.unlink()
+        except FileNotFoundError:
+            return None
+        return motivo or "pedido de otro proceso"
+
+    def wait_until(self, listo: Callable[[], bool], timeout: float) -> bool:
+        """Espera, revisando cada ``LOCK_POLL_SECONDS``, a que ``listo()`` se cumpla."""
+        limite = time.monotonic() + timeout
+        while not listo():
+            if time.monotonic() >= limite:
+                return False
+            time.sleep(LOCK_POLL_SECONDS)
+        return True
+
+    def _sellar(self, version: str) -> None:
+        temporal = self.stamp_path.with_name(f"{self.stamp_path.name}.{os.getpid()}.tmp")
+        temporal.write_text(version, encoding="ascii")
+        os.replace(temporal, self.stamp_path)
+
+
+def report_coordinator() -> RegenerationCoordinator:
+    """Coordinador de los reportes en ``OUTPUT_DIR``, compartido entre procesos."""
+    return RegenerationCoordinator(OUTPUT_DIR, (HTML_STATE_OUTPUT, HTML_SIMULATOR_OUTPUT))
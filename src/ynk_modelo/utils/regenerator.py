@@ -0,0 +1,99 @@
+"""Regeneración de reportes en segundo plano.
+
+Las rutas siguen sirviendo la última versión publicada mientras un hilo de
+fondo genera la nueva (stale-while-revalidate); ``ArtifactWriter`` publica
+cada artefacto de forma atómica, así que nunca se sirve una versión a medias.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime
+from typing import Callable
+
+from ynk_modelo.utils.logger import get_logger
+
+logger = get_logger()
+
+
+class BackgroundRegenerator:
+    """Cola de una sola posición para regenerar reportes en un hilo de fondo.
+
+    Los pedidos que llegan mientras hay uno pendiente se funden con él; si
+    llegan durante una regeneración, se hace una más al terminar.
+    """
+
+    def __init__(self, generar: Callable[[], object], nombre: str = "regenerador-reportes"):
+        self._generar = generar
+        self._nombre = nombre
+        self._condicion = threading.Condition()
+        self._motivos: list[str] = []
+        self._hilo: threading.Thread | None = None
+        self.running = False
+        self.generation = 0
+        self.last_error: str | None = None
+        self.last_finished: datetime | None = None
+        self.last_elapsed: float | None = None
+
+    def request(self, motivo: str = "") -> bool:
+        """Encola una regeneración; devuelve ``False`` si ya había una pendiente."""
+        with self._condicion:
+            nueva = not self._motivos
+            self._motivos.append(motivo)
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name=self._nombre, daemon=True)
+                self._hilo.start()
+            self._condicion.notify_all()
+        if nueva:
+            logger.info(f"Regeneración encolada: {motivo or 'sin motivo'}")
+        return nueva
+
+    @property
+    def busy(self) -> bool:
+        """Indica si hay una regeneración en curso o pendiente."""
+        with self._condicion:
+            return self.running or bool(self._motivos)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Espera a que no quede nada en curso ni pendiente; ``False`` si vence."""
+        with self._condicion:
+            return self._condicion.wait_for(
+                lambda: not self.running and not self._motivos, timeout
+            )
+
+    def status(self) -> dict[str, object]:
+        """Estado para las APIs: generación publicada, si hay trabajo y último error."""
+        with self._condicion:
+            return {
+                "generation": self.generation,
+                "regenerating": self.running or bool(self._motivos),
+                "last_finished": self.last_finished.isoformat() if self.last_finished else None,
+                "last_elapsed": self.last_elapsed,
+                "last_error": self.last_error,
+            }
+
+    def _bucle(self) -> None:
+        while True:
+            with self._condicion:
+                if not self._motivos:
+                    # Bajo el candado: un pedido posterior ve ``None`` y lanza otro hilo.
+                    self._hilo = None
+                    return
+                motivos, self._motivos = self._motivos, []
+                self.running = True
+            inicio = time.time()
+            error = None
+            try:
+                logger.info(f"Regenerando reportes en segundo plano ({'; '.join(filter(None, motivos)) or 'sin motivo'})")
+                self._generar()
+            except Exception as exc:  # el hilo debe sobrevivir a un pipeline fallido
+                error = str(exc)
+                logger.error(f"✗ Error al regenerar reportes en segundo plano: {exc}", exc_info=True)
+            with self._condicion:
+                self.running = False
+                self.last_error = error
+                self.last_elapsed = time.time() - inicio
+                self.last_finished = datetime.now()
+                if error is None:
+                    self.generation += 1
+                self._condicion.notify_all()
@@ -87,3 +87,21 @@ def test_store_lifecycle_modifications_and_backup(tmp_path: Path, monkeypatch: p
     backup = service.create_backup(user_id=None, reason="test")
     assert backup["id"].startswith("backup-")
     assert Path(backup["file_path"]).exists()
+
+
+def test_feature_flags_are_cached_and_updated_in_process(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    setup_temp_db(tmp_path, monkeypatch)
+    assert service.is_feature_enabled()
+
+    # Un cambio hecho por otro proceso se ve recién al refrescar.
+    conn = db_module.get_db()
+    conn.execute("UPDATE feature_flags SET is_enabled = 0 WHERE key_name = ?", (service.FEATURE_FLAG_KEY,))
+    conn.commit()
+    conn.close()
+    assert service.is_feature_enabled()
+    service.invalidate_feature_flags()
+    assert not service.is_feature_enabled()
+
+    service.set_feature_flag(True, user_id=None)
+    assert service.is_feature_enabled()
+    assert not service.is_feature_enabled("flag_inexistente")
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import gzip
+import json
+from pathlib import Path
+
+import pytest
+
+from ynk_modelo.interfaces.artifacts import (
+    ArtifactWriter,
+    accepts_gzip,
+    content_hash,
+    etag_path,
+    gzip_path,
+    load_artifact,
+    negotiate,
+    write_json,
+)
+
+
+def test_published_artifact_is_served_compressed_and_revalidated(tmp_path: Path) -> None:
+    ruta = tmp_path / "reporte.html"
+    escritor = ArtifactWriter(ruta)
+    with escritor as destino:
+        destino.write("<html>" + "x" * 1000 + "</html>")
+    etag = escritor.etag
+
+    artefacto = load_artifact(ruta)
+    assert artefacto.etag == etag
+    assert gzip.decompress(gzip_path(ruta).read_bytes()) == ruta.read_bytes()
+
+    estado, cuerpo, cabeceras = negotiate(artefacto, "gzip, deflate, br", None)
+    assert estado == 200
+    assert cabeceras["Content-Encoding"] == "gzip"
+    assert gzip.decompress(cuerpo) == ruta.read_bytes()
+
+    estado, cuerpo, cabeceras = negotiate(artefacto, "gzip", cabeceras["ETag"])
+    assert (estado, cuerpo) == (304, b"")
+
+    estado, cuerpo, cabeceras = negotiate(artefacto, None, '"otro"')
+    assert estado == 200
+    assert cuerpo == ruta.read_bytes()
+    assert "Content-Encoding" not in cabeceras
+    assert cabeceras["ETag"] == f'"{etag}"'
+
+
+def test_sidecars_from_a_previous_build_are_not_served(tmp_path: Path) -> None:
+    ruta = tmp_path / "reporte.html"
+    with ArtifactWriter(ruta) as destino:
+        destino.write("<html>anterior</html>")
+    gz_anterior = gzip_path(ruta).read_bytes()
+    etag_anterior = etag_path(ruta).read_bytes()
+
+    with ArtifactWriter(ruta) as destino:
+        destino.write("<html>nuevo</html>")
+    # Variantes viejas con fecha igual o posterior al cuerpo nuevo.
+    gzip_path(ruta).write_bytes(gz_anterior)
+    etag_path(ruta).write_bytes(etag_anterior)
+
+    artefacto = load_artifact(ruta)
+    assert artefacto.etag == content_hash(b"<html>nuevo</html>")
+    assert gzip.decompress(artefacto.gzip_content) == b"<html>nuevo</html>"
+
+
+def test_accept_encoding_honours_quality_values() -> None:
+    assert accepts_gzip("deflate, gzip;q=0.5")
+    assert not accepts_gzip("gzip;q=0, deflate")
+    assert not accepts_gzip("identity")
+    assert accepts_gzip("*")
+
+
+def test_writer_replaces_atomically_and_discards_failed_writes(tmp_path: Path) -> None:
+    ruta = tmp_path / "datos.json"
+    datos = {"A-1": {"meses": ["2025-01"], "valor": 1.5}, "Ñuñoa": None}
+    with ArtifactWriter(ruta) as destino:
+        write_json(datos, destino)
+    assert ruta.read_text(encoding="utf-8") == json.dumps(datos, ensure_ascii=False)
+    anterior = load_artifact(ruta)
+
+    with pytest.raises(RuntimeError):
+        with ArtifactWriter(ruta) as destino:
+            destino.write('{"incompleto": ')
+            raise RuntimeError("falla a mitad de la escritura")
+
+    assert load_artifact(ruta) is anterior
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "datos.json",
+        "datos.json.etag",
+        "datos.json.gz",
+    ]
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ynk_modelo.cli import main as cli_main
+from ynk_modelo.domain.eerr import formatear_valores
+from ynk_modelo.interfaces.state_report import CONSOLE_METRICS, mostrar_eerr_sucursal, volcar_eerr_todas
+
+
+def test_vectorized_format_matches_python_format() -> None:
+    valores = np.array([-0.4, 0.15, 2.5, 999.96, 1234567.5, -1e12, np.nan, 0.0])
+    montos = formatear_valores(valores).tolist()
+    porcentajes = formatear_valores(valores, True).tolist()
+
+    assert montos == ["-" if np.isnan(v) else f"{v:,.0f}" for v in valores]
+    assert porcentajes == ["-" if np.isnan(v) else f"{v:,.1f}%" for v in valores]
+
+
+def test_dump_all_matches_per_store_output() -> None:
+    filas = []
+    for sucursal, factor in (("B", 2.0), ("A", 1.0)):
+        for mes in ("2025-02-01", "2025-01-01"):
+            fila = {clave: factor * 1_000.5 for clave in CONSOLE_METRICS}
+            fila.update({"Sucursal": sucursal, "Mes": pd.Timestamp(mes), "Margen_EBITDA": 12.34})
+            filas.append(fila)
+    eerr = pd.DataFrame(filas)
+
+    esperado = io.StringIO()
+    with contextlib.redirect_stdout(esperado):
+        mostrar_eerr_sucursal(eerr, "A")
+        mostrar_eerr_sucursal(eerr, "B")
+
+    volcado = io.StringIO()
+    assert volcar_eerr_todas(eerr, volcado) == 2
+    assert volcado.getvalue() == esperado.getvalue()
+    assert "2025-01 |  2025-02" in volcado.getvalue()
+
+
+def test_dump_all_cli_skips_html_and_writes_only_the_dump(
+    monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    fila = {clave: 1_000.0 for clave in CONSOLE_METRICS}
+    fila.update({"Sucursal": "A", "Mes": pd.Timestamp("2025-01-01")})
+    eerr = pd.DataFrame([fila])
+
+    def sin_reportes(*_args, **_kwargs):
+        raise AssertionError("--dump-all no debe generar los HTML")
+
+    monkeypatch.setattr(cli_main, "generate_reports", sin_reportes)
+    monkeypatch.setattr(cli_main, "load_eerr", lambda *_args, **_kwargs: eerr)
+    monkeypatch.setattr("sys.argv", ["ynk-eerr", "--dump-all"])
+    cli_main.main()
+
+    esperado = io.StringIO()
+    volcar_eerr_todas(eerr, esperado)
+    assert capsys.readouterr().out == esperado.getvalue()
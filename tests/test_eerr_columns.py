@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from ynk_modelo.config import METRIC_CONFIG
+from ynk_modelo.domain.eerr import eerr_cubo, eerr_en_columnas, etiquetas_mes
+
+
+def _eerr() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Sucursal": ["B", "A", "A", "B", "C"],
+            "Banner": ["X", "X", "X", "X", None],
+            "Mes": pd.to_datetime(["2025-02-01", "2025-01-01", "2025-02-01", "2025-01-01", "2025-01-01"]),
+            "Venta": [20.0, 1.0, np.nan, 10.0, 5.0],
+            "EBITDA": [2.0, np.nan, 3.0, 1.0, 0.5],
+        }
+    )
+
+
+def test_month_labels_are_vectorized() -> None:
+    meses = pd.to_datetime(["2025-01-01", "2026-12-01"])
+    assert etiquetas_mes(meses).tolist() == ["2025-01", "2026-12"]
+
+
+def test_cube_is_sorted_by_store_and_month() -> None:
+    cubo, tiendas, meses, metricas = eerr_cubo(_eerr(), ["Venta", "EBITDA"])
+    assert cubo.shape == (2, 2, 2)
+    assert list(tiendas) == [("A", "X"), ("B", "X")]
+    assert etiquetas_mes(meses).tolist() == ["2025-01", "2025-02"]
+    assert metricas == ["Venta", "EBITDA"]
+    assert cubo[1, 1].tolist() == [20.0, 2.0]
+    assert np.isnan(cubo[0, 1, 0])
+
+
+def test_columns_match_pivot_table() -> None:
+    eerr = _eerr()
+    metricas = sorted(clave for clave, _, _ in METRIC_CONFIG)
+    for posicion, clave in enumerate(metricas):
+        if clave not in eerr:
+            eerr[clave] = eerr["Venta"] * posicion
+    esperado = eerr.pivot_table(index=["Sucursal", "Banner"], columns="Mes", values=metricas, aggfunc="first")
+    esperado = esperado.swaplevel(0, 1, axis=1).sort_index(axis=1, level=0)
+    esperado.columns = pd.MultiIndex.from_tuples(
+        [(mes.strftime("%Y-%m"), cuenta) for mes, cuenta in esperado.columns], names=["Mes", "Cuenta"]
+    )
+
+    tabla = eerr_en_columnas(eerr)
+    pd.testing.assert_frame_equal(tabla, esperado.sort_index())
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ynk_modelo.domain import eerr as eerr_module
+from ynk_modelo.domain.eerr import _aplicar_plan, _plan_union
+
+
+def _tablas() -> dict[str, pd.DataFrame]:
+    meses = pd.to_datetime(["2025-01-01", "2025-02-01", "2025-01-01", "2025-01-01"])
+    return {
+        "ventas": pd.DataFrame(
+            {"Sucursal": ["A", "A", "B", "C"], "Mes": meses, "Escenario": "Real", "Ventas": [1.0, 2.0, 3.0, 4.0]}
+        ),
+        "contrib": pd.DataFrame(
+            {
+                "Sucursal": ["A", "A", "B"],
+                "Mes": pd.to_datetime(["2025-01-01", "2025-01-01", "2025-01-01"]),
+                "Margen_pct": [0.4, 0.5, 0.3],
+                "Escenario": "Real",
+            }
+        ),
+        "diccionario": pd.DataFrame({"Sucursal": ["B", "A"], "Banner": ["Y", "X"]}),
+        "staff": pd.DataFrame({"Sucursal": ["A", "B", "B"], "Costo_dotacion_fijo": [10, 20, 30]}),
+        "arriendo": pd.DataFrame({"Sucursal": ["C"], "Arriendo_GGCC": [5.0]}),
+        "otros": pd.DataFrame({"Banner": ["X", "Z"], "Total otros costos": [0.1, 0.2]}),
+        "medio_pago": pd.DataFrame({"Banner": ["Y"], "Comision_medio_pago": [0.01]}),
+    }
+
+
+def test_join_plan_matches_merge_chain() -> None:
+    tablas = _tablas()
+    esperado = tablas["ventas"].merge(tablas["contrib"], how="left", on=["Sucursal", "Mes", "Escenario"])
+    esperado = esperado.merge(tablas["diccionario"], how="left", on="Sucursal")
+    esperado = esperado.merge(tablas["staff"], how="left", on="Sucursal")
+    esperado = esperado.merge(tablas["arriendo"], how="left", on="Sucursal")
+    esperado = esperado.merge(tablas["otros"], how="left", on="Banner")
+    esperado = esperado.merge(tablas["medio_pago"], how="left", on="Banner")
+
+    plan = _plan_union(tablas)
+    assert plan["ventas"].tolist() == [0, 0, 1, 2, 2, 3]
+    assert plan["staff"].tolist() == [0, 0, 0, 1, 2, -1]
+    pd.testing.assert_frame_equal(_aplicar_plan(tablas, plan), esperado)
+
+
+def test_join_plan_handles_missing_attribute_tables() -> None:
+    tablas = _tablas()
+    tablas["staff"] = tablas["staff"].iloc[:0]
+    plan = _plan_union(tablas)
+    assert np.all(plan["staff"] == -1)
+    assert _aplicar_plan(tablas, plan)["Costo_dotacion_fijo"].isna().all()
+
+
+def test_sequential_build_resolves_join_plan_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    llamadas: list[int] = []
+
+    def plan_contado(tablas):
+        llamadas.append(1)
+        return _plan_union(tablas)
+
+    monkeypatch.setattr(eerr_module, "_plan_union", plan_contado)
+    eerr_module.build_eerr(workers=1)
+    assert len(llamadas) == 1
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ynk_modelo.domain import eerr as eerr_module
+from ynk_modelo.domain.eerr import build_eerr
+from ynk_modelo.io import excel
+
+LOADERS = (
+    "load_sales",
+    "load_contribution",
+    "load_staff_costs",
+    "load_rent",
+    "load_other_costs",
+    "load_payment_commission",
+    "load_dictionary",
+)
+
+
+@pytest.fixture
+def portafolio_irregular(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    """Portafolio real recortado con banners desparejos y meses faltantes por tienda."""
+    tablas = {nombre: getattr(excel, nombre)() for nombre in LOADERS}
+    ventas = tablas["load_sales"]
+    diccionario = tablas["load_dictionary"]
+    banners = diccionario.dropna(subset=["Sucursal"]).groupby("Sucursal")["Banner"].first()
+    con_banner = banners.reindex(pd.unique(ventas["Sucursal"])).dropna()
+
+    # Banners con 6, 3, 1 y 1 tiendas.
+    tiendas: list[str] = []
+    grupos = sorted(con_banner.groupby(con_banner), key=lambda grupo: -len(grupo[1]))
+    for tamano, (_, grupo) in zip((6, 3, 1, 1), grupos):
+        tiendas.extend(grupo.index[:tamano])
+    sin_diccionario, cerrada, sin_arriendo = tiendas[1], tiendas[7], tiendas[9]
+
+    rng = np.random.default_rng(7)
+    ventas = ventas[ventas["Sucursal"].isin(tiendas)].reset_index(drop=True)
+    ventas = ventas[rng.random(len(ventas)) > 0.2].reset_index(drop=True)
+    ventas.loc[ventas["Sucursal"].eq(cerrada), "Ventas"] = 0.0
+    contrib = tablas["load_contribution"]
+    contrib = contrib[contrib["Sucursal"].isin(tiendas)]
+    contrib = contrib[rng.random(len(contrib)) > 0.3].reset_index(drop=True)
+    staff = tablas["load_staff_costs"]
+    staff = staff[staff["Sucursal"].isin(tiendas)]
+    staff = pd.concat([staff, staff[staff["Sucursal"].eq(tiendas[0])]], ignore_index=True)
+    arriendo = tablas["load_rent"]
+    arriendo = arriendo[arriendo["Sucursal"].isin(tiendas) & arriendo["Sucursal"].ne(sin_arriendo)]
+    diccionario = diccionario[diccionario["Sucursal"].ne(sin_diccionario)]
+
+    recortadas = {
+        "load_sales": ventas,
+        "load_contribution": contrib,
+        "load_staff_costs": staff.reset_index(drop=True),
+        "load_rent": arriendo.reset_index(drop=True),
+        "load_other_costs": tablas["load_other_costs"],
+        "load_payment_commission": tablas["load_payment_commission"],
+        "load_dictionary": diccionario.reset_index(drop=True),
+    }
+    for nombre, tabla in recortadas.items():
+        monkeypatch.setattr(eerr_module, nombre, lambda tabla=tabla: tabla.copy())
+    return tiendas
+
+
+@pytest.mark.parametrize("particion", ["banner", "tienda"])
+def test_parallel_eerr_matches_sequential(particion: str) -> None:
+    secuencial = build_eerr(workers=1)
+    paralelo = build_eerr(workers=2, particion=particion)
+    pd.testing.assert_frame_equal(paralelo, secuencial)
+
+
+@pytest.mark.parametrize(("particion", "workers"), [("banner", 2), ("tienda", 3)])
+def test_parallel_eerr_matches_sequential_with_uneven_shards(
+    portafolio_irregular: list[str], particion: str, workers: int
+) -> None:
+    entradas = eerr_module._cargar_entradas_eerr()
+    shards = eerr_module._shards_eerr(entradas, workers, particion)
+    assert len(shards) > 1
+    assert len({len(shard) for shard in shards}) > 1
+    if particion == "banner":
+        assert len(shards) > workers
+
+    secuencial = build_eerr(workers=1)
+    paralelo = build_eerr(workers=workers, particion=particion)
+    assert set(paralelo["Sucursal"]) == set(portafolio_irregular)
+    pd.testing.assert_frame_equal(paralelo, secuencial, check_dtype=True, check_column_type=True)
+
+
+def test_unknown_sharding_raises() -> None:
+    with pytest.raises(ValueError):
+        build_eerr(workers=2, particion="region")
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from ynk_modelo.domain.eerr import ebitda_margin_grid, heatmap_structure_arrays
+from ynk_modelo.interfaces.heatmap import (
+    axes_from_params,
+    heatmap_axis,
+    stores_heatmap,
+    structure_heatmap,
+)
+from ynk_modelo.interfaces.store_payload import store_payload_path, write_store_payload
+
+ESTRUCTURA = {
+    "dotacion_fijo": 7_460_695.0,
+    "tasa_por_vendedor": 0.011,
+    "tasa_total_ventas": 0.018,
+    "otros_costos_rate": 0.029,
+    "arriendo_minimo": 21_005_253.0,
+    "arriendo_porcentual": 0.08,
+    "fondo_promocion_pct": 0.1,
+    "arriendo_ggcc": 714_571.0,
+    "network_systems_cost": 250_000.0,
+    "payment_commission_rate": 0.012,
+}
+
+
+def _margen_ebitda_js(estructura: dict[str, float], venta: float, margen: float) -> float:
+    """Traducción literal de ``computeEbitdaMarginForHeatmap`` del simulador."""
+    e = {clave: estructura.get(clave) or 0 for clave in ESTRUCTURA}
+    comisiones = venta * e["tasa_por_vendedor"] + venta * e["tasa_total_ventas"]
+    base = max(e["arriendo_minimo"], venta * e["arriendo_porcentual"])
+    variable = max(0, base - e["arriendo_minimo"])
+    arriendo = e["arriendo_minimo"] + variable + base * e["fondo_promocion_pct"] + e["arriendo_ggcc"]
+    gasto = (
+        e["dotacion_fijo"]
+        + comisiones
+        + arriendo
+        + e["network_systems_cost"]
+        + venta * e["payment_commission_rate"]
+        + venta * e["otros_costos_rate"]
+    )
+    if venta <= 0:
+        return 0
+    return (venta * margen - gasto) / venta * 100
+
+
+def test_vectorized_grid_matches_simulator_formula_across_rent_threshold() -> None:
+    # El umbral de arriendo variable queda dentro del eje de ventas.
+    ventas = heatmap_axis(0.0, 600_000_000.0, 25_000_000.0)
+    margenes = heatmap_axis(0.2, 0.5, 0.01)
+    sin_arriendo = {**ESTRUCTURA, "arriendo_porcentual": None}
+
+    grilla = ebitda_margin_grid(heatmap_structure_arrays([ESTRUCTURA, sin_arriendo]), ventas, margenes)
+
+    assert grilla.shape == (2, len(ventas), len(margenes))
+    for indice, estructura in enumerate((ESTRUCTURA, sin_arriendo)):
+        esperado = [[_margen_ebitda_js(estructura, v, m) for m in margenes] for v in ventas]
+        np.testing.assert_allclose(grilla[indice], esperado, rtol=0, atol=1e-9)
+
+
+def test_heatmap_axis_follows_simulator_build_range() -> None:
+    np.testing.assert_allclose(heatmap_axis(10.0, 12.0, 1.0, 5), [10.0, 11.0, 12.0, 12.0, 12.0])
+    np.testing.assert_allclose(heatmap_axis(0.0, 1.0, 0.25), [0.0, 0.25, 0.5, 0.75, 1.0])
+    np.testing.assert_allclose(heatmap_axis(0.0, 1.0, 0.0, 3), [0.0, 0.5, 1.0])
+    with pytest.raises(ValueError):
+        axes_from_params({"sales_levels": "mucho"})
+
+
+def test_store_grids_are_cached_per_axes_and_data_version(tmp_path: Path) -> None:
+    salida = tmp_path / "EERR_por_tienda.html"
+    rango = {"sales_min": 1e7, "sales_max": 5e7, "default_sale_step": 1e7, "margin_min": 0.3, "margin_max": 0.4}
+    fichas = {
+        "A-1": {"heatmap": {"structure": ESTRUCTURA, "range": rango}},
+        "B-1": {"heatmap": {"structure": {**ESTRUCTURA, "dotacion_fijo": 0.0}, "range": rango}},
+    }
+    write_store_payload(salida, fichas)
+    ruta = store_payload_path(salida)
+
+    params = {"sales_min": "10000000", "sales_step": "5000000", "sales_levels": "4", "margin_levels": "3"}
+    grillas = stores_heatmap(ruta, None, params)
+    assert list(grillas) == ["A-1", "B-1"]
+    assert grillas["A-1"]["sales"] == [10_000_000.0, 15_000_000.0, 20_000_000.0, 25_000_000.0]
+    assert stores_heatmap(ruta, ["A-1"], params)["A-1"] is grillas["A-1"]
+    assert stores_heatmap(ruta, ["A-1"])["A-1"]["sales"] == [1e7, 2e7, 3e7, 4e7, 5e7]
+
+    en_vivo = structure_heatmap(ESTRUCTURA, grillas["A-1"]["sales"], grillas["A-1"]["margins"])
+    assert en_vivo["ebitda_margin"] == grillas["A-1"]["ebitda_margin"]
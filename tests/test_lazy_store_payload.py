@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from ynk_modelo.config import BUDGET_SCENARIO, METRIC_CONFIG, REAL_SCENARIO
+from ynk_modelo.interfaces.state_report import build_html_interface
+from ynk_modelo.interfaces.store_payload import (
+    PAYLOAD_FORMAT,
+    available_years,
+    encode_eerr_store,
+    load_store_payload,
+    chunk_hash,
+    load_store_manifest,
+    select_stores,
+    store_changes,
+    store_payload_path,
+    write_store_payload,
+)
+
+
+def _eerr() -> pd.DataFrame:
+    filas = []
+    for tienda, banner in (("A-1", "Alfa"), ("B-1", "Beta")):
+        for mes in ("2024-12-01", "2025-01-01"):
+            fila: dict[str, object] = {clave: 100.0 for clave, _, _ in METRIC_CONFIG}
+            fila.update(
+                {
+                    "Sucursal": tienda,
+                    "Banner": banner,
+                    "Mes": pd.Timestamp(mes),
+                    "Escenario": REAL_SCENARIO,
+                    "Es_presupuesto": False,
+                }
+            )
+            filas.append(fila)
+    return pd.DataFrame(filas)
+
+
+def test_lazy_shell_ships_index_and_artifact_holds_store_data(tmp_path: Path) -> None:
+    salida = tmp_path / "EERR_por_tienda.html"
+    store_data, _, _ = build_html_interface(_eerr(), salida, lazy=True)
+
+    html = salida.read_text(encoding="utf-8")
+    assert "const storeData = {};" in html
+    assert 'const STORE_DATA_URL = "/api/eerr/stores";' in html
+    assert 'const storeIndex = {"A-1": "Alfa", "B-1": "Beta"};' in html
+    assert '"rent_details"' not in html
+
+    artefacto = load_store_payload(store_payload_path(salida))
+    assert list(artefacto) == list(store_data)
+    assert artefacto["A-1"]["format"] == PAYLOAD_FORMAT
+    assert list(select_stores(artefacto, ["B-1", "Z", "B-1"])) == ["B-1"]
+    assert available_years(store_data) == {"all": ["2024", "2025"], "real": ["2024", "2025"]}
+
+    build_html_interface(_eerr(), salida, lazy=False)
+    assert "const STORE_DATA_URL = null;" in salida.read_text(encoding="utf-8")
+
+
+def test_load_store_payload_reloads_when_artifact_changes(tmp_path: Path) -> None:
+    salida = tmp_path / "Simulador_EERR.html"
+    write_store_payload(salida, {"A-1": {"banner": "Alfa"}})
+    ruta = store_payload_path(salida)
+    primera = load_store_payload(ruta)
+    assert load_store_payload(ruta) is primera
+
+    write_store_payload(salida, {"A-1": {"banner": "Alfa"}, "B-1": {"banner": "Beta"}})
+    estado = ruta.stat()
+    os.utime(ruta, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000))
+    assert sorted(load_store_payload(ruta)) == ["A-1", "B-1"]
+
+
+def test_store_changes_returns_only_chunks_changed_since_client_version(tmp_path: Path) -> None:
+    salida = tmp_path / "EERR_por_tienda.html"
+    v1 = write_store_payload(salida, {"A-1": {"v": 1}, "B-1": {"v": 1}, "C-1": {"v": 1}})
+    assert store_changes(salida, v1) == {"version": v1, "full": False, "changed": {}, "removed": []}
+
+    v2 = write_store_payload(salida, {"A-1": {"v": 1}, "B-1": {"v": 2}})
+    manifiesto = load_store_manifest(salida)
+    assert manifiesto["version"] == v2 != v1
+    assert manifiesto["stores"]["B-1"] == chunk_hash({"v": 2})
+    assert [entrada["version"] for entrada in manifiesto["history"]] == [v1]
+
+    assert store_changes(salida, v1) == {
+        "version": v2,
+        "full": False,
+        "changed": {"B-1": {"v": 2}},
+        "removed": ["C-1"],
+    }
+    assert store_changes(salida, v1, ["A-1"])["changed"] == {}
+
+    desconocida = store_changes(salida, "otra", ["A-1", "C-1"])
+    assert desconocida["full"] is True
+    assert desconocida["changed"] == {"A-1": {"v": 1}}
+    assert desconocida["removed"] == ["C-1"]
+
+
+def test_columnar_encoding_quantizes_and_shrinks_store_data() -> None:
+    meses = [f"2025-{mes:02d}" for mes in range(1, 13)]
+    tipos = {mes: REAL_SCENARIO if indice < 9 else BUDGET_SCENARIO for indice, mes in enumerate(meses)}
+    valores = {
+        clave: {mes: (indice + 1) * 1_234_567.891234 + posicion / 7 for indice, mes in enumerate(meses)}
+        for posicion, (clave, _, _) in enumerate(METRIC_CONFIG)
+    }
+    valores["EBITDA"][meses[0]] = math.nan
+    escenarios = {
+        escenario: {
+            clave: {mes: por_mes[mes] for mes in meses if tipos[mes] == escenario}
+            for clave, por_mes in valores.items()
+        }
+        for escenario in (REAL_SCENARIO, BUDGET_SCENARIO)
+    }
+    datos = {
+        "banner": "Alfa",
+        "months": meses,
+        "values": valores,
+        "scenarios": escenarios,
+        "month_types": tipos,
+        "heatmap": None,
+        "ebitda": {mes: valores["EBITDA"][mes] for mes in meses},
+        "rent_details": {"vmm_uf": math.nan, "uf_by_month": {mes: 38_413.0528 for mes in meses}},
+    }
+
+    ficha = encode_eerr_store(datos)
+
+    ventas = ficha["values"][[clave for clave, _, _ in METRIC_CONFIG].index("Venta")]
+    assert ventas[0] == 1_234_568
+    assert ficha["values"][[clave for clave, _, _ in METRIC_CONFIG].index("EBITDA")][0] is None
+    assert ficha["types"] == [0] * 9 + [1] * 3
+    assert ficha["scenarios"] == {REAL_SCENARIO: list(range(9)), BUDGET_SCENARIO: [9, 10, 11]}
+    assert ficha["rent_details"] == {
+        "vmm_uf": None,
+        "uf_by_month": [38_413.05] * 12,
+        "thresholds_by_month": [],
+    }
+    assert "ebitda" not in ficha
+
+    original = json.dumps(datos, ensure_ascii=False)
+    compacta = json.dumps(ficha, ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+    assert len(original) >= 5 * len(compacta)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from ynk_modelo.database import db as db_module
+from ynk_modelo.utils import metrics
+from ynk_modelo.utils.metrics import MetricsRegistry
+
+
+def test_registry_merges_thread_shards_and_snapshots() -> None:
+    registro = MetricsRegistry()
+    registro.counter("x_total", "Contador de prueba.")
+    registro.histogram("x_seconds", "Histograma de prueba.", (0.1, 1.0))
+
+    def trabajar() -> None:
+        for _ in range(100):
+            registro.inc("x_total", (("endpoint", "a"),))
+        registro.observe("x_seconds", (("endpoint", "a"),), 0.5)
+
+    hilos = [threading.Thread(target=trabajar) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    registro.observe("x_seconds", (("endpoint", "a"),), 0.05)
+
+    texto = registro.render([registro.snapshot()])
+    assert 'x_total{endpoint="a"} 800' in texto
+    assert 'x_seconds_bucket{endpoint="a",le="0.1"} 2' in texto
+    assert 'x_seconds_bucket{endpoint="a",le="1"} 10' in texto
+    assert 'x_seconds_bucket{endpoint="a",le="+Inf"} 10' in texto
+    assert 'x_seconds_count{endpoint="a"} 10' in texto
+    assert "# TYPE x_seconds histogram" in texto
+
+
+def test_request_metrics_count_db_queries(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(db_module, "DB_PATH", tmp_path / "metricas.db")
+    monkeypatch.setattr(db_module, "_query_observer", metrics.observe_query)
+
+    metrics.start_request()
+    conn = db_module.get_db()
+    conn.execute("CREATE TABLE t (v INTEGER)")
+    conn.cursor().executemany("INSERT INTO t VALUES (?)", [(1,), (2,)])
+    conn.close()
+    metrics.finish_request("prueba_metricas", "GET", 200, 123)
+
+    texto = metrics.REGISTRY.render()
+    assert 'ynk_db_queries_total{endpoint="prueba_metricas"} 2' in texto
+    assert 'ynk_http_requests_total{endpoint="prueba_metricas",method="GET",status="200"} 1' in texto
+    assert 'ynk_http_response_bytes_total{endpoint="prueba_metricas"} 123' in texto
+
+
+def test_dead_worker_snapshots_are_folded_into_retired(tmp_path: Path) -> None:
+    registro = MetricsRegistry()
+    registro.counter("x_total", "Contador de prueba.")
+    registro.inc("x_total", (("endpoint", "a"),), 5)
+    instantanea = registro.snapshot()
+
+    terminados = []
+    for _ in range(2):
+        proceso = subprocess.Popen([sys.executable, "-c", "pass"])
+        proceso.wait()
+        terminados.append(proceso.pid)
+    for pid in terminados:
+        (tmp_path / f"worker-{pid}.json").write_text(json.dumps(instantanea), encoding="utf-8")
+    metrics.write_snapshot(metrics.snapshot_path(tmp_path))
+
+    assert metrics.retire_dead_snapshots(tmp_path) == 2
+    assert metrics.retire_dead_snapshots(tmp_path) == 0
+    assert sorted(p.name for p in tmp_path.glob("*.json")) == sorted(
+        [metrics.RETIRED_SNAPSHOT, metrics.snapshot_path(tmp_path).name]
+    )
+    retirado = json.loads((tmp_path / metrics.RETIRED_SNAPSHOT).read_text(encoding="utf-8"))
+    vacio = MetricsRegistry()
+    vacio.counter("x_total", "Contador de prueba.")
+    assert 'x_total{endpoint="a"} 10' in vacio.render([retirado])
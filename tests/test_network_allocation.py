@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ynk_modelo.cli import main as cli_main
+from ynk_modelo.domain.eerr import build_eerr
+from ynk_modelo.domain.network import (
+    allocate_network_costs,
+    network_cost_by_store,
+    reallocate_network_costs,
+)
+
+PARAMS = {"gasto_mensual": 1_000.0, "pct_retail": 0.5}
+
+
+def _ventas() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Sucursal": ["A", "B", "C", "A", "B", "C"],
+            "Mes": pd.to_datetime(["2025-01-01"] * 3 + ["2025-02-01"] * 3),
+            "Ventas": [100.0, 300.0, 0.0, 50.0, 50.0, 100.0],
+        }
+    )
+
+
+def test_equal_policy_keeps_historic_share() -> None:
+    asignado = allocate_network_costs(_ventas(), "equal", PARAMS)
+    assert asignado.tolist() == pytest.approx([500.0 / 3] * 6)
+
+
+def test_sales_policy_splits_pool_by_month() -> None:
+    ventas = _ventas()
+    asignado = allocate_network_costs(ventas, "sales", PARAMS)
+    assert asignado.tolist() == pytest.approx([125.0, 375.0, 0.0, 125.0, 125.0, 250.0])
+    por_mes = asignado.groupby(ventas["Mes"]).sum()
+    assert all(math.isclose(total, 500.0) for total in por_mes)
+
+
+def test_m2_policy_ignores_closed_stores_and_falls_back_to_equal() -> None:
+    superficies = pd.Series({"A": 100.0, "B": 300.0, "C": 600.0})
+    asignado = allocate_network_costs(_ventas(), "m2", PARAMS, superficies)
+    assert asignado.tolist() == pytest.approx([125.0, 375.0, 0.0, 50.0, 150.0, 300.0])
+
+    sin_superficie = allocate_network_costs(_ventas(), "m2", PARAMS, pd.Series(dtype=float))
+    assert sin_superficie.tolist() == pytest.approx([250.0, 250.0, 0.0, 500.0 / 3, 500.0 / 3, 500.0 / 3])
+
+
+def test_network_cost_by_store_fills_stores_without_sales() -> None:
+    costos = network_cost_by_store(_ventas(), ["A", "Z"], "sales", PARAMS)
+    assert costos["A"] == pytest.approx(125.0)
+    assert costos["Z"] == pytest.approx(500.0 / 3)
+
+
+def test_reallocate_only_touches_network_dependents() -> None:
+    eerr = pd.DataFrame(
+        {
+            "Sucursal": ["A", "B", "A"],
+            "Mes": pd.to_datetime(["2025-01-01", "2025-01-01", "2025-02-01"]),
+            "Venta": [100.0, 300.0, 0.0],
+            "Contribucion": [40.0, 120.0, 0.0],
+            "Redes_sistemas": [250.0, 250.0, 0.0],
+            "Gastos_operacionales": [260.0, 270.0, 0.0],
+            "EBITDA": [-220.0, -150.0, 0.0],
+            "Margen_EBITDA": [-220.0, -50.0, 0.0],
+        }
+    )
+    resultado = reallocate_network_costs(eerr, "sales", PARAMS)
+
+    assert resultado["Redes_sistemas"].tolist() == pytest.approx([125.0, 375.0, 0.0])
+    assert resultado["Gastos_operacionales"].tolist() == pytest.approx([135.0, 395.0, 0.0])
+    assert resultado["EBITDA"].tolist() == pytest.approx([-95.0, -275.0, 0.0])
+    assert resultado["Margen_EBITDA"].tolist() == pytest.approx([-95.0, -275.0 / 3, 0.0])
+    pd.testing.assert_series_equal(resultado["Contribucion"], eerr["Contribucion"])
+
+
+def test_reallocate_clears_stale_cost_on_closed_rows() -> None:
+    eerr = pd.DataFrame(
+        {
+            "Sucursal": ["A", "B", "B"],
+            "Mes": pd.to_datetime(["2025-01-01", "2025-01-01", "2025-02-01"]),
+            "Venta": [100.0, 0.0, np.nan],
+            "Redes_sistemas": [250.0, 250.0, np.nan],
+            "Gastos_operacionales": [260.0, 250.0, np.nan],
+            "EBITDA": [-220.0, -250.0, np.nan],
+            "Margen_EBITDA": [-220.0, 0.0, np.nan],
+        }
+    )
+    resultado = reallocate_network_costs(eerr, "sales", PARAMS)
+
+    assert resultado["Redes_sistemas"].tolist()[:2] == pytest.approx([500.0, 0.0])
+    assert resultado["EBITDA"].tolist()[:2] == pytest.approx([-470.0, 0.0])
+    assert resultado.iloc[2, 2:].isna().all()
+
+
+@pytest.mark.parametrize(("origen", "destino"), [("sales", "equal"), ("equal", "m2")])
+def test_reallocate_matches_fresh_build(origen: str, destino: str) -> None:
+    columnas = ["Redes_sistemas", "Gastos_operacionales", "EBITDA", "Margen_EBITDA"]
+    reasignado = reallocate_network_costs(build_eerr(politica_redes=origen), destino)
+    fresco = build_eerr(politica_redes=destino)
+    pd.testing.assert_frame_equal(reasignado[columnas], fresco[columnas], check_dtype=False)
+
+
+def test_cached_eerr_only_reallocates_network_cost(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = tmp_path / "eerr.pkl"
+    columnas = ["Redes_sistemas", "Gastos_operacionales", "EBITDA", "Margen_EBITDA"]
+    base = cli_main.load_eerr("sales", cache=cache)
+    assert cache.exists()
+
+    def sin_build(*_args, **_kwargs):
+        raise AssertionError("build_eerr no debe ejecutarse con el caché vigente")
+
+    monkeypatch.setattr(cli_main, "build_eerr", sin_build)
+    pd.testing.assert_frame_equal(cli_main.load_eerr("sales", cache=cache), base)
+    reasignado = cli_main.load_eerr("equal", cache=cache)
+    monkeypatch.undo()
+
+    fresco = build_eerr(politica_redes="equal")
+    pd.testing.assert_frame_equal(reasignado[columnas], fresco[columnas], check_dtype=False)
+
+
+def test_consolidated_export_sums_stores_by_month(tmp_path: Path) -> None:
+    eerr = build_eerr()
+    destino = cli_main.export_consolidated_eerr(eerr, tmp_path / "consolidado.csv")
+    consolidado = pd.read_csv(destino)
+
+    assert consolidado["Mes"].tolist() == sorted(consolidado["Mes"])
+    assert consolidado["EBITDA"].sum() == pytest.approx(eerr["EBITDA"].sum())
+
+
+def test_unknown_policy_raises() -> None:
+    with pytest.raises(ValueError):
+        allocate_network_costs(_ventas(), "hash", PARAMS)
+
+
+def test_cached_eerr_is_ignored_after_a_code_change(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = tmp_path / "eerr.pkl"
+    cli_main.load_eerr("equal", cache=cache)
+
+    llamadas: list[str] = []
+    monkeypatch.setattr(cli_main, "code_version", lambda: "otro-codigo")
+    monkeypatch.setattr(cli_main, "build_eerr", lambda politica, **_kwargs: llamadas.append(politica) or pd.DataFrame())
+    cli_main.load_eerr("equal", cache=cache)
+    assert llamadas == ["equal"]
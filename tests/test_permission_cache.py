@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from ynk_modelo.database import db as db_module
+from ynk_modelo.database import models
+from ynk_modelo.database.db import init_db
+from ynk_modelo.database.models import Permission, Role, User, UserRole
+
+
+def setup_temp_db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    monkeypatch.setattr(db_module, "DB_PATH", tmp_path / "test_permisos.db")
+    init_db()
+    conexiones: list[int] = []
+
+    def get_db_contado():
+        conexiones.append(1)
+        return db_module.get_db()
+
+    monkeypatch.setattr(models, "get_db", get_db_contado)
+    return conexiones
+
+
+def test_permission_set_is_cached_until_roles_change(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    conexiones = setup_temp_db(tmp_path, monkeypatch)
+    usuario = User.create("analista", "clave-segura", "Analista")
+    rol = Role.create("lector")
+    reporte = Permission.get_by_name("access_eerr_report")
+    simulador = Permission.get_by_name("access_simulator")
+    rol.set_permissions([reporte.id])
+    UserRole.assign(usuario.id, rol.id)
+
+    assert usuario.get_permissions() == frozenset({"access_eerr_report"})
+    conexiones.clear()
+    for _ in range(50):
+        assert usuario.has_permission("access_eerr_report")
+        assert not usuario.has_permission("access_simulator")
+    assert conexiones == []
+
+    rol.set_permissions([reporte.id, simulador.id])
+    assert usuario.has_permission("access_simulator")
+
+    UserRole.remove(usuario.id, rol.id)
+    assert usuario.get_permissions() == frozenset()
+
+
+def test_cached_user_loader_is_invalidated_by_edits(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    conexiones = setup_temp_db(tmp_path, monkeypatch)
+    usuario = User.create("cajero", "clave-segura", "Cajero")
+
+    assert User.get_cached(usuario.id).full_name == "Cajero"
+    conexiones.clear()
+    for _ in range(20):
+        assert User.get_cached(usuario.id).username == "cajero"
+    assert conexiones == []
+
+    usuario.full_name = "Cajero Jefe"
+    usuario.is_active = False
+    usuario.update()
+    recargado = User.get_cached(usuario.id)
+    assert recargado.full_name == "Cajero Jefe"
+    assert not recargado.is_active
+
+    usuario.delete()
+    assert User.get_cached(usuario.id) is None
+
+
+def test_cached_user_sees_edits_from_other_processes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    setup_temp_db(tmp_path, monkeypatch)
+    usuario = User.create("vendedor", "clave-segura", "Vendedor")
+    assert User.get_cached(usuario.id).is_active
+
+    # Edición hecha por otro worker a través del modelo.
+    script = (
+        "import sys\n"
+        "from pathlib import Path\n"
+        "from ynk_modelo.database import db\n"
+        "from ynk_modelo.database.models import User\n"
+        "db.DB_PATH = Path(sys.argv[1])\n"
+        "usuario = User.get_by_id(int(sys.argv[2]))\n"
+        "usuario.is_active = False\n"
+        "usuario.update()\n"
+    )
+    entorno = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    subprocess.run(
+        [sys.executable, "-c", script, str(db_module.DB_PATH), str(usuario.id)],
+        check=True,
+        env=entorno,
+    )
+
+    assert not User.get_cached(usuario.id).is_active
+
+
+def test_unrelated_writes_keep_cached_users_and_permissions(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    conexiones = setup_temp_db(tmp_path, monkeypatch)
+    usuario = User.create("supervisor", "clave-segura", "Supervisor")
+    UserRole.assign(usuario.id, Role.get_by_name("admin").id)
+    assert User.get_cached(usuario.id) is not None
+    assert usuario.has_permission("access_eerr_report")
+
+    conn = sqlite3.connect(db_module.DB_PATH)
+    conn.execute("UPDATE feature_flags SET is_enabled = 0")
+    conn.commit()
+    conn.close()
+
+    conexiones.clear()
+    assert User.get_cached(usuario.id).username == "supervisor"
+    assert usuario.has_permission("access_eerr_report")
+    assert conexiones == []
+
+
+def test_permission_sets_evict_least_recently_used(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    setup_temp_db(tmp_path, monkeypatch)
+    monkeypatch.setattr(models, "_PERMISSION_SETS_MAX", 2)
+    usuarios = [User.create(f"usuario{i}", "clave-segura", f"Usuario {i}") for i in range(3)]
+
+    usuarios[0].get_permissions()
+    usuarios[1].get_permissions()
+    usuarios[0].get_permissions()
+    usuarios[2].get_permissions()
+
+    guardados = {usuario_id for _, usuario_id in models._PERMISSION_SETS}
+    assert guardados == {usuarios[0].id, usuarios[2].id}
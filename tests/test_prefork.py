@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from ynk_modelo.utils.prefork import PooledWSGIServer
+
+
+def test_pooled_server_serves_concurrently_and_drains_on_close() -> None:
+    ultima_recibida = threading.Event()
+
+    def app(environ, start_response):
+        if environ["PATH_INFO"] == "/ultima":
+            ultima_recibida.set()
+        time.sleep(0.3)
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return [environ["PATH_INFO"].encode()]
+
+    servidor = PooledWSGIServer("127.0.0.1", 0, app, threads=4)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    url = f"http://127.0.0.1:{servidor.port}"
+
+    inicio = time.monotonic()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        respuestas = list(pool.map(lambda i: urllib.request.urlopen(f"{url}/{i}").read(), range(4)))
+    assert respuestas == [f"/{i}".encode() for i in range(4)]
+    assert time.monotonic() - inicio < 1.0
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pendiente = pool.submit(lambda: urllib.request.urlopen(f"{url}/ultima").read())
+        assert ultima_recibida.wait(timeout=5)
+        servidor.shutdown()
+        hilo.join(timeout=5)
+        assert pendiente.result(timeout=5) == b"/ultima"
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from ynk_modelo.cli import main as cli_main
+from ynk_modelo.utils.file_watcher import FileWatcher
+from ynk_modelo.utils.regeneration import RegenerationCoordinator
+
+
+def test_concurrent_callers_share_one_build_per_version(tmp_path: Path) -> None:
+    salida = tmp_path / "reporte.html"
+    coordinador = RegenerationCoordinator(tmp_path, [salida])
+    llamadas: list[str] = []
+
+    def generar() -> None:
+        llamadas.append("v1")
+        time.sleep(0.2)
+        salida.write_text("ok", encoding="utf-8")
+
+    resultados: list[bool] = []
+    hilos = [
+        threading.Thread(target=lambda: resultados.append(coordinador.run("v1", generar)))
+        for _ in range(5)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(5)
+
+    assert llamadas == ["v1"]
+    assert sorted(resultados) == [False, False, False, False, True]
+    assert coordinador.published_version() == "v1"
+
+
+def test_other_process_skips_published_version_unless_outputs_are_missing(tmp_path: Path) -> None:
+    salida = tmp_path / "reporte.html"
+    llamadas: list[int] = []
+
+    def generar() -> None:
+        llamadas.append(1)
+        salida.write_text("ok", encoding="utf-8")
+
+    # Dos coordinadores sobre el mismo directorio hacen de dos procesos.
+    assert RegenerationCoordinator(tmp_path, [salida]).run("v1", generar)
+    otro = RegenerationCoordinator(tmp_path, [salida])
+    assert not otro.run("v1", generar)
+    assert len(llamadas) == 1
+
+    salida.unlink()
+    assert otro.run("v1", generar)
+    assert otro.run("v2", generar)
+    assert len(llamadas) == 3
+
+
+def test_remote_request_is_taken_once_and_waiters_see_the_output(tmp_path: Path) -> None:
+    salida = tmp_path / "reporte.html"
+    coordinador = RegenerationCoordinator(tmp_path, [salida])
+    assert coordinador.take_request() is None
+
+    coordinador.request_remote("falta reporte.html")
+    assert coordinador.take_request() == "falta reporte.html"
+    assert coordinador.take_request() is None
+
+    assert not coordinador.wait_until(salida.exists, 0.3)
+    threading.Timer(0.2, lambda: salida.write_text("ok", encoding="utf-8")).start()
+    assert coordinador.wait_until(salida.exists, 5)
+
+
+def test_generation_version_changes_with_code_and_settings(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    watcher = FileWatcher(cache_file=tmp_path / "cache.json")
+    base = cli_main.generation_version(watcher)
+    assert cli_main.generation_version(watcher) == base
+
+    monkeypatch.setattr(cli_main, "code_version", lambda: "otro-codigo")
+    con_codigo = cli_main.generation_version(watcher)
+    assert con_codigo != base
+
+    monkeypatch.setattr(cli_main, "NETWORK_ALLOCATION_POLICY", "m2")
+    assert cli_main.generation_version(watcher) != con_codigo
+    monkeypatch.setattr(cli_main, "PAYLOAD_FORMAT", -1)
+    assert cli_main.generation_version(watcher) not in {base, con_codigo}
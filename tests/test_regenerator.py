@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import threading
+
+from ynk_modelo.utils.regenerator import BackgroundRegenerator
+
+
+def test_requests_during_a_build_coalesce_into_one_follow_up() -> None:
+    liberar = threading.Event()
+    iniciada = threading.Event()
+    llamadas: list[int] = []
+
+    def generar() -> None:
+        llamadas.append(1)
+        iniciada.set()
+        liberar.wait(5)
+
+    regenerador = BackgroundRegenerator(generar)
+    assert regenerador.request("primer cambio")
+    assert iniciada.wait(5)
+    assert regenerador.busy
+
+    # Durante la generación, varios pedidos se funden en una sola pendiente.
+    assert regenerador.request("segundo cambio")
+    assert not regenerador.request("tercer cambio")
+    liberar.set()
+    assert regenerador.wait(5)
+
+    assert len(llamadas) == 2
+    estado = regenerador.status()
+    assert estado["generation"] == 2
+    assert not estado["regenerating"]
+
+
+def test_failed_build_keeps_worker_alive_and_reports_error() -> None:
+    resultados = iter([RuntimeError("pipeline roto"), None])
+
+    def generar() -> None:
+        error = next(resultados)
+        if error is not None:
+            raise error
+
+    regenerador = BackgroundRegenerator(generar)
+    regenerador.request()
+    assert regenerador.wait(5)
+    assert regenerador.status()["last_error"] == "pipeline roto"
+    assert regenerador.generation == 0
+
+    regenerador.request()
+    assert regenerador.wait(5)
+    assert regenerador.status()["last_error"] is None
+    assert regenerador.generation == 1
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from ynk_modelo.interfaces.artifacts import ArtifactWriter
+from ynk_modelo.interfaces.fragments import report_fragments, split_report
+
+REPORTE = """<!DOCTYPE html><html><head><title>t</title></head>
+  <body>
+    <div class="container">
+      <div class="card"><div>uno</div></div>
+      <div class="card">dos</div>
+    </div>
+    <div class="footer">pie</div>
+    <script>const datos = "<div>";</script>
+  </body>
+</html>"""
+
+
+def test_split_report_keeps_container_siblings_and_scripts() -> None:
+    contenido, scripts = split_report(REPORTE)
+    assert contenido.startswith('<div class="container">')
+    assert contenido.endswith('<div class="footer">pie</div>')
+    assert scripts == '<script>const datos = "<div>";</script>'
+
+
+def test_split_report_without_container_drops_brand_bar() -> None:
+    html = '<body><div class="brand-bar"><div>logo</div></div><p>hola</p></body>'
+    assert split_report(html) == ("<p>hola</p>", "")
+    assert split_report("sin body") == ("", "")
+
+
+def test_report_fragments_are_reextracted_only_for_new_versions(tmp_path: Path) -> None:
+    ruta = tmp_path / "reporte.html"
+    with ArtifactWriter(ruta) as destino:
+        destino.write(REPORTE)
+    primero = report_fragments(ruta)
+    assert report_fragments(ruta) is primero
+
+    with ArtifactWriter(ruta) as destino:
+        destino.write(REPORTE.replace("dos", "tres"))
+    segundo = report_fragments(ruta)
+    assert segundo is not primero
+    assert "tres" in segundo[0]
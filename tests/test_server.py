@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from ynk_modelo.cli import server as server_module
+from ynk_modelo.cli.server import AutoRegenHandler
+from ynk_modelo.utils.regenerator import BackgroundRegenerator
+
+
+@pytest.fixture()
+def servidor():
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), AutoRegenHandler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}"
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _pedir(url: str, **cabeceras: str) -> tuple[int, dict[str, str], bytes]:
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=cabeceras)) as respuesta:
+            return respuesta.status, dict(respuesta.headers), respuesta.read()
+    except urllib.error.HTTPError as error:
+        return error.code, dict(error.headers), b""
+
+
+def test_static_files_support_conditional_requests(servidor: str) -> None:
+    estado, cabeceras, cuerpo = _pedir(f"{servidor}/static/css/simulador.css")
+    assert estado == 200
+    assert int(cabeceras["Content-Length"]) == len(cuerpo) > 0
+
+    assert _pedir(f"{servidor}/static/css/simulador.css", **{"If-None-Match": cabeceras["ETag"]})[0] == 304
+    assert _pedir(f"{servidor}/static/css/simulador.css", **{"If-Modified-Since": cabeceras["Last-Modified"]})[0] == 304
+    assert _pedir(f"{servidor}/static/no-existe.css")[0] == 404
+
+
+def test_missing_report_waits_for_first_build(
+    servidor: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    salida = tmp_path / "Simulador_EERR.html"
+    generaciones: list[int] = []
+
+    def generar() -> None:
+        generaciones.append(1)
+        salida.write_text("<html>simulador</html>", encoding="utf-8")
+
+    monkeypatch.setattr(server_module, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setattr(server_module, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setitem(server_module.REPORT_PAGES, "/Simulador_EERR.html", salida)
+    monkeypatch.setattr(AutoRegenHandler, "regenerator", BackgroundRegenerator(generar))
+
+    estado, _, cuerpo = _pedir(f"{servidor}/Simulador_EERR.html")
+    assert estado == 200
+    assert cuerpo == b"<html>simulador</html>"
+    assert generaciones == [1]
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+import re
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from ynk_modelo.config import SIMULATOR_TEMPLATE
+from ynk_modelo.interfaces.simulation import (
+    parse_simulation_request,
+    run_simulation,
+    simulation_context,
+    simulator_baselines,
+    write_simulation_context,
+)
+from ynk_modelo.interfaces.store_payload import encode_simulator_store, write_store_payload
+
+ROLE_COSTS = {
+    "Jefe": {"fixed": 879_250.0, "commission": 0.011},
+    "Fulltime": {"fixed": 711_250.0, "commission": 0.011},
+    "Part Time 20": {"fixed": 300_570.0, "commission": 0.011},
+    "Bodeguero": {"fixed": 721_250.0, "commission": 0.0},
+    "Anfitrión": {"fixed": 706_250.0, "commission": 150_000.0},
+}
+TOTAL_SALES = ["Jefe"]
+EXCLUDED = ["Bodeguero"]
+DEFAULT_UF = 38_000.0
+CONTEXTO = simulation_context(ROLE_COSTS, TOTAL_SALES, EXCLUDED, DEFAULT_UF)
+MESES = [f"2025-{mes:02d}" for mes in range(1, 13)]
+
+
+def _config(venta: float, factor: float, banner: str) -> dict[str, object]:
+    return {
+        "banner": banner,
+        "months": MESES,
+        "sales": {mes: venta * (1 + i / 20) for i, mes in enumerate(MESES[:-1])} | {"2025-12": None},
+        "margins": {mes: 48.5 - i for i, mes in enumerate(MESES)},
+        "staff": {"Jefe": 1, "Fulltime": 3, "Part Time 20": 2.4, "Bodeguero": 1, "Anfitrión": 1},
+        "rent": {
+            "vmm_uf": 350.0,
+            "percent": 0.07,
+            "ggcc": 714_571.0,
+            "fondo_promocion": 0.1,
+            "uf_value": 37_500.0,
+            "uf_values": {mes: 37_000.0 + 50 * i for i, mes in enumerate(MESES)},
+            "factor": factor,
+        },
+        "others_rate": 0.029,
+        "network_systems_cost": 250_000.0,
+        "payment_commission_rate": 0.012,
+    }
+
+
+def _funcion_js(fuente: str, nombre: str) -> str:
+    """Extrae el cuerpo completo de ``function nombre(...) {...}`` de la plantilla."""
+    inicio = re.search(rf"function {nombre}\(", fuente).start()
+    profundidad = 0
+    for posicion in range(fuente.index("{", inicio), len(fuente)):
+        profundidad += {"{": 1, "}": -1}.get(fuente[posicion], 0)
+        if profundidad == 0:
+            return fuente[inicio : posicion + 1]
+    raise AssertionError(f"No se pudo extraer {nombre}.")
+
+
+def _simular_js(configs: dict[str, dict], ajustes: dict[str, dict]) -> dict[str, list[list[float]]]:
+    fuente = SIMULATOR_TEMPLATE.read_text(encoding="utf-8")
+    funciones = "\n".join(
+        _funcion_js(fuente, nombre)
+        for nombre in (
+            "computeStaffAggregatesForConfig",
+            "computeEbitdaForStoreMonth",
+            "parseMonthKey",
+            "getRentFactorForMonth",
+            "getUfValueForMonth",
+        )
+    )
+    script = f"""
+const roleCosts = {json.dumps(ROLE_COSTS)};
+const TOTAL_SALES_COMMISSIONS = {json.dumps(TOTAL_SALES)};
+const EXCLUDED_COMMISSION_ROLES = {json.dumps(EXCLUDED)};
+const DEFAULT_UF = {DEFAULT_UF};
+const SCENARIO_LABELS = {{}};
+{funciones}
+const configs = {json.dumps(configs)};
+const ajustes = {json.dumps(ajustes)};
+const salida = {{}};
+for (const [tienda, config] of Object.entries(configs)) {{
+  salida[tienda] = config.months.map((mes) => {{
+    const r = computeEbitdaForStoreMonth(config, mes, ajustes[tienda]);
+    return [r.venta, r.ebitda, r.margenEbitda];
+  }});
+}}
+process.stdout.write(JSON.stringify(salida));
+"""
+    resultado = subprocess.run(
+        ["node", "-e", script], capture_output=True, text=True, check=True, timeout=60
+    )
+    return json.loads(resultado.stdout)
+
+
+def test_batch_simulation_matches_simulator_javascript(tmp_path: Path) -> None:
+    if shutil.which("node") is None:
+        pytest.skip("node no está disponible")
+    salida = tmp_path / "Simulador.html"
+    configs = {
+        "T-1": _config(120_000_000.0, 1.5, "Banner A"),
+        "T-2": _config(45_000_000.0, 1.0, "Banner A"),
+        "T-3": _config(80_000_000.0, 2.0, "Banner B"),
+    }
+    write_store_payload(salida, {t: encode_simulator_store(c) for t, c in configs.items()})
+    write_simulation_context(salida, CONTEXTO)
+
+    comunes = {"deflators": {"2025-03": -12.5, "2025-07": 30}, "margins": {"2025-02": 41.0}}
+    peticion = {
+        "banner": "Banner A",
+        "stores": {"T-3": {"margins": {"2025-07": -5}, "deflators": {"2025-11": 8}}},
+        "adjustments": comunes,
+    }
+    resultado = run_simulation(salida, parse_simulation_request(json.dumps(peticion).encode()))
+
+    ajustes_js = {
+        "T-1": comunes,
+        "T-2": comunes,
+        "T-3": {
+            "deflators": {**comunes["deflators"], "2025-11": 8},
+            "margins": {**comunes["margins"], "2025-07": -5},
+        },
+    }
+    esperado = _simular_js(configs, ajustes_js)
+    assert set(resultado["stores"]) == set(configs)
+    for tienda, filas in esperado.items():
+        obtenido = resultado["stores"][tienda]
+        assert obtenido["months"] == MESES
+        for indice, (venta, ebitda, margen) in enumerate(filas):
+            assert obtenido["sales"][indice] == pytest.approx(venta, rel=1e-9)
+            assert obtenido["ebitda"][indice] == pytest.approx(ebitda, rel=1e-9, abs=1e-6)
+            assert obtenido["ebitda_margin"][indice] == pytest.approx(margen, rel=1e-9, abs=1e-9)
+
+    venta_total = sum(sum(fila[0] for fila in filas) for filas in esperado.values())
+    ebitda_total = sum(sum(fila[1] for fila in filas) for filas in esperado.values())
+    assert resultado["totals"]["sales"] == pytest.approx(venta_total)
+    assert resultado["totals"]["ebitda_margin"] == pytest.approx(ebitda_total / venta_total * 100)
+
+
+def test_simulation_request_validation_and_overrides(tmp_path: Path) -> None:
+    salida = tmp_path / "Simulador.html"
+    write_store_payload(salida, {"T-1": encode_simulator_store(_config(1e8, 1.0, "B"))})
+    write_simulation_context(salida, CONTEXTO)
+
+    with pytest.raises(ValueError):
+        parse_simulation_request(b"[1, 2]")
+    with pytest.raises(ValueError):
+        parse_simulation_request(b"{}")
+
+    peticion = parse_simulation_request(
+        json.dumps(
+            {
+                "stores": ["T-1", "X"],
+                "months": ["2025-12"],
+                "adjustments": {"sales": {"2025-12": 2e8}, "staff": {"Fulltime": 0}},
+            }
+        ).encode()
+    )
+    resultado = run_simulation(salida, peticion)
+    assert resultado["missing"] == ["X"]
+    assert resultado["stores"]["T-1"]["sales"] == [2e8]
+    assert resultado["totals"]["months"] == 1
+
+    sin_ajuste = run_simulation(salida, parse_simulation_request(b'{"stores": ["T-1"], "months": ["2025-12"]}'))
+    assert sin_ajuste["stores"]["T-1"]["sales"] == [0.0]
+    assert sin_ajuste["totals"]["months"] == 0
+
+
+def test_baselines_match_unadjusted_simulation(tmp_path: Path) -> None:
+    salida = tmp_path / "Simulador.html"
+    configs = {
+        "T-1": _config(120_000_000.0, 1.5, "Banner A"),
+        "T-2": _config(45_000_000.0, 1.0, "Banner A"),
+        "T-3": _config(80_000_000.0, 2.0, "Banner B"),
+    }
+    fichas = {t: encode_simulator_store(c) for t, c in configs.items()}
+    write_store_payload(salida, fichas)
+    write_simulation_context(salida, CONTEXTO)
+
+    series, banners = simulator_baselines(configs, CONTEXTO)
+    assert set(banners) == {"Banner A", "Banner B"}
+    resumen = banners["Banner A"]["2025"]
+    assert resumen["stores"] == ["T-1", "T-2"]
+
+    simulado = run_simulation(salida, parse_simulation_request(b'{"banner": "Banner A", "year": "2025"}'))
+    for posicion, tienda in enumerate(resumen["stores"]):
+        assert series[tienda] == pytest.approx(simulado["stores"][tienda]["ebitda"], abs=0.01)
+        assert resumen["ebitda"][posicion] == pytest.approx(simulado["stores"][tienda]["totals"]["ebitda"], abs=0.1)
+    assert resumen["totals"]["sales"] == pytest.approx(simulado["totals"]["sales"])
+    assert resumen["totals"]["ebitda_margin"] == pytest.approx(simulado["totals"]["ebitda_margin"])
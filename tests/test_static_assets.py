@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from ynk_modelo.interfaces.static_assets import StaticAssets
+
+
+def test_fingerprinted_names_resolve_and_follow_content(tmp_path: Path) -> None:
+    (tmp_path / "css").mkdir()
+    hoja = tmp_path / "css" / "app.css"
+    hoja.write_text("body { color: red; }", encoding="utf-8")
+    (tmp_path / "logo.svg").write_text("<svg/>", encoding="utf-8")
+
+    assets = StaticAssets(tmp_path, verificar_cambios=True)
+    assert assets.build() == 2
+    url = assets.fingerprinted("css/app.css")
+    assert url.startswith("css/app.") and url.endswith(".css") and url != "css/app.css"
+    assert assets.resolve(url) == ("css/app.css", True)
+    assert assets.resolve("css/app.css") == ("css/app.css", False)
+    assert assets.fingerprinted("no/existe.js") == "no/existe.js"
+
+    version = assets.version
+    hoja.write_text("body { color: blue; }", encoding="utf-8")
+    os.utime(hoja, ns=(hoja.stat().st_atime_ns, hoja.stat().st_mtime_ns + 1_000_000_000))
+    nueva = assets.fingerprinted("css/app.css")
+    assert nueva != url
+    assert assets.version != version
+    assert assets.resolve(url) == ("css/app.css", False)
+    assert assets.fingerprinted("logo.svg").startswith("logo.")
+
+
+def test_manifest_is_built_on_first_use_when_not_built_at_startup(tmp_path: Path) -> None:
+    (tmp_path / "app.js").write_text("console.log(1);", encoding="utf-8")
+    assets = StaticAssets(tmp_path)
+
+    url = assets.fingerprinted("app.js")
+    assert url != "app.js"
+    assert assets.resolve(url) == ("app.js", True)
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from ynk_modelo.config import METRIC_CONFIG, REAL_SCENARIO, BUDGET_SCENARIO
+from ynk_modelo.interfaces.state_report import _prepare_store_data
+
+TIENDA = "8006-Aufbau Temuco"
+
+
+def _fila(mes: str, escenario: str, venta: float | None) -> dict[str, object]:
+    fila: dict[str, object] = {clave: venta for clave, _, _ in METRIC_CONFIG}
+    fila.update(
+        {
+            "Sucursal": TIENDA,
+            "Banner": "Aufbau",
+            "Mes": pd.Timestamp(mes),
+            "Escenario": escenario,
+            "Es_presupuesto": escenario == BUDGET_SCENARIO,
+        }
+    )
+    return fila
+
+
+def test_payload_uses_last_row_per_month_and_marks_real_months() -> None:
+    eerr = pd.DataFrame(
+        [
+            _fila("2025-02-01", BUDGET_SCENARIO, 20.0),
+            _fila("2025-01-01", REAL_SCENARIO, 10.0),
+            _fila("2025-02-01", REAL_SCENARIO, None),
+            _fila("2025-12-01", BUDGET_SCENARIO, 30.0),
+        ]
+    )
+    store_data, banner_map, banner_summary = _prepare_store_data(eerr)
+    tienda = store_data[TIENDA]
+
+    assert tienda["months"] == ["2025-01", "2025-02", "2025-12"]
+    assert tienda["values"]["Venta"] == {"2025-01": 10.0, "2025-02": None, "2025-12": 30.0}
+    assert tienda["scenarios"][BUDGET_SCENARIO]["Venta"] == {"2025-02": 20.0, "2025-12": 30.0}
+    assert tienda["month_types"] == {
+        "2025-01": REAL_SCENARIO,
+        "2025-02": REAL_SCENARIO,
+        "2025-12": BUDGET_SCENARIO,
+    }
+    assert tienda["ebitda"]["2025-02"] == 0.0
+    assert set(tienda["rent_details"]["thresholds_by_month"]) == set(tienda["months"])
+    assert tienda["rent_details"]["default_month"] == "2025-12"
+    assert banner_map == {"Aufbau": [TIENDA]}
+    assert banner_summary["Aufbau"]["stores"][TIENDA]["2025-12"] == 30.0
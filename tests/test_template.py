@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import io
+import os
+from pathlib import Path
+
+from ynk_modelo.interfaces.template import compile_template, write_template
+
+
+def test_markers_are_substituted_in_one_pass(tmp_path: Path) -> None:
+    plantilla = tmp_path / "reporte.html"
+    plantilla.write_text(
+        "const a = __DATA__; const b = '__NAME__'; const c = '__ALL__'; const d = __DATA__;",
+        encoding="utf-8",
+    )
+    destino = io.StringIO()
+    write_template(plantilla, {"__DATA__": {"tienda": "Ñuñoa"}, "__NAME__": "__DATA__"}, destino)
+
+    assert destino.getvalue() == (
+        "const a = {\"tienda\": \"Ñuñoa\"}; const b = '__DATA__'; "
+        "const c = '__ALL__'; const d = {\"tienda\": \"Ñuñoa\"};"
+    )
+
+
+def test_compiled_template_is_reused_until_it_changes(tmp_path: Path) -> None:
+    plantilla = tmp_path / "reporte.html"
+    plantilla.write_text("<p>__A__</p>", encoding="utf-8")
+    piezas = compile_template(plantilla)
+    assert piezas == ("<p>", "__A__", "</p>")
+    assert compile_template(plantilla) is piezas
+
+    plantilla.write_text("<b>__A__</b>", encoding="utf-8")
+    estado = plantilla.stat()
+    os.utime(plantilla, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000))
+    assert compile_template(plantilla) == ("<b>", "__A__", "</b>")